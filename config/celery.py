@@ -6,6 +6,15 @@ from celery import Celery
 # set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.local')
 
+#: Queue for container actions triggered by users in the UI or the API.
+QUEUE_INTERACTIVE = 'interactive'
+
+#: Queue for container actions triggered in bulk by admins or sweeps.
+QUEUE_BULK = 'bulk'
+
+#: Queue for periodic maintenance tasks.
+QUEUE_MAINTENANCE = 'maintenance'
+
 app = Celery('kiosc')
 
 # Using a string here means the worker doesn't have to serialize
@@ -14,12 +23,25 @@ app = Celery('kiosc')
 #   should have a `CELERY_` prefix.
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
-if 'production' in os.environ.get('DJANGO_SETTINGS_MODULE'):
-    # Configure routing as we nee different degrees of concurrency for the background job processing.
-    app.conf.task_routes = {}
+# Configure routing as we need different degrees of concurrency for the
+# background job processing. Slow container starts must not block user-facing
+# actions and periodic sweeps, so each class of work gets its own queue and can
+# be served by workers with their own concurrency.
+app.conf.task_routes = {
+    'containers.tasks.container_task': {'queue': QUEUE_INTERACTIVE},
+    'containers.tasks.sync_container_state_task': {'queue': QUEUE_INTERACTIVE},
+    'kioscadmin.tasks.*': {'queue': QUEUE_MAINTENANCE},
+}
+
+# Explicitely set the name of the default queue to default (is celery).
+app.conf.task_default_queue = 'default'
 
-    # Explicitely set the name of the default queue to default (is celery).
-    app.conf.task_default_queue = 'default'
+# Enable message priorities within a queue for the Redis broker.
+app.conf.broker_transport_options = {
+    'queue_order_strategy': 'priority',
+    'priority_steps': list(range(10)),
+    'sep': ':',
+}
 
 # Load task modules from all registered Django app configs.
 app.autodiscover_tasks()
@@ -312,6 +312,9 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERYD_TASK_TIME_LIMIT = 5 * 60
 # http://docs.celeryproject.org/en/latest/userguide/configuration.html#task-soft-time-limit
 CELERYD_TASK_SOFT_TIME_LIMIT = 60
+# http://docs.celeryproject.org/en/latest/userguide/configuration.html#worker-prefetch-multiplier
+# Do not let a worker reserve fast actions behind a long running one
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
 
 # http://docs.celeryproject.org/en/latest/userguide/configuration.html#task-always-eager
 CELERY_TASK_ALWAYS_EAGER = False
@@ -770,12 +773,58 @@ KIOSC_DOCKER_MAX_ULIMIT_NOFILE_HARD = env.str(
 KIOSC_NETWORK_MODE = env.str('KIOSC_NETWORK_MODE', 'host')
 #: Docker network name.
 KIOSC_DOCKER_NETWORK = env.str('KIOSC_DOCKER_NETWORK', 'kiosc-net')
+#: ID of this Kiosc instance, set as label on its Docker containers. Must be
+#: unique among the Kiosc instances sharing a Docker host, as each instance
+#: prunes the unknown Docker containers with its label. Set in the
+#: environment specific settings, required in production.
+KIOSC_INSTANCE_ID = None
 #: Name of the web server Docker container.
 KIOSC_DOCKER_WEB_SERVER = env.str('KIOSC_DOCKER_WEB_SERVER', 'kiosc-web')
 #: Min delay in seconds for container actions.
 KIOSC_DOCKER_ACTION_MIN_DELAY = env.int('KIOSC_DOCKER_ACTION_MIN_DELAY', 1)
 #: Max threshold for inactive running docker containers in days.
 KIOSC_DOCKER_MAX_INACTIVITY = env.int('KIOSC_DOCKER_MAX_INACTIVITY', 7)
+#: Max number of running containers on the site (0 for no limit).
+KIOSC_SITE_MAX_RUNNING_CONTAINERS = env.int(
+    'KIOSC_SITE_MAX_RUNNING_CONTAINERS', 0
+)
+#: Max number of CPUs assigned to running containers on the site (0 for no limit).
+KIOSC_SITE_MAX_CPU = env.float('KIOSC_SITE_MAX_CPU', 0)
+#: Max memory in MB assigned to running containers on the site (0 for no limit).
+KIOSC_SITE_MAX_MEMORY = env.int('KIOSC_SITE_MAX_MEMORY', 0)
+#: Number of parallel Docker requests when collecting resource usage.
+KIOSC_RESOURCE_USAGE_WORKERS = env.int('KIOSC_RESOURCE_USAGE_WORKERS', 8)
+#: Hours to keep raw resource usage samples before downsampling to hourly.
+KIOSC_RESOURCE_USAGE_RAW_RETENTION = env.int(
+    'KIOSC_RESOURCE_USAGE_RAW_RETENTION', 24
+)
+#: Days to keep hourly resource usage samples.
+KIOSC_RESOURCE_USAGE_RETENTION = env.int('KIOSC_RESOURCE_USAGE_RETENTION', 30)
+#: Seconds a pending job absorbs repeated submissions of the same action.
+KIOSC_JOB_COALESCE_TIMEOUT = env.int('KIOSC_JOB_COALESCE_TIMEOUT', 300)
+#: Seconds without a transition after which an action counts as interrupted.
+KIOSC_ACTION_JOURNAL_TIMEOUT = env.int('KIOSC_ACTION_JOURNAL_TIMEOUT', 3600)
+#: Number of parallel tasks removing the Docker containers of a deleted project.
+KIOSC_TEARDOWN_CONCURRENCY = env.int('KIOSC_TEARDOWN_CONCURRENCY', 4)
+#: Max number of jobs of a bulk action run at once.
+KIOSC_BULK_CONCURRENCY = env.int('KIOSC_BULK_CONCURRENCY', 4)
+#: Seconds between refreshes of the Docker snapshot shown in the admin view.
+KIOSC_DOCKER_SNAPSHOT_INTERVAL = env.int('KIOSC_DOCKER_SNAPSHOT_INTERVAL', 60)
+#: Number of zombie Docker containers removed in parallel.
+KIOSC_PRUNE_WORKERS = env.int('KIOSC_PRUNE_WORKERS', 4)
+#: Seconds before the first retry of an action, doubled with every retry.
+KIOSC_RETRY_BACKOFF = env.int('KIOSC_RETRY_BACKOFF', 30)
+#: Max seconds between retries of an action.
+KIOSC_RETRY_BACKOFF_MAX = env.int('KIOSC_RETRY_BACKOFF_MAX', 3600)
+#: Number of crashes within the crash loop window after which a container is
+#: not restarted anymore.
+KIOSC_CRASH_LOOP_LIMIT = env.int('KIOSC_CRASH_LOOP_LIMIT', 5)
+#: Seconds in which crashes of a container are counted.
+KIOSC_CRASH_LOOP_WINDOW = env.int('KIOSC_CRASH_LOOP_WINDOW', 3600)
+#: First port assigned automatically to containers in host network mode.
+KIOSC_HOST_PORT_MIN = env.int('KIOSC_HOST_PORT_MIN', 10000)
+#: Last port assigned automatically to containers in host network mode.
+KIOSC_HOST_PORT_MAX = env.int('KIOSC_HOST_PORT_MAX', 19999)
 #: Max log lines allowed for a container
 KIOSC_CONTAINER_MAX_LOG_LINES = env.int('KIOSC_CONTAINER_MAX_LOG_LINES', 10_000)
 #: Max log lines allowed for a container
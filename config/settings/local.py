@@ -29,6 +29,9 @@ TEMPLATES[0]['OPTIONS']['debug'] = DEBUG
 # Note: This key only used for development and testing
 SECRET_KEY = env('DJANGO_SECRET_KEY', default='CHANGEME!!!')
 
+# Note: Set a unique ID if several instances share the Docker host
+KIOSC_INSTANCE_ID = env.str('KIOSC_INSTANCE_ID', default='kiosc-local')
+
 # Mail settings
 # ------------------------------------------------------------------------------
 EMAIL_PORT = 1025
@@ -15,6 +15,11 @@ from .base import *  # noqa
 # Raises ImproperlyConfigured exception if DJANGO_SECRET_KEY not in os.environ
 SECRET_KEY = env('DJANGO_SECRET_KEY')
 
+# Raises ImproperlyConfigured exception if KIOSC_INSTANCE_ID not in os.environ.
+# Instances sharing a Docker host would prune each other's Docker containers
+# with a common default.
+KIOSC_INSTANCE_ID = env.str('KIOSC_INSTANCE_ID')
+
 # This ensures that Django will be able to detect a secure connection
 # properly on Heroku.
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
@@ -17,6 +17,7 @@ TEMPLATES[0]['OPTIONS']['debug'] = True
 # ------------------------------------------------------------------------------
 # Note: This key only used for development and testing.
 SECRET_KEY = env('DJANGO_SECRET_KEY', default='CHANGEME!!!')
+KIOSC_INSTANCE_ID = env.str('KIOSC_INSTANCE_ID', default='kiosc-test')
 
 # MANAGER CONFIGURATION
 # ------------------------------------------------------------------------------
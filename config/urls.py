@@ -10,6 +10,8 @@ from django.views.generic import TemplateView
 
 from projectroles.views import HomeView
 
+from containers.views import ProjectListColumnAjaxView
+
 urlpatterns = [
     path('', HomeView.as_view(), name='home'),
     path(
@@ -32,6 +34,12 @@ urlpatterns = [
     path('api/auth/', include('knox.urls')),
     # Social auth for OIDC support
     path('social/', include('social_django.urls')),
+    # Project list columns with the container counts of all listed projects,
+    # overrides the projectroles view
+    path(
+        'project/ajax/list/columns',
+        ProjectListColumnAjaxView.as_view(),
+    ),
     # Projectroles URLs
     path('project/', include('projectroles.urls')),
     # Timeline URLs
@@ -1,6 +1,7 @@
 from django.views.generic import ListView
 
 from containers.models import Container
+from containers.rules import get_container_perms
 from projectroles.views import (
     LoginRequiredMixin,
     LoggedInPermissionMixin,
@@ -20,10 +21,10 @@ class ContainerSiteListView(
 
     def get_queryset(self):
         res = []
-        for container in Container.objects.all():
-            if self.request.user.has_perm(
-                'containers.view_container', container.project
-            ):
+        for container in Container.objects.select_related('project'):
+            if get_container_perms(self.request, container.project)[
+                'view_container'
+            ]:
                 res.append(container)
 
         return res
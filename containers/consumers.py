@@ -4,8 +4,7 @@ from channels.generic.websocket import WebsocketConsumer
 import websocket
 import threading
 
-from django.conf import settings
-from .models import Container
+from .models import Container, REPLICA_COOKIE
 
 
 class TunnelConsumer(WebsocketConsumer):
@@ -15,11 +14,15 @@ class TunnelConsumer(WebsocketConsumer):
 
     def connect(self):
         """On connecting the consumer, create internal connection to tunnel target."""
-        self._connect_next()
-        self.accept()
+        if self._connect_next():
+            self.accept()
+
+        else:
+            self.close()
 
     def _connect_next(self):
-        """Create web socket to the tunnel/proxy target."""
+        """Create web socket to the tunnel/proxy target, return whether a
+        replica of the container is running."""
         # TODO: check project permissions for users
         # Get DockerApp information for querying the port information.
         container = Container.objects.get(
@@ -33,17 +36,18 @@ class TunnelConsumer(WebsocketConsumer):
 
         websocket.enableTrace(self.debug)
 
-        if settings.KIOSC_NETWORK_MODE == 'docker-shared':
-            ws_url = 'ws://%s:%d/%s' % (
-                container.container_id[:12],
-                container.container_port,
-                self.scope['url_route']['kwargs']['path'],
-            )
-        else:
-            ws_url = 'ws://localhost:%d/%s' % (
-                container.host_port,
-                self.scope['url_route']['kwargs']['path'],
-            )
+        # Connect to the replica the proxy view selected for the client
+        _replica, address = container.select_replica(
+            self.scope.get('cookies', {}).get(REPLICA_COOKIE)
+        )
+
+        if not address:
+            return False
+
+        ws_url = 'ws://%s:%d/%s' % (
+            *address,
+            self.scope['url_route']['kwargs']['path'],
+        )
 
         self.ws = websocket.WebSocketApp(ws_url, on_message=on_message)
 
@@ -51,10 +55,12 @@ class TunnelConsumer(WebsocketConsumer):
         thread = threading.Thread(target=self.ws.run_forever, args=())
         thread.daemon = True
         thread.start()
+        return True
 
     def disconnect(self, close_code):
         """On disconnecting, disconnect the internal web socket."""
-        self.ws.close()
+        if hasattr(self, 'ws'):
+            self.ws.close()
 
     def receive(self, text_data=None, bytes_data=None):
         """Forward any text and binary data to the internal web socket."""
@@ -5,7 +5,7 @@ from django.conf import settings
 from django.forms import widgets
 from django.urls import reverse
 
-from containers.models import Container, MASKED_KEYWORD
+from containers.models import Container, HostPortBlock, MASKED_KEYWORD
 from filesfolders.models import File
 
 
@@ -40,6 +40,14 @@ class ContainerForm(forms.ModelForm):
             'project',
             'max_retries',
             'inactivity_threshold',
+            'inactivity_pause_threshold',
+            'inactivity_delete_threshold',
+            'cpu_limit',
+            'memory_limit',
+            'pids_limit',
+            'replicas',
+            'schedule_start',
+            'schedule_stop',
         ]
 
     def __init__(self, *args, **kwargs):
@@ -54,13 +62,35 @@ class ContainerForm(forms.ModelForm):
         if settings.KIOSC_NETWORK_MODE == 'docker-shared':
             self.fields['host_port'].widget = forms.HiddenInput()
 
-        # Make host port field mandatory in host mode
-        if settings.KIOSC_NETWORK_MODE == 'host':
-            self.fields['host_port'].required = True
-
     def clean(self):
-        """Override to check for secret keys in the environment."""
+        """Override to check for a free host port and for secret keys in
+        the environment."""
         cleaned_data = super().clean()
+        host_port = cleaned_data.get('host_port')
+
+        # Ports of replicas and allocated ports are not covered by the
+        # unique constraint of the field
+        if (
+            host_port is not None
+            and host_port != self.instance.host_port
+            and 'host_port' not in self.errors
+            and HostPortBlock.objects.is_used(host_port)
+        ):
+            self.add_error('host_port', 'Host port is already in use')
+
+        # An empty host port is assigned automatically in host mode, a
+        # cleared port of an existing container is released before that
+        if (
+            settings.KIOSC_NETWORK_MODE == 'host'
+            and self.instance.host_port is None
+            and host_port is None
+            and 'host_port' not in self.errors
+            and not HostPortBlock.objects.has_free_port()
+        ):
+            self.add_error(
+                'host_port', 'No free host port left, please specify one'
+            )
+
         environment = cleaned_data.get('environment', {})
         secret_keys = cleaned_data.get('environment_secret_keys')
 
@@ -0,0 +1,96 @@
+"""Buffered writing of the log entries of container jobs"""
+
+import time
+import traceback
+
+from bgjobs.models import BackgroundJobLogEntry, LOG_LEVEL_DEBUG
+
+from containers.models import ContainerLogEntry, PROCESS_TASK
+
+
+#: Seconds after which buffered log entries are written at the latest.
+DEFAULT_FLUSH_INTERVAL = 2
+
+#: Number of buffered log entries after which they are written.
+DEFAULT_MAX_ENTRIES = 500
+
+
+class JobLogWriter:
+    """
+    Collect the log entries of a running container job and write them with
+    ``bulk_create``.
+
+    While the context manager is active, ``add_log_entry`` and
+    ``add_container_log_entry`` of the job are buffered. The entries are
+    written on ``flush``, which the state machine calls after every
+    transition, after ``flush_interval`` seconds or ``max_entries`` entries,
+    and on exit, also if an exception is raised.
+    """
+
+    def __init__(
+        self,
+        job,
+        flush_interval=DEFAULT_FLUSH_INTERVAL,
+        max_entries=DEFAULT_MAX_ENTRIES,
+    ):
+        self.job = job
+        self.flush_interval = flush_interval
+        self.max_entries = max_entries
+        self.job_entries = []
+        self.container_entries = []
+        self.last_flush = time.monotonic()
+
+    def __enter__(self):
+        self.job.log_writer = self
+        return self
+
+    def __exit__(self, *exc_info):
+        self.job.log_writer = None
+        self.flush()
+        return False
+
+    def add_job_entry(self, message, level):
+        """Buffer a log entry of the background job."""
+        self.job_entries.append(
+            BackgroundJobLogEntry(
+                job=self.job.bg_job, message=message, level=level
+            )
+        )
+        self._flush_if_due()
+
+    def add_container_entry(self, **kwargs):
+        """Buffer a log entry of the container, ``kwargs`` are passed on to
+        ``ContainerLogEntry``."""
+        self.container_entries.append(
+            ContainerLogEntry(container=self.job.container, **kwargs)
+        )
+        self._flush_if_due()
+
+    def add_traceback(self, user=None):
+        """Buffer the traceback of the current exception as one entry."""
+        self.add_container_entry(
+            text=traceback.format_exc().rstrip(),
+            process=PROCESS_TASK,
+            user=user,
+            level=LOG_LEVEL_DEBUG,
+        )
+
+    def _flush_if_due(self):
+        if (
+            len(self.job_entries) + len(self.container_entries)
+            >= self.max_entries
+            or time.monotonic() - self.last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self):
+        """Write the buffered log entries."""
+        if self.job_entries:
+            BackgroundJobLogEntry.objects.bulk_create(self.job_entries)
+            self.job_entries = []
+
+        if self.container_entries:
+            ContainerLogEntry.objects.bulk_create(self.container_entries)
+            self.container_entries = []
+
+        self.last_flush = time.monotonic()
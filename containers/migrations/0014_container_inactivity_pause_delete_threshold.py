@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('containers', '0013_alter_container_environment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='container',
+            name='inactivity_delete_threshold',
+            field=models.IntegerField(
+                blank=True,
+                help_text='Number of days the container is allowed to be stopped without proxy access before it is removed from Docker (empty to disable).',
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name='container',
+            name='inactivity_pause_threshold',
+            field=models.IntegerField(
+                blank=True,
+                help_text='Number of minutes the container is allowed to run without proxy access before it is paused (empty to disable).',
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('containers', '0014_container_inactivity_pause_delete_threshold'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='container',
+            name='config_fingerprint',
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text='Fingerprint of the configuration the Docker container was created with',
+                max_length=64,
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('containers', '0015_container_config_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='container',
+            name='cpu_limit',
+            field=models.FloatField(
+                blank=True,
+                help_text='Number of CPUs the container is allowed to use, e.g. 0.5 (empty for no limit).',
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name='container',
+            name='memory_limit',
+            field=models.IntegerField(
+                blank=True,
+                help_text='Memory in MB the container is allowed to use (empty for no limit).',
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name='container',
+            name='pids_limit',
+            field=models.IntegerField(
+                blank=True,
+                help_text='Number of processes the container is allowed to run (empty for no limit).',
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:52
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('containers', '0016_container_resource_limits'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContainerResourceUsage',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'date_collected',
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        help_text='DateTime of the sample',
+                    ),
+                ),
+                (
+                    'resolution',
+                    models.CharField(
+                        choices=[('raw', 'raw'), ('hourly', 'hourly')],
+                        default='raw',
+                        help_text='Resolution of the sample',
+                        max_length=32,
+                    ),
+                ),
+                (
+                    'cpu_percent',
+                    models.FloatField(
+                        default=0, help_text='CPU usage in percent of one CPU'
+                    ),
+                ),
+                (
+                    'memory_usage',
+                    models.BigIntegerField(
+                        default=0, help_text='Memory usage in bytes'
+                    ),
+                ),
+                (
+                    'memory_limit',
+                    models.BigIntegerField(
+                        blank=True, help_text='Memory limit in bytes', null=True
+                    ),
+                ),
+                (
+                    'network_rx',
+                    models.BigIntegerField(
+                        default=0, help_text='Received network traffic in bytes'
+                    ),
+                ),
+                (
+                    'network_tx',
+                    models.BigIntegerField(
+                        default=0,
+                        help_text='Transmitted network traffic in bytes',
+                    ),
+                ),
+                (
+                    'pids',
+                    models.IntegerField(
+                        blank=True, help_text='Number of processes', null=True
+                    ),
+                ),
+                (
+                    'container',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='resource_usage',
+                        to='containers.container',
+                    ),
+                ),
+            ],
+            options={
+                'ordering': ['date_collected'],
+                'indexes': [
+                    models.Index(
+                        fields=['container', 'resolution', 'date_collected'],
+                        name='containers__contain_616ccc_idx',
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def remove_duplicate_locks(apps, schema_editor):
+    ContainerActionLock = apps.get_model('containers', 'ContainerActionLock')
+    seen = set()
+    for row in ContainerActionLock.objects.order_by(
+        'container_id', '-date_of_action', '-id'
+    ):
+        if row.container_id in seen:
+            row.delete()
+        else:
+            seen.add(row.container_id)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('containers', '0017_containerresourceusage'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_locks, reverse_code=migrations.RunPython.noop
+        ),
+        migrations.AlterField(
+            model_name='containeractionlock',
+            name='container',
+            field=models.OneToOneField(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name='action_lock',
+                to='containers.container',
+            ),
+        ),
+    ]
@@ -0,0 +1,122 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('containers', '0018_containeractionlock_one_to_one'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContainerActionJournal',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'date_created',
+                    models.DateTimeField(
+                        auto_now_add=True, help_text='DateTime of creation'
+                    ),
+                ),
+                (
+                    'date_modified',
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text='DateTime of the last transition',
+                    ),
+                ),
+                (
+                    'action',
+                    models.CharField(
+                        choices=[
+                            ('start', 'start'),
+                            ('restart', 'restart'),
+                            ('stop', 'stop'),
+                            ('pause', 'pause'),
+                            ('unpause', 'unpause'),
+                            ('delete', 'delete'),
+                        ],
+                        max_length=32,
+                    ),
+                ),
+                (
+                    'state_before',
+                    models.CharField(
+                        choices=[
+                            ('created', 'created'),
+                            ('restarting', 'restarting'),
+                            ('running', 'running'),
+                            ('paused', 'paused'),
+                            ('exited', 'exited'),
+                            ('dead', 'dead'),
+                            ('deleting', 'deleting'),
+                            ('deleted', 'deleted'),
+                            ('pulling', 'pulling'),
+                            ('initial', 'initial'),
+                            ('failed', 'failed'),
+                        ],
+                        help_text='Container state before the action',
+                        max_length=32,
+                    ),
+                ),
+                (
+                    'transition',
+                    models.CharField(
+                        blank=True,
+                        default='',
+                        help_text='Last transition performed',
+                        max_length=64,
+                    ),
+                ),
+                (
+                    'state',
+                    models.CharField(
+                        choices=[
+                            ('created', 'created'),
+                            ('restarting', 'restarting'),
+                            ('running', 'running'),
+                            ('paused', 'paused'),
+                            ('exited', 'exited'),
+                            ('dead', 'dead'),
+                            ('deleting', 'deleting'),
+                            ('deleted', 'deleted'),
+                            ('pulling', 'pulling'),
+                            ('initial', 'initial'),
+                            ('failed', 'failed'),
+                        ],
+                        help_text='Container state after the last transition',
+                        max_length=32,
+                    ),
+                ),
+                (
+                    'container',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='action_journal',
+                        to='containers.container',
+                    ),
+                ),
+                (
+                    'job',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='action_journal',
+                        to='containers.containerbackgroundjob',
+                    ),
+                ),
+            ],
+            options={
+                'ordering': ['date_created'],
+            },
+        ),
+    ]
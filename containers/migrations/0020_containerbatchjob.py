@@ -0,0 +1,90 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:10
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('containers', '0019_containeractionjournal'),
+        ('projectroles', '0039_remove_project_public_guest_access'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContainerBatchJob',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'date_created',
+                    models.DateTimeField(
+                        auto_now_add=True, help_text='DateTime of creation'
+                    ),
+                ),
+                (
+                    'sodar_uuid',
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        help_text='Batch SODAR UUID',
+                        unique=True,
+                    ),
+                ),
+                (
+                    'action',
+                    models.CharField(
+                        choices=[
+                            ('start', 'start'),
+                            ('restart', 'restart'),
+                            ('stop', 'stop'),
+                            ('pause', 'pause'),
+                            ('unpause', 'unpause'),
+                            ('delete', 'delete'),
+                        ],
+                        max_length=32,
+                    ),
+                ),
+                (
+                    'project',
+                    models.ForeignKey(
+                        help_text='Project in which this objects belongs',
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to='projectroles.project',
+                    ),
+                ),
+                (
+                    'user',
+                    models.ForeignKey(
+                        help_text='User who submitted the batch',
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                'ordering': ['-date_created'],
+            },
+        ),
+        migrations.AddField(
+            model_name='containerbackgroundjob',
+            name='batch',
+            field=models.ForeignKey(
+                blank=True,
+                help_text='Batch the job was submitted with',
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='jobs',
+                to='containers.containerbatchjob',
+            ),
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:38
+
+import django.db.models.deletion
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def count_containers(apps, schema_editor):
+    Container = apps.get_model('containers', 'Container')
+    Project = apps.get_model('projectroles', 'Project')
+    ProjectContainerStats = apps.get_model(
+        'containers', 'ProjectContainerStats'
+    )
+    parents = dict(Project.objects.values_list('pk', 'parent'))
+    counts = defaultdict(int)
+    for row in (
+        Container.objects.values('project', 'state')
+        .annotate(count=models.Count('pk'))
+        .order_by()
+    ):
+        project = row['project']
+        while project:
+            counts[(project, row['state'])] += row['count']
+            project = parents.get(project)
+    ProjectContainerStats.objects.bulk_create(
+        [
+            ProjectContainerStats(project_id=project, state=state, count=count)
+            for (project, state), count in counts.items()
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('containers', '0021_schedules'),
+        ('projectroles', '0039_remove_project_public_guest_access'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectContainerStats',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'state',
+                    models.CharField(
+                        choices=[
+                            ('created', 'created'),
+                            ('restarting', 'restarting'),
+                            ('running', 'running'),
+                            ('paused', 'paused'),
+                            ('exited', 'exited'),
+                            ('dead', 'dead'),
+                            ('deleting', 'deleting'),
+                            ('deleted', 'deleted'),
+                            ('pulling', 'pulling'),
+                            ('initial', 'initial'),
+                            ('failed', 'failed'),
+                        ],
+                        help_text='Container state',
+                        max_length=32,
+                    ),
+                ),
+                (
+                    'count',
+                    models.IntegerField(
+                        default=0, help_text='Number of containers in the state'
+                    ),
+                ),
+                (
+                    'project',
+                    models.ForeignKey(
+                        help_text='Project or category the counter belongs to',
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='container_stats',
+                        to='projectroles.project',
+                    ),
+                ),
+            ],
+            options={
+                'ordering': ['project', 'state'],
+                'unique_together': {('project', 'state')},
+            },
+        ),
+        migrations.RunPython(
+            count_containers, reverse_code=migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def set_last_job(apps, schema_editor):
+    Container = apps.get_model('containers', 'Container')
+    ContainerBackgroundJob = apps.get_model(
+        'containers', 'ContainerBackgroundJob'
+    )
+    Container.objects.update(
+        last_job=models.Subquery(
+            ContainerBackgroundJob.objects.filter(
+                container=models.OuterRef('pk')
+            )
+            .order_by('-pk')
+            .values('pk')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('containers', '0022_projectcontainerstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='container',
+            name='last_job',
+            field=models.ForeignKey(
+                blank=True,
+                help_text='Most recent background job of the container',
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='+',
+                to='containers.containerbackgroundjob',
+            ),
+        ),
+        migrations.RunPython(
+            set_last_job, reverse_code=migrations.RunPython.noop
+        ),
+    ]
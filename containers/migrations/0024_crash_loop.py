@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('containers', '0023_container_last_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='container',
+            name='crash_count',
+            field=models.IntegerField(
+                default=0,
+                help_text='Number of crashes within the crash loop window',
+            ),
+        ),
+        migrations.AddField(
+            model_name='container',
+            name='date_last_crash',
+            field=models.DateTimeField(
+                blank=True, help_text='DateTime of the last crash', null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name='container',
+            name='parked',
+            field=models.BooleanField(
+                default=False,
+                help_text='Container keeps crashing and is not restarted until the next action',
+            ),
+        ),
+        migrations.AddField(
+            model_name='containerbackgroundjob',
+            name='date_next_retry',
+            field=models.DateTimeField(
+                blank=True,
+                help_text='DateTime before which the action is not retried',
+                null=True,
+            ),
+        ),
+    ]
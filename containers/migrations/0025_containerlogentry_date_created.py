@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:56
+
+import containers.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('containers', '0024_crash_loop'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='containerlogentry',
+            name='date_created',
+            field=models.DateTimeField(
+                default=containers.models.get_log_date,
+                editable=False,
+                help_text='DateTime of creation',
+            ),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('containers', '0025_containerlogentry_date_created'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HostPortBlock',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'start',
+                    models.IntegerField(
+                        help_text='First port of the block', unique=True
+                    ),
+                ),
+                (
+                    'used',
+                    models.BigIntegerField(
+                        default=0, help_text='Bitmap of the used ports'
+                    ),
+                ),
+            ],
+            options={
+                'ordering': ['start'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='container',
+            name='host_port',
+            field=models.IntegerField(
+                blank=True,
+                help_text='Port of the container on the host, assigned automatically if left empty',
+                null=True,
+                unique=True,
+            ),
+        ),
+    ]
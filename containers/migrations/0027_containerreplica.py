@@ -0,0 +1,95 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:12
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('containers', '0026_hostportblock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='container',
+            name='replicas',
+            field=models.PositiveIntegerField(
+                default=1,
+                help_text='Number of Docker containers started for the container, requests are balanced across them.',
+                validators=[django.core.validators.MinValueValidator(1)],
+            ),
+        ),
+        migrations.CreateModel(
+            name='ContainerReplica',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'index',
+                    models.PositiveIntegerField(
+                        help_text='Number of the replica, the container itself is replica 0'
+                    ),
+                ),
+                (
+                    'docker_id',
+                    models.CharField(
+                        blank=True,
+                        default='',
+                        help_text='Docker container ID',
+                        max_length=128,
+                    ),
+                ),
+                (
+                    'host_port',
+                    models.IntegerField(
+                        blank=True,
+                        help_text='Port of the replica on the host',
+                        null=True,
+                        unique=True,
+                    ),
+                ),
+                (
+                    'state',
+                    models.CharField(
+                        choices=[
+                            ('created', 'created'),
+                            ('restarting', 'restarting'),
+                            ('running', 'running'),
+                            ('paused', 'paused'),
+                            ('exited', 'exited'),
+                            ('dead', 'dead'),
+                            ('deleting', 'deleting'),
+                            ('deleted', 'deleted'),
+                            ('pulling', 'pulling'),
+                            ('initial', 'initial'),
+                            ('failed', 'failed'),
+                        ],
+                        default='initial',
+                        help_text='The state of the replica',
+                        max_length=32,
+                    ),
+                ),
+                (
+                    'container',
+                    models.ForeignKey(
+                        help_text='Container the replica belongs to',
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='replica_set',
+                        to='containers.container',
+                    ),
+                ),
+            ],
+            options={
+                'ordering': ['container', 'index'],
+                'unique_together': {('container', 'index')},
+            },
+        ),
+    ]
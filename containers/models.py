@@ -1,15 +1,26 @@
 import contextlib
+import random
 import uuid
+from collections import defaultdict
 from datetime import timedelta
 from typing import Optional
 
-from bgjobs.models import BackgroundJob, JobModelMessageMixin, LOG_LEVEL_DEBUG
+from bgjobs.models import (
+    BackgroundJob,
+    JOB_STATE_CHOICES,
+    JobModelMessageMixin,
+    LOG_LEVEL_DEBUG,
+)
 from django.conf import settings
 from django.core.serializers.json import DjangoJSONEncoder
 from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator
 from django.db.models import JSONField
-from django.db import models, transaction
-from django.db.models import Q, QuerySet
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, F, Q, QuerySet, When
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.template.defaultfilters import filesizeformat
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.timezone import localtime
@@ -22,6 +33,7 @@ from projectroles.models import Project
 
 
 #: Django user model.
+from containers.schedules import validate_schedule
 from containertemplates.models import (
     ContainerTemplateProject,
     ContainerTemplateSite,
@@ -147,9 +159,24 @@ PROCESS_CHOICES = [
     (PROCESS_ACTION, PROCESS_ACTION),
 ]
 
+#: Resolution of resource usage samples as collected from Docker.
+RESOLUTION_RAW = 'raw'
+
+#: Resolution of resource usage samples downsampled to one per hour.
+RESOLUTION_HOURLY = 'hourly'
+
+#: Resource usage resolution choices.
+RESOLUTION_CHOICES = [
+    (RESOLUTION_RAW, RESOLUTION_RAW),
+    (RESOLUTION_HOURLY, RESOLUTION_HOURLY),
+]
+
 #: Keyword used to hide secret environment variables
 MASKED_KEYWORD = '<masked>'
 
+#: Cookie with the index of the replica serving a client of the proxy
+REPLICA_COOKIE = 'kiosc_replica'
+
 
 class JobModelMessageContextManagerMixin(JobModelMessageMixin):
     @contextlib.contextmanager
@@ -200,6 +227,48 @@ class ContainerManager(models.Manager):
                 return Container.objects.none()
         return super().get_queryset().filter(term_query).order_by('title')
 
+    def update_last_job(self, **filters) -> int:
+        """
+        Point ``last_job`` of the matching containers to their newest
+        background job.
+
+        :param filters: Filters selecting the containers
+        :return: Number of updated containers
+        """
+        return (
+            self.filter(**filters)
+            .order_by()
+            .update(
+                last_job=models.Subquery(
+                    ContainerBackgroundJob.objects.filter(
+                        container=models.OuterRef('pk')
+                    )
+                    .order_by('-pk')
+                    .values('pk')[:1]
+                )
+            )
+        )
+
+    def get_known_docker_ids(self, container_ids) -> set:
+        """
+        Return the Docker container IDs that belong to a container or to one
+        of its replicas.
+
+        :param container_ids: Docker container IDs to look up
+        :return: Set of Docker container IDs
+        """
+        known = set(
+            self.filter(container_id__in=container_ids).values_list(
+                'container_id', flat=True
+            )
+        )
+        known.update(
+            ContainerReplica.objects.filter(
+                docker_id__in=container_ids
+            ).values_list('docker_id', flat=True)
+        )
+        return known
+
 
 class Container(models.Model):
     """Model for a Docker container instance."""
@@ -279,6 +348,15 @@ class Container(models.Model):
         max_length=128, help_text='Container ID', blank=True, null=True
     )
 
+    #: Fingerprint of the configuration the Docker container was created with.
+    config_fingerprint = models.CharField(
+        max_length=64,
+        help_text='Fingerprint of the configuration the Docker container was created with',
+        blank=True,
+        null=True,
+        editable=False,
+    )
+
     #: The internal IP of the Docker container (when running).
     container_ip = models.CharField(
         max_length=16, help_text='Container IP', blank=True, null=True
@@ -311,7 +389,8 @@ class Container(models.Model):
 
     #: The port on the host (to redirect the requests/web socket to).
     host_port = models.IntegerField(
-        help_text='Port of the container on the host',
+        help_text='Port of the container on the host, assigned automatically '
+        'if left empty',
         blank=True,
         null=True,
         unique=True,
@@ -406,9 +485,102 @@ class Container(models.Model):
         default=settings.KIOSC_DOCKER_MAX_INACTIVITY,
     )
 
+    #: Number of minutes the container can run without proxy access before it is paused
+    inactivity_pause_threshold = models.IntegerField(
+        help_text='Number of minutes the container is allowed to run without proxy access before it is paused (empty to disable).',
+        blank=True,
+        null=True,
+    )
+
+    #: Number of days the container can be stopped without proxy access before it is removed from Docker
+    inactivity_delete_threshold = models.IntegerField(
+        help_text='Number of days the container is allowed to be stopped without proxy access before it is removed from Docker (empty to disable).',
+        blank=True,
+        null=True,
+    )
+
+    #: Number of CPUs the container may use
+    cpu_limit = models.FloatField(
+        help_text='Number of CPUs the container is allowed to use, e.g. 0.5 (empty for no limit).',
+        blank=True,
+        null=True,
+    )
+
+    #: Memory the container may use in MB
+    memory_limit = models.IntegerField(
+        help_text='Memory in MB the container is allowed to use (empty for no limit).',
+        blank=True,
+        null=True,
+    )
+
+    #: Number of processes the container may run
+    pids_limit = models.IntegerField(
+        help_text='Number of processes the container is allowed to run (empty for no limit).',
+        blank=True,
+        null=True,
+    )
+
+    #: Number of Docker containers serving the container
+    replicas = models.PositiveIntegerField(
+        default=1,
+        help_text='Number of Docker containers started for the container, requests are balanced across them.',
+        validators=[MinValueValidator(1)],
+    )
+
+    #: Schedule in crontab notation when the container is started
+    schedule_start = models.CharField(
+        max_length=128,
+        help_text='Schedule in crontab notation (minute hour day-of-month month day-of-week) when the container is started, e.g. "0 8 * * 1-5" (empty to disable).',
+        blank=True,
+        null=True,
+        validators=[validate_schedule],
+    )
+
+    #: Schedule in crontab notation when the container is stopped
+    schedule_stop = models.CharField(
+        max_length=128,
+        help_text='Schedule in crontab notation (minute hour day-of-month month day-of-week) when the container is stopped, e.g. "0 17 * * 1-5" (empty to disable).',
+        blank=True,
+        null=True,
+        validators=[validate_schedule],
+    )
+
+    #: Number of crashes within ``KIOSC_CRASH_LOOP_WINDOW``.
+    crash_count = models.IntegerField(
+        default=0,
+        help_text='Number of crashes within the crash loop window',
+    )
+
+    #: DateTime of the last crash.
+    date_last_crash = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text='DateTime of the last crash',
+    )
+
+    #: Whether the container is not restarted anymore because it keeps
+    #: crashing.
+    parked = models.BooleanField(
+        default=False,
+        help_text='Container keeps crashing and is not restarted until the next action',
+    )
+
+    #: Most recent background job, kept up to date when jobs are created.
+    last_job = models.ForeignKey(
+        'ContainerBackgroundJob',
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text='Most recent background job of the container',
+        on_delete=models.SET_NULL,
+    )
+
     # Set manager for custom queries
     objects = ContainerManager()
 
+    #: Fields maintained by the tasks with targeted updates.
+    TRACKING_FIELDS = ('last_job', 'crash_count', 'date_last_crash', 'parked')
+
     def __str__(self):
         return f'{self.title} [{self.state}]'
 
@@ -433,6 +605,68 @@ class Container(models.Model):
     def get_display_name(self):
         return self.title
 
+    def get_resource_usage(self, hours):
+        """Return the resource usage samples of the last ``hours`` hours."""
+        return self.resource_usage.filter(
+            date_collected__gte=timezone.now() - timedelta(hours=hours)
+        )
+
+    def get_replica_addresses(self):
+        """
+        Return the addresses of the running replicas of the container.
+
+        :return: Dict mapping the replica index to a ``(host, port)`` tuple,
+                 index 0 is the container itself
+        """
+        replicas = [(0, self.container_id, self.host_port, self.state)]
+
+        if self.replicas > 1:
+            replicas += self.replica_set.values_list(
+                'index', 'docker_id', 'host_port', 'state'
+            )
+
+        addresses = {}
+
+        for index, container_id, host_port, state in replicas:
+            if state != STATE_RUNNING:
+                continue
+
+            if settings.KIOSC_NETWORK_MODE == 'host':
+                if host_port:
+                    addresses[index] = ('localhost', host_port)
+
+            elif container_id:
+                addresses[index] = (container_id[:12], self.container_port)
+
+        return addresses
+
+    def select_replica(self, sticky=None):
+        """
+        Select the replica serving a client of the proxy. New clients are
+        balanced randomly across the running replicas.
+
+        :param sticky: Index of the replica that served the client before,
+                       e.g. from the ``REPLICA_COOKIE``, kept while it is
+                       running
+        :return: Tuple of the replica index and its ``(host, port)``, or
+                 ``(None, None)`` if no replica is running
+        """
+        addresses = self.get_replica_addresses()
+
+        if not addresses:
+            return None, None
+
+        try:
+            sticky = int(sticky)
+
+        except (TypeError, ValueError):
+            sticky = None
+
+        if sticky not in addresses:
+            sticky = random.choice(sorted(addresses))
+
+        return sticky, addresses[sticky]
+
     def get_environment_masked(self):
         if not self.environment or not self.environment_secret_keys:
             return self.environment
@@ -528,6 +762,13 @@ class ContainerBackgroundJob(JobModelMessageContextManagerMixin, models.Model):
         default=0,
     )
 
+    #: DateTime before which the action is not retried.
+    date_next_retry = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text='DateTime before which the action is not retried',
+    )
+
     #: The background job that is specialized.
     bg_job = models.ForeignKey(
         BackgroundJob,
@@ -538,9 +779,107 @@ class ContainerBackgroundJob(JobModelMessageContextManagerMixin, models.Model):
         on_delete=models.CASCADE,
     )
 
+    #: The batch the job was submitted with.
+    batch = models.ForeignKey(
+        'ContainerBatchJob',
+        null=True,
+        blank=True,
+        related_name='jobs',
+        help_text='Batch the job was submitted with',
+        on_delete=models.SET_NULL,
+    )
+
     # Set manager for custom queries
     objects = ContainerBackgroundJobManager()
 
+    #: ``JobLogWriter`` buffering the log entries while the job runs.
+    log_writer = None
+
+    def add_log_entry(self, message, level=LOG_LEVEL_INFO):
+        """Add a log entry through the related BackgroundJob, buffered while
+        a ``JobLogWriter`` is active."""
+        if self.log_writer:
+            self.log_writer.add_job_entry(message, level)
+            return None
+
+        return self.bg_job.add_log_entry(message, level=level)
+
+    def add_container_log_entry(self, **kwargs):
+        """Add a log entry to the container, buffered while a
+        ``JobLogWriter`` is active."""
+        if self.log_writer:
+            self.log_writer.add_container_entry(**kwargs)
+            return None
+
+        return self.container.log_entries.create(**kwargs)
+
+    def save(self, *args, **kwargs):
+        """Save the job and make it the ``last_job`` of its container unless
+        a newer job was created concurrently."""
+        created = self._state.adding
+        super().save(*args, **kwargs)
+
+        if created:
+            Container.objects.filter(
+                Q(last_job__isnull=True) | Q(last_job__lt=self.pk),
+                pk=self.container_id,
+            ).update(last_job=self)
+
+
+class ContainerBatchJob(models.Model):
+    """Model for an action submitted for many containers at once."""
+
+    #: DateTime of creation.
+    date_created = models.DateTimeField(
+        auto_now_add=True, help_text='DateTime of creation'
+    )
+
+    #: UUID of the batch.
+    sodar_uuid = models.UUIDField(
+        default=uuid.uuid4, unique=True, help_text='Batch SODAR UUID'
+    )
+
+    #: The project that the batch belongs to.
+    project = models.ForeignKey(
+        Project,
+        help_text='Project in which this objects belongs',
+        on_delete=models.CASCADE,
+    )
+
+    #: User who submitted the batch.
+    user = models.ForeignKey(
+        AUTH_USER_MODEL,
+        help_text='User who submitted the batch',
+        on_delete=models.CASCADE,
+    )
+
+    #: The action to perform.
+    action = models.CharField(max_length=32, choices=ACTION_CHOICES)
+
+    class Meta:
+        ordering = ['-date_created']
+
+    def get_status_counts(self):
+        """Return the number of jobs of the batch per background job status."""
+        counts = {status: 0 for status, _ in JOB_STATE_CHOICES}
+        counts.update(
+            {
+                row['bg_job__status']: row['count']
+                for row in self.jobs.values('bg_job__status')
+                .annotate(count=models.Count('id'))
+                .order_by()
+            }
+        )
+        return counts
+
+    def __repr__(self):
+        return f'ContainerBatchJob({self.project.title},{self.action})'
+
+
+def get_log_date():
+    """Return the creation date of a new log entry."""
+    return timezone.now()
+
 
 class ContainerLogEntryManager(models.Manager):
     def merge_order(self, *args, **kwargs):
@@ -630,9 +969,12 @@ class ContainerLogEntry(models.Model):
     #: Custom manager for sorting
     objects = ContainerLogEntryManager()
 
-    #: DateTime of creation
+    #: DateTime of creation, set when the entry is logged, also if it is
+    #: written later by a ``JobLogWriter``
     date_created = models.DateTimeField(
-        auto_now_add=True, help_text='DateTime of creation'
+        default=get_log_date,
+        editable=False,
+        help_text='DateTime of creation',
     )
 
     #: DateTime of Docker log entry
@@ -717,7 +1059,7 @@ class ContainerActionLock(models.Model):
     )
 
     #: ``Container`` the action was performed on.
-    container = models.ForeignKey(
+    container = models.OneToOneField(
         Container,
         related_name='action_lock',
         blank=False,
@@ -731,23 +1073,698 @@ class ContainerActionLock(models.Model):
     class CoolDown(Exception):
         pass
 
-    def queryset(self):
-        return self.__class__.objects.filter(id=self.id)
-
     def is_locked(self):
         return timezone.now() < self.date_of_action + timedelta(
             seconds=settings.KIOSC_DOCKER_ACTION_MIN_DELAY
         )
 
-    def lock(self, action):
-        if self.is_locked():
-            raise ContainerActionLock.CoolDown
+    @classmethod
+    def acquire(cls, container, action):
+        """Record ``action`` on ``container`` unless it is in cool-down.
+
+        The lock is taken with a single conditional ``UPDATE`` that only
+        matches if the last action is older than the minimal delay, so
+        concurrent callers cannot both pass. The row is inserted on the first
+        action of a container; the unique constraint rejects a concurrent
+        insert.
+
+        :param container: Container object
+        :param action: Action to perform
+        :raises: ``ContainerActionLock.CoolDown`` if the container is locked
+        """
+        now = timezone.now()
+        updated = cls.objects.filter(
+            container=container,
+            date_of_action__lte=now
+            - timedelta(seconds=settings.KIOSC_DOCKER_ACTION_MIN_DELAY),
+        ).update(action=action, date_of_action=now)
+
+        if updated:
+            return
+
+        try:
+            with transaction.atomic():
+                cls.objects.create(container=container, action=action)
+
+        except IntegrityError:
+            raise cls.CoolDown
+
+
+class ContainerActionJournal(models.Model):
+    """Journal of container actions in progress.
+
+    An entry is written before the Docker operations of an action start,
+    updated on every transition and removed once the action finished. Entries
+    left behind by a crashed worker are picked up by the recovery task.
+    """
+
+    #: DateTime of creation
+    date_created = models.DateTimeField(
+        auto_now_add=True, help_text='DateTime of creation'
+    )
+
+    #: DateTime of the last transition
+    date_modified = models.DateTimeField(
+        auto_now=True, help_text='DateTime of the last transition'
+    )
+
+    #: ``Container`` the action is performed on.
+    container = models.ForeignKey(
+        Container,
+        related_name='action_journal',
+        on_delete=models.CASCADE,
+    )
+
+    #: Background job performing the action.
+    job = models.ForeignKey(
+        ContainerBackgroundJob,
+        related_name='action_journal',
+        on_delete=models.CASCADE,
+    )
+
+    #: Action
+    action = models.CharField(max_length=32, choices=ACTION_CHOICES)
+
+    #: Container state before the action.
+    state_before = models.CharField(
+        max_length=32,
+        choices=STATE_CHOICES,
+        help_text='Container state before the action',
+    )
+
+    #: Last transition performed.
+    transition = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        help_text='Last transition performed',
+    )
+
+    #: Container state after the last transition.
+    state = models.CharField(
+        max_length=32,
+        choices=STATE_CHOICES,
+        help_text='Container state after the last transition',
+    )
+
+    class Meta:
+        ordering = ['date_created']
+
+    def __repr__(self):
+        return f'ContainerActionJournal({self.container.get_display_name()},{self.action},{self.state})'
+
+
+class ContainerResourceUsage(models.Model):
+    """Model for resource usage samples of a container."""
+
+    #: DateTime of the sample
+    date_collected = models.DateTimeField(
+        default=timezone.now, help_text='DateTime of the sample'
+    )
+
+    #: ``Container`` the sample was collected for.
+    container = models.ForeignKey(
+        Container,
+        related_name='resource_usage',
+        blank=False,
+        null=False,
+        on_delete=models.CASCADE,
+    )
+
+    #: Resolution of the sample.
+    resolution = models.CharField(
+        max_length=32,
+        choices=RESOLUTION_CHOICES,
+        default=RESOLUTION_RAW,
+        help_text='Resolution of the sample',
+    )
+
+    #: CPU usage in percent of one CPU.
+    cpu_percent = models.FloatField(
+        default=0, help_text='CPU usage in percent of one CPU'
+    )
+
+    #: Memory usage in bytes.
+    memory_usage = models.BigIntegerField(
+        default=0, help_text='Memory usage in bytes'
+    )
+
+    #: Memory limit in bytes.
+    memory_limit = models.BigIntegerField(
+        blank=True, null=True, help_text='Memory limit in bytes'
+    )
+
+    #: Received network traffic in bytes since container start.
+    network_rx = models.BigIntegerField(
+        default=0, help_text='Received network traffic in bytes'
+    )
+
+    #: Transmitted network traffic in bytes since container start.
+    network_tx = models.BigIntegerField(
+        default=0, help_text='Transmitted network traffic in bytes'
+    )
+
+    #: Number of processes.
+    pids = models.IntegerField(
+        blank=True, null=True, help_text='Number of processes'
+    )
+
+    class Meta:
+        ordering = ['date_collected']
+        indexes = [
+            models.Index(fields=['container', 'resolution', 'date_collected'])
+        ]
+
+    def get_date_collected(self):
+        return localtime(self.date_collected).strftime('%Y-%m-%d %H:%M:%S')
+
+    def get_display(self):
+        """Return the sample formatted for display."""
+        memory = filesizeformat(self.memory_usage)
+
+        if self.memory_limit:
+            memory += f' / {filesizeformat(self.memory_limit)}'
+
+        return {
+            'cpu': f'{self.cpu_percent:.1f} %',
+            'memory': memory,
+            'network_rx': filesizeformat(self.network_rx),
+            'network_tx': filesizeformat(self.network_tx),
+            'pids': self.pids if self.pids is not None else '',
+        }
+
+    def __repr__(self):
+        return f'ContainerResourceUsage({self.container.get_display_name()},{self.get_date_collected()})'
+
+
+class ContainerReplica(models.Model):
+    """Additional Docker container serving a ``Container``.
+
+    The Docker container of the container itself is replica 0, a container
+    with ``replicas`` set to N has the replicas 1 to N-1. They are created,
+    started, stopped and deleted along with the container by
+    ``ContainerMachine``.
+    """
+
+    #: ``Container`` the replica belongs to.
+    container = models.ForeignKey(
+        Container,
+        related_name='replica_set',
+        help_text='Container the replica belongs to',
+        on_delete=models.CASCADE,
+    )
+
+    #: Number of the replica.
+    index = models.PositiveIntegerField(
+        help_text='Number of the replica, the container itself is replica 0'
+    )
+
+    #: Docker container ID of the replica.
+    docker_id = models.CharField(
+        max_length=128, help_text='Docker container ID', blank=True, default=''
+    )
+
+    #: The port of the replica on the host.
+    host_port = models.IntegerField(
+        help_text='Port of the replica on the host',
+        blank=True,
+        null=True,
+        unique=True,
+    )
+
+    #: State of the Docker container of the replica.
+    state = models.CharField(
+        max_length=32,
+        choices=STATE_CHOICES,
+        default=STATE_INITIAL,
+        help_text='The state of the replica',
+    )
+
+    class Meta:
+        ordering = ['container', 'index']
+        unique_together = ('container', 'index')
+
+    def __repr__(self):
+        return f'ContainerReplica({self.container.get_display_name()},{self.index})'
+
+
+class ProjectContainerStatsManager(models.Manager):
+    """Manager for maintaining the container counters"""
+
+    def update_state(self, project, old_state=None, new_state=None):
+        """
+        Move one container of ``project`` from ``old_state`` to ``new_state``
+        in the counters of the project and all its parent categories.
+
+        :param project: Project object the container belongs to
+        :param old_state: Previous state or None for a new container
+        :param new_state: New state or None for a deleted container
+        """
+        if old_state == new_state:
+            return
+
+        projects = sorted([project] + project.get_parents(), key=lambda p: p.pk)
+        states = [s for s in (old_state, new_state) if s]
+
+        with transaction.atomic():
+            if new_state:
+                self.bulk_create(
+                    [
+                        self.model(project=p, state=new_state, count=0)
+                        for p in projects
+                    ],
+                    ignore_conflicts=True,
+                )
+
+            # Lock all affected rows in a fixed order and apply both deltas
+            # in a single query so concurrent moves cannot deadlock.
+            rows = list(
+                self.select_for_update()
+                .filter(project__in=projects, state__in=states)
+                .order_by('pk')
+                .values_list('pk', flat=True)
+            )
+            self.filter(pk__in=rows).update(
+                count=Case(
+                    When(state=old_state, then=F('count') - 1),
+                    When(state=new_state, then=F('count') + 1),
+                    default=F('count'),
+                )
+            )
+
+    def get_counts(self, projects):
+        """
+        Return the non-zero counters of ``projects`` in one query.
+
+        :param projects: Iterable or QuerySet of Project objects
+        :return: Dict mapping project primary keys to dicts of states and
+                 counts
+        """
+        counts = defaultdict(dict)
+
+        for project, state, count in self.filter(
+            project__in=projects, count__gt=0
+        ).values_list('project', 'state', 'count'):
+            counts[project][state] = count
+
+        return counts
+
+    def move_project(self, project, old_parent):
+        """
+        Move the counters of ``project`` from the categories above
+        ``old_parent`` to the ones above its current parent. Categories in
+        both chains keep their counts.
+
+        :param project: Moved project or category
+        :param old_parent: Previous parent category or None
+        """
+        old_chain = (
+            [old_parent] + old_parent.get_parents() if old_parent else []
+        )
+        new_chain = project.get_parents()
+        removed = [p for p in old_chain if p not in new_chain]
+        added = [p for p in new_chain if p not in old_chain]
+
+        if not removed and not added:
+            return
 
         with transaction.atomic():
-            lock = self.queryset().select_for_update().get()
+            counts = dict(
+                self.filter(project=project, count__gt=0).values_list(
+                    'state', 'count'
+                )
+            )
+
+            if not counts:
+                return
+
+            self.bulk_create(
+                [
+                    self.model(project=p, state=state, count=0)
+                    for p in added
+                    for state in counts
+                ],
+                ignore_conflicts=True,
+            )
+
+            # Lock the rows in the same order as update_state()
+            list(
+                self.select_for_update()
+                .filter(project__in=removed + added, state__in=counts)
+                .order_by('pk')
+                .values_list('pk', flat=True)
+            )
+
+            for state, count in counts.items():
+                self.filter(project__in=removed, state=state).update(
+                    count=F('count') - count
+                )
+                self.filter(project__in=added, state=state).update(
+                    count=F('count') + count
+                )
+
+    def rebuild(self):
+        """Recount the containers of all projects and categories."""
+        parents = dict(Project.objects.values_list('pk', 'parent'))
+        counts = defaultdict(int)
+
+        for row in (
+            Container.objects.values('project', 'state')
+            .annotate(count=models.Count('pk'))
+            .order_by()
+        ):
+            project = row['project']
+
+            while project:
+                counts[(project, row['state'])] += row['count']
+                project = parents.get(project)
+
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(
+                [
+                    self.model(project_id=project, state=state, count=count)
+                    for (project, state), count in counts.items()
+                ]
+            )
+
+
+class ProjectContainerStats(models.Model):
+    """Number of containers per state of a project or category.
+
+    The counters of a category include all containers of its projects and
+    subcategories. They are updated whenever a container is saved with a new
+    state or deleted.
+    """
+
+    #: Project or category the counter belongs to.
+    project = models.ForeignKey(
+        Project,
+        related_name='container_stats',
+        help_text='Project or category the counter belongs to',
+        on_delete=models.CASCADE,
+    )
+
+    #: Container state.
+    state = models.CharField(
+        max_length=32, choices=STATE_CHOICES, help_text='Container state'
+    )
+
+    #: Number of containers in the state.
+    count = models.IntegerField(
+        default=0, help_text='Number of containers in the state'
+    )
+
+    # Set manager for custom queries
+    objects = ProjectContainerStatsManager()
+
+    class Meta:
+        ordering = ['project', 'state']
+        unique_together = ('project', 'state')
+
+    def __repr__(self):
+        return f'ProjectContainerStats({self.project.title},{self.state},{self.count})'
+
+
+#: Number of ports per ``HostPortBlock``, the bits of a signed 64-bit integer
+#: without the sign bit.
+HOST_PORT_BLOCK_SIZE = 63
+
+#: Bitmap of a ``HostPortBlock`` with all ports in use.
+HOST_PORT_BLOCK_FULL = (1 << HOST_PORT_BLOCK_SIZE) - 1
+
+
+def split_host_port(port):
+    """Return the start of the ``HostPortBlock`` of ``port`` and its bit."""
+    offset = port % HOST_PORT_BLOCK_SIZE
+    return port - offset, 1 << offset
+
+
+class HostPortBlockManager(models.Manager):
+    """Manager for allocating host ports"""
+
+    def get_range_mask(self, start):
+        """Return the bits of the block at ``start`` which lie in the
+        configured port range."""
+        low = max(settings.KIOSC_HOST_PORT_MIN - start, 0)
+        high = min(
+            settings.KIOSC_HOST_PORT_MAX - start, HOST_PORT_BLOCK_SIZE - 1
+        )
+
+        if high < low:
+            return 0
+
+        return ((1 << (high + 1)) - 1) & ~((1 << low) - 1)
+
+    def create_blocks(self):
+        """
+        Create the missing blocks of the configured port range, e.g. on the
+        first allocation or after the range was extended. Ports already
+        assigned to containers are marked as used.
+
+        :return: Number of created blocks
+        """
+        first, _ = split_host_port(settings.KIOSC_HOST_PORT_MIN)
+        starts = set(
+            range(first, settings.KIOSC_HOST_PORT_MAX + 1, HOST_PORT_BLOCK_SIZE)
+        )
+        missing = starts - set(
+            self.filter(start__in=starts).values_list('start', flat=True)
+        )
+
+        if not missing:
+            return 0
+
+        used = defaultdict(int)
+        ports = {
+            'host_port__gte': min(missing),
+            'host_port__lt': max(missing) + HOST_PORT_BLOCK_SIZE,
+        }
+
+        for model in (Container, ContainerReplica):
+            for port in model.objects.filter(**ports).values_list(
+                'host_port', flat=True
+            ):
+                start, bit = split_host_port(port)
+                used[start] |= bit
+
+        self.bulk_create(
+            [self.model(start=start, used=used[start]) for start in missing],
+            ignore_conflicts=True,
+        )
+        return len(missing)
+
+    def get_free_port(self):
+        """
+        Return the lowest free port of the configured range along with the
+        bitmap of its block as read, or None if the range is exhausted.
+        """
+        first, _ = split_host_port(settings.KIOSC_HOST_PORT_MIN)
+        blocks = (
+            self.filter(
+                start__gte=first, start__lte=settings.KIOSC_HOST_PORT_MAX
+            )
+            .exclude(used=HOST_PORT_BLOCK_FULL)
+            .order_by('start')
+            .values_list('start', 'used')
+        )
+
+        # Only the first block may have free ports below the range only, so
+        # the second one has a free port unless the range is exhausted
+        for start, used in blocks[:2]:
+            free = ~used & self.get_range_mask(start)
+
+            if free:
+                bit = free & -free
+                return start + bit.bit_length() - 1, used
+
+        return None
+
+    def allocate(self):
+        """
+        Mark the lowest free port of the configured range as used and return
+        it.
+
+        The bit is set with a conditional ``UPDATE`` on the bitmap as read,
+        so concurrent callers cannot get the same port; the loser reads the
+        block again.
+
+        :return: Port number
+        :raises: ``HostPortBlock.RangeExhausted`` if no port is free
+        """
+        while True:
+            free = self.get_free_port()
+
+            if free is None:
+                if self.create_blocks():
+                    continue
+
+                raise self.model.RangeExhausted(
+                    'No free host port in range {}-{}'.format(
+                        settings.KIOSC_HOST_PORT_MIN,
+                        settings.KIOSC_HOST_PORT_MAX,
+                    )
+                )
+
+            port, used = free
+            start, bit = split_host_port(port)
+
+            if self.filter(start=start, used=used).update(used=used | bit):
+                return port
+
+    def has_free_port(self):
+        """Return whether a port of the configured range is free."""
+        self.create_blocks()
+        return self.get_free_port() is not None
+
+    def is_used(self, port):
+        """Return whether ``port`` is assigned to a container or replica or
+        marked as used."""
+        start, bit = split_host_port(port)
+        return (
+            Container.objects.filter(host_port=port).exists()
+            or ContainerReplica.objects.filter(host_port=port).exists()
+            or self.filter(start=start, used=F('used').bitor(bit)).exists()
+        )
+
+    def reserve(self, port):
+        """
+        Mark ``port`` as used, e.g. if it was set manually.
+
+        The bit is set with a conditional ``UPDATE`` that only matches if it
+        is not set yet. Ports outside of the existing blocks are not tracked.
+
+        :param port: Port number or None
+        :raises: ``HostPortBlock.PortInUse`` if the port is already used
+        """
+        if port is None:
+            return
+
+        start, bit = split_host_port(port)
+        blocks = self.filter(start=start)
+
+        if blocks.exclude(used=F('used').bitor(bit)).update(
+            used=F('used').bitor(bit)
+        ):
+            return
+
+        if blocks.exists():
+            raise self.model.PortInUse(f'Host port {port} is already in use')
+
+    def release(self, port):
+        """Mark ``port`` as free again."""
+        if port is not None:
+            start, bit = split_host_port(port)
+            self.filter(start=start).update(used=F('used').bitand(~bit))
+
+
+class HostPortBlock(models.Model):
+    """Bitmap of the host ports in use for a block of consecutive ports.
+
+    The blocks of the range ``KIOSC_HOST_PORT_MIN`` to
+    ``KIOSC_HOST_PORT_MAX`` are created on the first allocation. A port is
+    marked as used whenever a container is saved with it or it is allocated
+    for a replica and marked as free when the container or replica is
+    deleted or the container gets another port.
+    """
+
+    #: First port of the block.
+    start = models.IntegerField(
+        unique=True, help_text='First port of the block'
+    )
+
+    #: Bitmap of the used ports, bit ``n`` stands for port ``start + n``.
+    used = models.BigIntegerField(
+        default=0, help_text='Bitmap of the used ports'
+    )
+
+    # Set manager for custom queries
+    objects = HostPortBlockManager()
+
+    class RangeExhausted(Exception):
+        pass
+
+    class PortInUse(Exception):
+        pass
+
+    class Meta:
+        ordering = ['start']
+
+    def __repr__(self):
+        return f'HostPortBlock({self.start},{self.used:#x})'
+
+
+@receiver(pre_save, sender=Container)
+def update_host_port_on_save(sender, instance, update_fields=None, **kwargs):
+    """Mark the host port of a saved container as used and remember the
+    stored state for the counters.
+
+    In ``host`` network mode a container saved without a host port gets the
+    lowest free port of the configured range, also if the port of an
+    existing container was cleared. Nothing is done if ``update_fields``
+    contains neither the state nor the host port.
+    """
+    fields = {'state', 'host_port'}
+
+    if update_fields is not None:
+        fields &= set(update_fields)
+
+    old = {}
+
+    if fields and not instance._state.adding:
+        old = (
+            Container.objects.filter(pk=instance.pk)
+            .values('state', 'host_port')
+            .first()
+        ) or {}
+
+    if 'host_port' in fields:
+        if instance.host_port is None and settings.KIOSC_NETWORK_MODE == 'host':
+            # Release a cleared port first, so it can be assigned again
+            HostPortBlock.objects.release(old.pop('host_port', None))
+            instance.host_port = HostPortBlock.objects.allocate()
+
+        elif old.get('host_port') != instance.host_port:
+            HostPortBlock.objects.reserve(instance.host_port)
+
+        else:
+            fields.discard('host_port')
+
+    instance._stored_values = (fields, old)
+
+
+@receiver(post_save, sender=Container)
+def update_container_stats_on_save(sender, instance, **kwargs):
+    """Move a saved container to its new state in the counters of its
+    project and release its previous host port."""
+    fields, old = instance.__dict__.pop('_stored_values', (set(), {}))
+
+    if 'state' in fields:
+        ProjectContainerStats.objects.update_state(
+            instance.project, old.get('state'), instance.state
+        )
+
+    if 'host_port' in fields:
+        HostPortBlock.objects.release(old.get('host_port'))
+
+
+@receiver(post_delete, sender=Container)
+def update_container_stats_on_delete(sender, instance, **kwargs):
+    """Remove a deleted container from the counters of its project."""
+    # The project may be deleted along with the container
+    project = Project.objects.filter(pk=instance.project_id).first()
+
+    if project:
+        ProjectContainerStats.objects.update_state(project, instance.state)
+
+
+@receiver(post_delete, sender=Container)
+def release_host_port_on_delete(sender, instance, **kwargs):
+    """Mark the host port of a deleted container as free."""
+    HostPortBlock.objects.release(instance.host_port)
 
-            if lock.is_locked():
-                raise ContainerActionLock.CoolDown
 
-            lock.action = action
-            lock.save()
+@receiver(post_delete, sender=ContainerReplica)
+def release_replica_host_port_on_delete(sender, instance, **kwargs):
+    """Mark the host port of a deleted replica as free."""
+    HostPortBlock.objects.release(instance.host_port)
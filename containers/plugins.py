@@ -6,24 +6,29 @@ import logging
 
 # Projectroles dependency
 from django.contrib.auth import get_user_model
-from django.db.models import Count
+from django.db.models import Sum
+from django.http import HttpRequest
 from django.urls import reverse
-from projectroles.models import Project, SODAR_CONSTANTS, CAT_DELIMITER
+from projectroles.models import Project, SODAR_CONSTANTS
 from projectroles.plugins import (
     ProjectAppPluginPoint,
     PluginObjectLink,
     PluginCategoryStatistic,
     PluginSearchResult,
     ProjectModifyPluginMixin,
+    PluginAppSettingDef,
 )
 
 from containers.models import (
     Container,
     ContainerBackgroundJob,
     ContainerLogEntry,
+    ContainerReplica,
+    ProjectContainerStats,
 )
 from containers.urls import urlpatterns
-from containers.views import ContainerModifyMixin
+from containers.views import project_list_counts
+from containers.tasks import submit_containers_teardown
 
 from containertemplates.models import (
     ContainerTemplateSite,
@@ -35,14 +40,34 @@ User = get_user_model()
 logger = logging.getLogger(__name__)
 
 PROJECT_TYPE_PROJECT = SODAR_CONSTANTS['PROJECT_TYPE_PROJECT']
+APP_SETTING_SCOPE_PROJECT = SODAR_CONSTANTS['APP_SETTING_SCOPE_PROJECT']
+APP_SETTING_SCOPE_SITE = SODAR_CONSTANTS['APP_SETTING_SCOPE_SITE']
+APP_SETTING_TYPE_INTEGER = SODAR_CONSTANTS['APP_SETTING_TYPE_INTEGER']
+APP_SETTING_TYPE_STRING = SODAR_CONSTANTS['APP_SETTING_TYPE_STRING']
+
+#: Labels of the container states in the project list column, deleted
+#: containers are not counted.
+PROJECT_LIST_STATES = {
+    'running': 'running',
+    'restarting': 'running',
+    'pulling': 'running',
+    'paused': 'stopped',
+    'stopped': 'stopped',
+    'created': 'stopped',
+    'initial': 'stopped',
+    'failed': 'failed',
+    'exited': 'failed',
+    'dead': 'failed',
+}
+
+#: Order of the state labels in the project list column.
+PROJECT_LIST_STATE_LABELS = ('running', 'stopped', 'failed')
 
 
 # Samplesheets project app plugin ----------------------------------------------
 
 
-class ProjectAppPlugin(
-    ProjectAppPluginPoint, ProjectModifyPluginMixin, ContainerModifyMixin
-):
+class ProjectAppPlugin(ProjectAppPluginPoint, ProjectModifyPluginMixin):
     """Plugin for registering app with Projectroles"""
 
     # Properties required by django-plugins ------------------------------
@@ -79,7 +104,51 @@ class ProjectAppPlugin(
     #:             widget_attrs={},  # Optional, widget attrs for forms
     #:         )
     #:    ]
-    app_settings = []
+    app_settings = [
+        PluginAppSettingDef(
+            name='quota_containers',
+            scope=APP_SETTING_SCOPE_PROJECT,
+            type=APP_SETTING_TYPE_INTEGER,
+            default=0,
+            label='Running containers quota',
+            description='Max number of running containers in the project (0 '
+            'for no limit)',
+            user_modifiable=False,
+            project_types=[PROJECT_TYPE_PROJECT],
+        ),
+        PluginAppSettingDef(
+            name='quota_cpu',
+            scope=APP_SETTING_SCOPE_PROJECT,
+            type=APP_SETTING_TYPE_INTEGER,
+            default=0,
+            label='CPU quota',
+            description='Max number of CPUs assigned to running containers in '
+            'the project (0 for no limit)',
+            user_modifiable=False,
+            project_types=[PROJECT_TYPE_PROJECT],
+        ),
+        PluginAppSettingDef(
+            name='quota_memory',
+            scope=APP_SETTING_SCOPE_PROJECT,
+            type=APP_SETTING_TYPE_INTEGER,
+            default=0,
+            label='Memory quota [MB]',
+            description='Max memory in MB assigned to running containers in '
+            'the project (0 for no limit)',
+            user_modifiable=False,
+            project_types=[PROJECT_TYPE_PROJECT],
+        ),
+        PluginAppSettingDef(
+            name='schedules_last_run',
+            scope=APP_SETTING_SCOPE_SITE,
+            type=APP_SETTING_TYPE_STRING,
+            default='',
+            label='Last run of the container schedules',
+            description='Time of the last run of the container schedules in '
+            'ISO format, used to catch up on missed windows',
+            user_modifiable=False,
+        ),
+    ]
 
     #: FontAwesome icon ID string
     icon = 'mdi:docker'
@@ -153,7 +222,12 @@ class ProjectAppPlugin(
         return {
             'container_count': {
                 'label': 'Containers',
-                'value': Container.objects.all().count(),
+                # The counters of top-level projects and categories include
+                # every container exactly once
+                'value': ProjectContainerStats.objects.filter(
+                    project__parent__isnull=True
+                ).aggregate(total=Sum('count'))['total']
+                or 0,
             },
             'containertemplates_site_count': {
                 'label': 'Site-wide Container Templates',
@@ -176,23 +250,17 @@ class ProjectAppPlugin(
         :param category: Project object of CATEGORY type
         :return: List of PluginCategoryStatistic objects
         """
-        children = Project.objects.filter(
-            type=PROJECT_TYPE_PROJECT,
-            full_title__startswith=category.full_title + CAT_DELIMITER,
-        )
-        container_states = (
-            Container.objects.filter(project__in=children)
-            .values('state')
-            .annotate(count=Count('state'))
+        container_states = ProjectContainerStats.objects.filter(
+            project=category, count__gt=0
         )
         stats = []
         for state_entry in container_states:
             stats.append(
                 PluginCategoryStatistic(
                     plugin=self,
-                    title=f'Containers {state_entry["state"].title()}',
-                    value=state_entry['count'],
-                    description=f'Number of {state_entry["state"]} containers in this category',
+                    title=f'Containers {state_entry.state.title()}',
+                    value=state_entry.count,
+                    description=f'Number of {state_entry.state} containers in this category',
                     icon='mdi:file',
                 )
             )
@@ -213,27 +281,42 @@ class ProjectAppPlugin(
         if column_id != 'containers':
             raise ValueError(f'Unexpected column_id: "{column_id}"')
 
-        container_states = (
-            Container.objects.filter(project=project)
-            .values('state')
-            .annotate(count=Count('state'))
-        )
-        if not container_states:
+        counts = self._get_container_state_counts(project)
+        if not counts:
             return '0'
 
-        stats = []
-        for el in container_states:
-            match el['state']:
-                case 'running' | 'restarting' | 'pulling':
-                    stats.append(str(el['count']) + ' running')
-                case 'paused' | 'stopped' | 'created' | 'initial':
-                    stats.append(str(el['count']) + ' stopped')
-                case 'failed' | 'exited' | 'dead':
-                    stats.append(str(el['count']) + ' failed')
-                case 'deleted' | 'deleting':
-                    pass
-
-        return ',</br>'.join(stats)
+        return ',</br>'.join(
+            f'{counts[label]} {label}'
+            for label in PROJECT_LIST_STATE_LABELS
+            if counts.get(label)
+        )
+
+    @staticmethod
+    def _get_container_state_counts(project: Project) -> dict:
+        """
+        Return the container counts of a project per state label.
+
+        The counters of all projects listed by ``ProjectListColumnAjaxView``
+        are fetched with one query for the request. Otherwise only the
+        counters of the project are queried.
+
+        :param project: Project object
+        :return: Dict mapping state labels to counts
+        """
+        states = project_list_counts.get()
+
+        if states is None:
+            states = ProjectContainerStats.objects.get_counts([project])
+
+        counts = {}
+
+        for state, count in states.get(project.pk, {}).items():
+            label = PROJECT_LIST_STATES.get(state)
+
+            if label:
+                counts[label] = counts.get(label, 0) + count
+
+        return counts
 
     def get_object_link(
         self, model_str: str, uuid: Union[str, UUID]
@@ -266,25 +349,62 @@ class ProjectAppPlugin(
 
         return None
 
+    def perform_project_modify(
+        self,
+        project: Project,
+        action: str,
+        project_settings: dict,
+        old_data: Optional[dict] = None,
+        old_settings: Optional[dict] = None,
+        request: Optional[HttpRequest] = None,
+    ):
+        """
+        Perform additional actions to finalize project creation or update.
+
+        Move the container counters of the project to its new categories if
+        it was moved.
+
+        NOTE: the method is called only if the setting
+        ``PROJECTROLES_ENABLE_MODIFY_API`` is True.
+
+        :param project: Current project object (Project)
+        :param action: Action to perform (CREATE or UPDATE)
+        :param project_settings: Project app settings (dict)
+        :param old_data: Old project data in case of an update (dict or None)
+        :param old_settings: Old app settings in case of update (dict or None)
+        :param request: Request object or None
+        """
+        if old_data and old_data.get('parent') != project.parent:
+            ProjectContainerStats.objects.move_project(
+                project, old_data.get('parent')
+            )
+
     def perform_project_delete(self, project: Project):
         """
         Clean-up actions to be performed when a project is deleted
 
         Ensure that all containers belonging to the project are stopped and
-        deleted.
+        deleted. The Docker containers are removed in the background, so the
+        request deleting the project returns immediately.
 
         NOTE: the method is called only if the setting
         ``PROJECTROLES_ENABLE_MODIFY_API`` is True.
 
         :param project: The project being deleted
         """
-        containers = Container.objects.filter(project=project)
-        # NOTE: the project modify API plugin only passes the project as arg to
-        # this function, not the user. Hence, we use the project owner for the
-        # BackgroundJob user, as a workaround.
-        user = project.get_owner().user
-        for container in containers:
-            self._container_delete_docker(container, user)
+        # The containers are removed from the database with the project right
+        # after this call, so only the Docker container IDs are passed on
+        container_ids = list(
+            Container.objects.filter(project=project)
+            .exclude(container_id__isnull=True)
+            .exclude(container_id='')
+            .values_list('container_id', flat=True)
+        ) + list(
+            ContainerReplica.objects.filter(container__project=project)
+            .exclude(docker_id='')
+            .values_list('docker_id', flat=True)
+        )
+        submit_containers_teardown(container_ids, f'Project {project.title}')
 
     def search(
         self,
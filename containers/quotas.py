@@ -0,0 +1,149 @@
+"""Admission control for container resource quotas"""
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Exists, F, FloatField, OuterRef, Q, Sum
+
+# Projectroles dependency
+from projectroles.app_settings import AppSettingAPI
+
+from containers.models import (
+    ACTION_RESTART,
+    ACTION_START,
+    Container,
+    ContainerActionJournal,
+    STATE_CREATED,
+    STATE_PAUSED,
+    STATE_PULLING,
+    STATE_RESTARTING,
+    STATE_RUNNING,
+)
+
+
+app_settings = AppSettingAPI()
+
+APP_NAME = 'containers'
+
+#: States in which a container holds resources on the Docker host.
+STATES_ACTIVE = (STATE_RUNNING, STATE_PAUSED)
+
+#: States of a container on its way to ``STATES_ACTIVE``.
+STATES_STARTING = (STATE_PULLING, STATE_CREATED, STATE_RESTARTING)
+
+#: Key of the advisory locks serializing admission, the second key is the
+#: project PK or 0 for the site-wide lock.
+ADMISSION_LOCK_KEY = 0x4B696F73
+
+
+class QuotaExceeded(Exception):
+    """Raised when starting a container would exceed a resource quota."""
+
+
+def get_usage(queryset):
+    """
+    Return the number of active containers and their assigned CPUs and memory
+    summed over all replicas. Containers that are starting, either by state or
+    by a start action in progress, are counted as active.
+
+    :param queryset: QuerySet of Container objects
+    :return: Dict with keys ``containers``, ``cpu`` and ``memory``
+    """
+    starting = ContainerActionJournal.objects.filter(
+        container=OuterRef('pk'), action__in=(ACTION_START, ACTION_RESTART)
+    )
+    usage = queryset.filter(
+        Q(state__in=STATES_ACTIVE + STATES_STARTING) | Exists(starting)
+    ).aggregate(
+        containers=Count('id'),
+        cpu=Sum(F('cpu_limit') * F('replicas'), output_field=FloatField()),
+        memory=Sum(F('memory_limit') * F('replicas')),
+    )
+    return {
+        'containers': usage['containers'],
+        'cpu': usage['cpu'] or 0,
+        'memory': usage['memory'] or 0,
+    }
+
+
+def _check_quota(scope, container, usage, max_containers, max_cpu, max_memory):
+    if max_containers and usage['containers'] + 1 > max_containers:
+        raise QuotaExceeded(
+            f'{scope} limit of {max_containers} running containers reached'
+        )
+
+    if max_cpu:
+        if not container.cpu_limit:
+            raise QuotaExceeded(
+                f'{scope} has a CPU quota but the container has no CPU limit'
+            )
+
+        if usage['cpu'] + container.cpu_limit * container.replicas > max_cpu:
+            raise QuotaExceeded(f'{scope} CPU quota of {max_cpu} exceeded')
+
+    if max_memory:
+        if not container.memory_limit:
+            raise QuotaExceeded(
+                f'{scope} has a memory quota but the container has no memory '
+                f'limit'
+            )
+
+        if (
+            usage['memory'] + container.memory_limit * container.replicas
+            > max_memory
+        ):
+            raise QuotaExceeded(
+                f'{scope} memory quota of {max_memory} MB exceeded'
+            )
+
+
+def lock_admission(project):
+    """
+    Serialize the admission of containers of a project until the current
+    transaction ends. If site quotas are set, admission is serialized for the
+    whole site. Must be called in a transaction.
+
+    :param project: Project object the container belongs to
+    """
+    keys = [project.pk]
+
+    if (
+        settings.KIOSC_SITE_MAX_RUNNING_CONTAINERS
+        or settings.KIOSC_SITE_MAX_CPU
+        or settings.KIOSC_SITE_MAX_MEMORY
+    ):
+        keys.insert(0, 0)
+
+    with connection.cursor() as cursor:
+        for key in keys:
+            cursor.execute(
+                'SELECT pg_advisory_xact_lock(%s, %s)',
+                [ADMISSION_LOCK_KEY, key],
+            )
+
+
+def check_quotas(container):
+    """
+    Check whether starting a container stays within the project and site
+    quotas.
+
+    :param container: Container object to be started
+    :raise: QuotaExceeded if a quota would be exceeded
+    """
+    others = Container.objects.exclude(pk=container.pk)
+    project = container.project
+    _check_quota(
+        'Project',
+        container,
+        get_usage(others.filter(project=project)),
+        app_settings.get(APP_NAME, 'quota_containers', project=project),
+        app_settings.get(APP_NAME, 'quota_cpu', project=project),
+        app_settings.get(APP_NAME, 'quota_memory', project=project),
+    )
+    _check_quota(
+        'Site',
+        container,
+        get_usage(others),
+        settings.KIOSC_SITE_MAX_RUNNING_CONTAINERS,
+        settings.KIOSC_SITE_MAX_CPU,
+        settings.KIOSC_SITE_MAX_MEMORY,
+    )
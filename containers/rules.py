@@ -106,3 +106,44 @@ rules.add_perm(
     | pr_rules.is_project_delegate
     | pr_rules.is_project_contributor,
 )
+
+
+#: Permissions evaluated for rendering containers and their controls.
+CONTAINER_PERMS = (
+    'view_container',
+    'create_container',
+    'edit_container',
+    'delete_container',
+    'start_container',
+    'stop_container',
+    'pause_container',
+    'unpause_container',
+    'proxy',
+    'view_logs',
+)
+
+
+def get_container_perms(request, project):
+    """
+    Return the container permissions of the request user in a project.
+
+    The permissions are evaluated once per project and memoized on the
+    request.
+
+    :param request: HttpRequest object
+    :param project: Project object
+    :return: Dict mapping the names in ``CONTAINER_PERMS`` to booleans
+    """
+    memo = getattr(request, '_container_perms', None)
+
+    if memo is None:
+        memo = {}
+        request._container_perms = memo
+
+    if project.pk not in memo:
+        memo[project.pk] = {
+            perm: request.user.has_perm(f'containers.{perm}', project)
+            for perm in CONTAINER_PERMS
+        }
+
+    return memo[project.pk]
@@ -0,0 +1,113 @@
+"""Cron-like start and stop schedules for containers"""
+
+from datetime import timedelta, timezone as dt_timezone
+
+from celery.schedules import crontab
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+
+def parse_schedule(value):
+    """
+    Parse a schedule in crontab notation.
+
+    The schedule consists of the five fields ``minute hour day-of-month
+    month day-of-week``, e.g. ``0 8 * * 1-5`` for 8:00 on weekdays.
+
+    :param value: Schedule string
+    :return: ``crontab`` object
+    :raise: ValueError if the schedule is invalid
+    """
+    fields = value.split()
+
+    if len(fields) != 5:
+        raise ValueError(
+            'Schedule must consist of five fields: '
+            'minute hour day-of-month month day-of-week'
+        )
+
+    minute, hour, day_of_month, month_of_year, day_of_week = fields
+    return crontab(
+        minute=minute,
+        hour=hour,
+        day_of_month=day_of_month,
+        month_of_year=month_of_year,
+        day_of_week=day_of_week,
+    )
+
+
+def validate_schedule(value):
+    """Validator for schedule fields."""
+    try:
+        parse_schedule(value)
+
+    except ValueError as e:
+        raise ValidationError(f'Invalid schedule: {e}')
+
+
+def _matches(schedule, now):
+    """Return whether a parsed schedule matches the minute of ``now``."""
+    now = timezone.localtime(now)
+    return (
+        now.minute in schedule.minute
+        and now.hour in schedule.hour
+        and now.day in schedule.day_of_month
+        and now.month in schedule.month_of_year
+        and now.isoweekday() % 7 in schedule.day_of_week
+    )
+
+
+def is_due(value, now=None):
+    """
+    Return whether a schedule matches the minute of ``now``.
+
+    :param value: Schedule string, may be empty
+    :param now: Datetime to check, defaults to the current time
+    :return: Boolean
+    """
+    if not value:
+        return False
+
+    try:
+        schedule = parse_schedule(value)
+
+    except ValueError:
+        return False
+
+    return _matches(schedule, now)
+
+
+def get_last_due(value, since, now=None):
+    """
+    Return the last minute after ``since`` up to the minute of ``now`` that
+    matches a schedule, so windows missed by a late run can be caught up.
+
+    :param value: Schedule string, may be empty
+    :param since: Datetime of the last check, its minute is excluded
+    :param now: Datetime to check, defaults to the current time
+    :return: Datetime truncated to the minute or ``None``
+    """
+    if not value:
+        return None
+
+    try:
+        schedule = parse_schedule(value)
+
+    except ValueError:
+        return None
+
+    # Step through UTC minutes, local minutes are ambiguous around DST changes
+    minute = (
+        (now or timezone.now())
+        .astimezone(dt_timezone.utc)
+        .replace(second=0, microsecond=0)
+    )
+    since = since.replace(second=0, microsecond=0)
+
+    while minute > since:
+        if _matches(schedule, minute):
+            return minute
+
+        minute -= timedelta(minutes=1)
+
+    return None
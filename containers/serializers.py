@@ -1,7 +1,31 @@
 from django.conf import settings
 from projectroles.serializers import SODARProjectModelSerializer
+from rest_framework import serializers
 
-from containers.models import Container
+from containers.models import (
+    Container,
+    ContainerBatchJob,
+    ContainerResourceUsage,
+    HostPortBlock,
+    ACTION_START,
+    ACTION_STOP,
+    ACTION_RESTART,
+    ACTION_PAUSE,
+    ACTION_UNPAUSE,
+    ACTION_DELETE,
+    STATE_CHOICES,
+)
+
+
+#: Actions that can be submitted for many containers at once.
+BULK_ACTIONS = (
+    ACTION_START,
+    ACTION_STOP,
+    ACTION_RESTART,
+    ACTION_PAUSE,
+    ACTION_UNPAUSE,
+    ACTION_DELETE,
+)
 
 
 class ContainerSerializer(SODARProjectModelSerializer):
@@ -32,6 +56,14 @@ class ContainerSerializer(SODARProjectModelSerializer):
             'title',
             'description',
             'inactivity_threshold',
+            'inactivity_pause_threshold',
+            'inactivity_delete_threshold',
+            'cpu_limit',
+            'memory_limit',
+            'pids_limit',
+            'replicas',
+            'schedule_start',
+            'schedule_stop',
             'max_retries',
         )
         read_only_fields = (
@@ -41,10 +73,78 @@ class ContainerSerializer(SODARProjectModelSerializer):
             'project',
         )
 
-    def get_extra_kwargs(self):
-        # Use this instead of ``extra_kwargs`` because of overriding settings in tests
-        extra_kwargs = super().get_extra_kwargs()
-        extra_kwargs['host_port'] = {
-            'required': settings.KIOSC_NETWORK_MODE == 'host'
-        }
-        return extra_kwargs
+    def validate(self, attrs):
+        host_port = attrs.get('host_port')
+
+        # Ports of replicas and allocated ports are not covered by the
+        # unique constraint of the field
+        if (
+            host_port is not None
+            and (self.instance is None or host_port != self.instance.host_port)
+            and HostPortBlock.objects.is_used(host_port)
+        ):
+            raise serializers.ValidationError(
+                {'host_port': 'Host port is already in use'}
+            )
+
+        # An empty host port is assigned automatically in host mode, a
+        # cleared port of an existing container is released before that
+        if (
+            settings.KIOSC_NETWORK_MODE == 'host'
+            and (
+                self.instance is None
+                or ('host_port' in attrs and self.instance.host_port is None)
+            )
+            and attrs.get('host_port') is None
+            and not HostPortBlock.objects.has_free_port()
+        ):
+            raise serializers.ValidationError(
+                {'host_port': 'No free host port left, please specify one'}
+            )
+        return attrs
+
+
+class ContainerResourceUsageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ContainerResourceUsage
+        fields = (
+            'date_collected',
+            'resolution',
+            'cpu_percent',
+            'memory_usage',
+            'memory_limit',
+            'network_rx',
+            'network_tx',
+            'pids',
+        )
+
+
+class ContainerBulkActionSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=BULK_ACTIONS)
+    containers = serializers.ListField(
+        child=serializers.UUIDField(), required=False, allow_empty=False
+    )
+    state = serializers.ChoiceField(choices=STATE_CHOICES, required=False)
+
+    def validate(self, attrs):
+        if 'containers' not in attrs and 'state' not in attrs:
+            raise serializers.ValidationError(
+                'Either containers or state is required'
+            )
+        return attrs
+
+
+class ContainerBatchJobSerializer(serializers.ModelSerializer):
+    status = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ContainerBatchJob
+        fields = (
+            'sodar_uuid',
+            'date_created',
+            'action',
+            'status',
+        )
+
+    def get_status(self, obj):
+        return obj.get_status_counts()
@@ -1,3 +1,5 @@
+import hashlib
+import json
 import shlex
 
 import docker
@@ -12,6 +14,10 @@ from docker.types import Ulimit
 from statemachine import StateMachine, State
 
 from containers.models import (
+    ContainerActionJournal,
+    ContainerActionLock,
+    ContainerReplica,
+    HostPortBlock,
     STATE_CREATED,
     STATE_RUNNING,
     STATE_PAUSED,
@@ -31,6 +37,7 @@ from containers.models import (
     ACTION_UNPAUSE,
     ACTION_DELETE,
 )
+from containers.quotas import STATES_ACTIVE, check_quotas, lock_admission
 
 
 logger = logging.getLogger(__name__)
@@ -40,6 +47,15 @@ logger = logging.getLogger(__name__)
 APP_NAME = 'containers'
 DEFAULT_TIMEOUT_DOCKER_ACTION = 60
 
+#: Docker label with the UUID of the container.
+LABEL_CONTAINER_UUID = 'kiosc.container_uuid'
+#: Docker label with the UUID of the project of the container.
+LABEL_PROJECT_UUID = 'kiosc.project_uuid'
+#: Docker label with the ID of the Kiosc instance owning the container.
+LABEL_INSTANCE = 'kiosc.instance'
+#: Docker label with the index of a replica of the container.
+LABEL_REPLICA = 'kiosc.replica'
+
 
 ACTION_TO_EXPECTED_STATE = {
     ACTION_START: STATE_RUNNING,
@@ -58,9 +74,32 @@ def connect_docker(
     return docker.APIClient(base_url=base_url, timeout=timeout)
 
 
+def get_docker_labels(container, replica=None):
+    """Return the labels marking a Docker container as owned by Kiosc.
+
+    :param container: Container object
+    :param replica: Optional ContainerReplica object
+    :return: Dict of Docker labels
+    """
+    labels = {
+        LABEL_CONTAINER_UUID: str(container.sodar_uuid),
+        LABEL_PROJECT_UUID: str(container.project.sodar_uuid),
+        LABEL_INSTANCE: settings.KIOSC_INSTANCE_ID,
+    }
+
+    if replica:
+        labels[LABEL_REPLICA] = str(replica.index)
+
+    return labels
+
+
+def get_instance_filter():
+    """Return the Docker filter selecting the containers of this instance."""
+    return {'label': f'{LABEL_INSTANCE}={settings.KIOSC_INSTANCE_ID}'}
+
+
 class ActionSwitch:
-    def __init__(self, cm, job, tl_event):
-        self.tl_event = tl_event
+    def __init__(self, cm, job):
         self.cm = cm
         self.job = job
         self._switches = {
@@ -85,15 +124,24 @@ class ActionSwitch:
             self.cm.start_created()
 
         elif state == STATE_EXITED:
-            self.cm.delete()
-            self.cm.delete_success()
-            self.cm.pull_deleted()
-            self.cm.start_pulled()
+            if self.cm.is_config_unchanged():
+                # Start the existing container instead of re-creating it
+                self.cm.start_exited()
+
+            else:
+                self.cm.delete()
+                self.cm.delete_success()
+                self.cm.pull_deleted()
+                self.cm.start_pulled()
 
         elif state == STATE_FAILED:
             self.cm.pull_failed()
             self.cm.start_pulled()
 
+        elif state == STATE_PAUSED:
+            # Resume a frozen container without re-creating it
+            self.cm.unpause()
+
         else:
             raise RuntimeError(f'Action start not allowed in state {state}')
 
@@ -123,17 +171,26 @@ class ActionSwitch:
 
     def _restart(self, state):
         if state == STATE_RUNNING:
-            self.cm.stop_running()
-            self.cm.delete()
-            self.cm.delete_success()
-            self.cm.pull_deleted()
-            self.cm.start_pulled()
+            if self.cm.is_config_unchanged():
+                # Restart the existing container instead of re-creating it
+                self.cm.restart()
+
+            else:
+                self.cm.stop_running()
+                self.cm.delete()
+                self.cm.delete_success()
+                self.cm.pull_deleted()
+                self.cm.start_pulled()
 
         elif state == STATE_EXITED:
-            self.cm.delete()
-            self.cm.delete_success()
-            self.cm.pull_deleted()
-            self.cm.start_pulled()
+            if self.cm.is_config_unchanged():
+                self.cm.start_exited()
+
+            else:
+                self.cm.delete()
+                self.cm.delete_success()
+                self.cm.pull_deleted()
+                self.cm.start_pulled()
 
         else:
             raise RuntimeError(f'Action restart not allowed in state {state}')
@@ -180,34 +237,43 @@ class ActionSwitch:
         f = self._switches.get(action)
 
         if not f:
-            if self.tl_event:
-                self.tl_event.set_status('FAILED', 'action failed')
-                self.job.container.log_entries.create(
-                    text=f'Unknown action: {action}',
-                    process=PROCESS_TASK,
-                    user=self.job.bg_job.user,
-                )
+            self.job.add_container_log_entry(
+                text=f'Unknown action: {action}',
+                process=PROCESS_TASK,
+                user=self.job.bg_job.user,
+            )
             raise RuntimeError(f'Unknown action: {action}')
 
-        if self.tl_event:
-            self.tl_event.set_status('OK', 'action succeeded')
-
-        action_locks = self.cm.container.action_lock.all()
-
-        if action_locks.count() == 0:
-            self.cm.container.action_lock.create(action=action)
-
-        elif action_locks.count() == 1:
-            action_locks.first().lock(action)
+        # Admission control for actions that start a stopped container. The
+        # journal entry marks the container as starting for the quotas, so
+        # admission is serialized until it is committed.
+        starting = action in (ACTION_START, ACTION_RESTART)
 
-        else:
-            raise RuntimeError(
-                f'Maximal one lock per container expected, got {action_locks.count()}'
+        with transaction.atomic():
+            if starting and state not in STATES_ACTIVE:
+                lock_admission(self.cm.container.project)
+                check_quotas(self.cm.container)
+
+            ContainerActionLock.acquire(self.cm.container, action)
+
+            # Docker operations run outside of a transaction, every
+            # transition commits its own state changes and is recorded in
+            # the journal
+            self.cm.journal = ContainerActionJournal.objects.create(
+                container=self.cm.container,
+                job=self.job,
+                action=action,
+                state_before=state,
+                state=state,
             )
 
-        with transaction.atomic():
+        try:
             f(state)
 
+        finally:
+            self.cm.journal.delete()
+            self.cm.journal = None
+
 
 class ContainerMachine(StateMachine):
     """State machine for Docker container status."""
@@ -264,6 +330,9 @@ class ContainerMachine(StateMachine):
     #: Transition when starting an exited container (action: start).
     start_exited = exited.to(running)
 
+    #: Transition when restarting a running container with unchanged configuration (action: restart).
+    restart = running.to.itself()
+
     #: Transition when pausing a running container (action: pause).
     pause = running.to(paused)
 
@@ -328,6 +397,7 @@ class ContainerMachine(StateMachine):
 
     def __init__(self, *args, **kwargs):
         job = kwargs.pop('job')
+        self.journal = None
         super().__init__(*args, **kwargs)
         self.container = job.container
         self.job = job
@@ -337,6 +407,16 @@ class ContainerMachine(StateMachine):
         self.job.add_log_entry('Connecting to Docker API...')
         self.cli = connect_docker(timeout=self.container.timeout)
 
+    def after_transition(self, event):
+        # Record progress for recovering from a crashed worker
+        if self.journal:
+            self.journal.transition = str(event)
+            self.journal.state = self.container.state
+            self.journal.save()
+
+        if self.job.log_writer:
+            self.job.log_writer.flush()
+
     def _update_status(self, container_info=None):
         if not container_info:
             container_info = self.cli.inspect_container(
@@ -352,20 +432,148 @@ class ContainerMachine(StateMachine):
             .get(settings.KIOSC_DOCKER_NETWORK, {})
             .get('IPAddress')
         )
-        self.container.save()
+        self.container.save(
+            update_fields=['state', 'container_ip', 'date_modified']
+        )
+
+    def _get_environment(self):
+        environment = (
+            dict(self.container.environment)
+            if self.container.environment
+            else {}
+        )
+        url_prefix = reverse(
+            'containers:proxy',
+            kwargs={
+                'container': self.container.sodar_uuid,
+                'path': self.container.container_path or '',
+            },
+        )
+
+        for key, value in environment.items():
+            if isinstance(value, str) and '__KIOSC_URL_PREFIX__' in value:
+                environment[key] = value.replace(
+                    '__KIOSC_URL_PREFIX__', url_prefix
+                )
+
+        environment.update(
+            {
+                'CONTAINER_PORT': self.container.container_port,
+                'TITLE': self.container.title,
+                'DESCRIPTION': self.container.description or '',
+            }
+        )
+
+        return environment
+
+    def _get_config_fingerprint(self, image_id):
+        """Return a fingerprint of the configuration the Docker container is
+        created with, used to detect configuration drift.
+        """
+        config = {
+            'image': self.container.get_repos_full(),
+            'image_id': image_id,
+            'environment': self._get_environment(),
+            'command': self.container.command,
+            'ports': [self.container.container_port],
+            'ulimits': {
+                'nofile': [
+                    settings.KIOSC_DOCKER_MAX_ULIMIT_NOFILE_SOFT,
+                    settings.KIOSC_DOCKER_MAX_ULIMIT_NOFILE_HARD,
+                ],
+            },
+            'network_mode': settings.KIOSC_NETWORK_MODE,
+            'resources': [
+                self.container.cpu_limit,
+                self.container.memory_limit,
+                self.container.pids_limit,
+            ],
+        }
+
+        if settings.KIOSC_NETWORK_MODE == 'docker-shared':
+            config['network'] = settings.KIOSC_DOCKER_NETWORK
+
+        if settings.KIOSC_NETWORK_MODE == 'host':
+            config['host_port'] = self.container.host_port
+
+        if self.container.replicas > 1:
+            config['replicas'] = self.container.replicas
+
+        return hashlib.sha256(
+            json.dumps(config, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def is_config_unchanged(self):
+        """Return whether the existing Docker container was created with the
+        current configuration and can be reused instead of re-created.
+        """
+        if (
+            not self.container.container_id
+            or not self.container.config_fingerprint
+        ):
+            return False
+
+        # Pull first so an updated image of the same tag is picked up
+        try:
+            self._pull_image()
+
+        except docker.errors.APIError as e:
+            self.job.add_log_entry(
+                f'Pulling image failed, using local image: {e}'
+            )
+
+        try:
+            image_details = self.cli.inspect_image(
+                self.container.get_repos_full()
+            )
+
+        except docker.errors.APIError:
+            return False
+
+        return (
+            self._get_config_fingerprint(image_details.get('Id'))
+            == self.container.config_fingerprint
+        )
+
+    def _pull_image(self):
+        """Pull the image of the container and log the progress."""
+        for line in self.cli.pull(
+            repository=self.container.repository,
+            tag=self.container.tag,
+            stream=True,
+            decode=True,
+        ):
+            if (
+                line.get('progressDetail')
+                and line['progressDetail'].get('current')
+                and line['progressDetail'].get('total')
+            ):
+                docker_log_line = '{status} ({progressDetail[current]}/{progressDetail[total]})'.format(
+                    **line
+                )
+            else:
+                docker_log_line = line['status']
+
+            self.job.add_container_log_entry(
+                text=docker_log_line,
+                process=PROCESS_DOCKER,
+                date_docker_log=timezone.now(),
+                user=self.user,
+            )
+            self.job.add_log_entry(docker_log_line)
 
     def on_pull(self):
         # Pulling image
         self.job.add_log_entry(
             f'Pulling image {self.container.get_repos_full()} ...'
         )
-        self.container.log_entries.create(
+        self.job.add_container_log_entry(
             text='Pulling image ...',
             process=PROCESS_TASK,
             user=self.user,
         )
         self.container.state = STATE_PULLING
-        self.container.save()
+        self.container.save(update_fields=['state', 'date_modified'])
 
         need_to_pull = True
         for image in self.cli.images(self.container.repository):
@@ -374,43 +582,42 @@ class ContainerMachine(StateMachine):
                 break
 
         if need_to_pull:
-            for line in self.cli.pull(
-                repository=self.container.repository,
-                tag=self.container.tag,
-                stream=True,
-                decode=True,
-            ):
-                if (
-                    line.get('progressDetail')
-                    and line['progressDetail'].get('current')
-                    and line['progressDetail'].get('total')
-                ):
-                    docker_log_line = '{status} ({progressDetail[current]}/{progressDetail[total]})'.format(
-                        **line
-                    )
-                else:
-                    docker_log_line = line['status']
-
-                self.container.log_entries.create(
-                    text=docker_log_line,
-                    process=PROCESS_DOCKER,
-                    date_docker_log=timezone.now(),
-                    user=self.user,
-                )
-                self.job.add_log_entry(docker_log_line)
+            self._pull_image()
 
         image_details = self.cli.inspect_image(self.container.get_repos_full())
         self.container.image_id = image_details.get('Id')
-        self.container.save()
+        self.container.save(update_fields=['image_id', 'date_modified'])
         self.job.add_log_entry('Pulling image succeeded')
-        self.container.log_entries.create(
+        self.job.add_container_log_entry(
             text='Pulling image succeeded',
             process=PROCESS_TASK,
             user=self.user,
         )
 
+        # Create container
+        container_info = self._create_docker_container(
+            image_details['RepoTags'][0]
+        )
+        self.container.container_id = container_info.get('Id')
+        self.container.config_fingerprint = self._get_config_fingerprint(
+            image_details.get('Id')
+        )
+        self.container.save(
+            update_fields=[
+                'container_id',
+                'config_fingerprint',
+                'date_modified',
+            ]
+        )
+        self._create_replicas(image_details['RepoTags'][0])
+        self._update_status(container_info)
+
+    def _create_docker_container(self, image, replica=None):
+        """Create the Docker container of the container or of one of its
+        replicas and return the Docker API response."""
         options = {}
         options_host_config = {}
+        host_port = replica.host_port if replica else self.container.host_port
 
         if settings.KIOSC_NETWORK_MODE == 'docker-shared':
             options['networking_config'] = self.cli.create_networking_config(
@@ -421,47 +628,31 @@ class ContainerMachine(StateMachine):
 
         if settings.KIOSC_NETWORK_MODE == 'host':
             options_host_config['port_bindings'] = {
-                self.container.container_port: self.container.host_port
+                self.container.container_port: host_port
             }
 
-        environment = (
-            dict(self.container.environment)
-            if self.container.environment
-            else {}
-        )
-        url_prefix = reverse(
-            'containers:proxy',
-            kwargs={
-                'container': self.container.sodar_uuid,
-                'path': self.container.container_path or '',
-            },
-        )
+        if self.container.cpu_limit:
+            options_host_config['nano_cpus'] = int(
+                self.container.cpu_limit * 1e9
+            )
 
-        for key, value in environment.items():
-            if isinstance(value, str) and '__KIOSC_URL_PREFIX__' in value:
-                environment[key] = value.replace(
-                    '__KIOSC_URL_PREFIX__', url_prefix
-                )
+        if self.container.memory_limit:
+            options_host_config['mem_limit'] = f'{self.container.memory_limit}m'
 
-        environment.update(
-            {
-                'CONTAINER_PORT': self.container.container_port,
-                'TITLE': self.container.title,
-                'DESCRIPTION': self.container.description or '',
-            }
-        )
+        if self.container.pids_limit:
+            options_host_config['pids_limit'] = self.container.pids_limit
 
-        # Create container
-        container_info = self.cli.create_container(
+        return self.cli.create_container(
             detach=True,
-            image=image_details['RepoTags'][0],
-            environment=environment,
+            image=image,
+            environment=self._get_environment(),
             command=(
                 shlex.split(self.container.command)
                 if self.container.command
                 else None
             ),
             ports=[self.container.container_port],
+            labels=get_docker_labels(self.container, replica),
             host_config=self.cli.create_host_config(
                 ulimits=[
                     Ulimit(
@@ -474,9 +665,61 @@ class ContainerMachine(StateMachine):
             ),
             **options,
         )
-        self.container.container_id = container_info.get('Id')
-        self.container.save()
-        self._update_status(container_info)
+
+    def _create_replicas(self, image):
+        """Create the Docker containers of the replicas beyond the
+        container itself, replacing existing ones."""
+        self._delete_replicas()
+
+        for index in range(1, self.container.replicas):
+            self.job.add_log_entry(f'Creating replica {index}')
+
+            # The port is only marked as used along with the replica
+            with transaction.atomic():
+                replica = ContainerReplica.objects.create(
+                    container=self.container,
+                    index=index,
+                    host_port=(
+                        HostPortBlock.objects.allocate()
+                        if settings.KIOSC_NETWORK_MODE == 'host'
+                        else None
+                    ),
+                )
+
+            try:
+                container_info = self._create_docker_container(image, replica)
+
+            except Exception:
+                # Deleting the replica releases its port
+                replica.delete()
+                raise
+
+            replica.docker_id = container_info.get('Id')
+            replica.state = STATE_CREATED
+            replica.save()
+
+    def _update_replicas(self, func, name):
+        """Apply the Docker API function ``func`` to the replicas and
+        update their states."""
+        for replica in self.container.replica_set.all():
+            self.job.add_log_entry(f'{name} replica {replica.index}')
+            func(replica.docker_id)
+            container_info = self.cli.inspect_container(replica.docker_id)
+            replica.state = container_info.get('State', {}).get('Status')
+            replica.save()
+
+    def _delete_replicas(self):
+        """Remove the Docker containers of the replicas."""
+        for replica in self.container.replica_set.all():
+            self.job.add_log_entry(f'Deleting replica {replica.index}')
+
+            try:
+                self.cli.remove_container(replica.docker_id, force=True)
+
+            except (docker.errors.NullResource, docker.errors.NotFound):
+                pass
+
+            replica.delete()
 
     def on_pull_deleted(self):
         self.on_pull()
@@ -486,14 +729,15 @@ class ContainerMachine(StateMachine):
 
     def on_start_pulled(self):
         # Starting container
-        self.container.log_entries.create(
+        self.job.add_container_log_entry(
             text='Starting ...', process=PROCESS_TASK, user=self.user
         )
         self.job.add_log_entry('Starting container')
         self.cli.start(self.container.container_id)
+        self._update_replicas(self.cli.start, 'Starting')
         self._update_status()
         self.job.add_log_entry('Starting container succeeded')
-        self.container.log_entries.create(
+        self.job.add_container_log_entry(
             text='Starting succeeded',
             process=PROCESS_TASK,
             user=self.user,
@@ -505,45 +749,63 @@ class ContainerMachine(StateMachine):
     def on_start_exited(self):
         self.on_start_pulled()
 
+    def on_restart(self):
+        self.job.add_container_log_entry(
+            text='Restarting ...', process=PROCESS_TASK, user=self.user
+        )
+        self.job.add_log_entry('Restarting container')
+        self.cli.restart(self.container.container_id)
+        self._update_replicas(self.cli.restart, 'Restarting')
+        self._update_status()
+        self.job.add_log_entry('Restarting container succeeded')
+        self.job.add_container_log_entry(
+            text='Restarting succeeded',
+            process=PROCESS_TASK,
+            user=self.user,
+        )
+
     def on_pause(self):
-        self.container.log_entries.create(
+        self.job.add_container_log_entry(
             text='Pausing ...', process=PROCESS_TASK, user=self.user
         )
         self.job.add_log_entry('Pausing container')
         self.cli.pause(self.container.container_id)
+        self._update_replicas(self.cli.pause, 'Pausing')
         self._update_status()
         self.job.add_log_entry('Pausing container succeeded')
-        self.container.log_entries.create(
+        self.job.add_container_log_entry(
             text='Pausing succeeded',
             process=PROCESS_TASK,
             user=self.user,
         )
 
     def on_unpause(self):
-        self.container.log_entries.create(
+        self.job.add_container_log_entry(
             text='Unpausing ...', process=PROCESS_TASK, user=self.user
         )
         self.job.add_log_entry('Unpausing container')
         self.cli.unpause(self.container.container_id)
+        self._update_replicas(self.cli.unpause, 'Unpausing')
         self._update_status()
         self.job.add_log_entry('Unpausing container succeeded')
-        self.container.log_entries.create(
+        self.job.add_container_log_entry(
             text='Unpausing succeeded',
             process=PROCESS_TASK,
             user=self.user,
         )
 
     def on_stop_running(self):
-        self.container.log_entries.create(
+        self.job.add_container_log_entry(
             text='Stopping ...', process=PROCESS_TASK, user=self.user
         )
         self.job.add_log_entry('Stopping container')
 
         # Stopping container and updating status
         self.cli.stop(self.container.container_id)
+        self._update_replicas(self.cli.stop, 'Stopping')
         self._update_status()
 
-        self.container.log_entries.create(
+        self.job.add_container_log_entry(
             text='Stopping succeeded',
             process=PROCESS_TASK,
             user=self.user,
@@ -554,12 +816,14 @@ class ContainerMachine(StateMachine):
         self.on_stop_running()
 
     def on_delete(self):
-        self.container.log_entries.create(
+        self.job.add_container_log_entry(
             text='Deleting ...', process=PROCESS_TASK, user=self.user
         )
         self.job.add_log_entry('Deleting container')
         self.container.state = STATE_DELETING
-        self.container.save()
+        self.container.save(update_fields=['state', 'date_modified'])
+
+        self._delete_replicas()
 
         # Removing container and erasing container_id
         try:
@@ -567,7 +831,7 @@ class ContainerMachine(StateMachine):
 
         except docker.errors.NullResource as ex:
             logger.error('Failed to delete container: %s', ex)
-            self.container.log_entries.create(
+            self.job.add_container_log_entry(
                 text="Empty container ID, don't know what to delete. Continuing.",
                 process=PROCESS_TASK,
                 user=self.user,
@@ -575,7 +839,7 @@ class ContainerMachine(StateMachine):
 
         except docker.errors.NotFound as ex:
             logger.error('Failed to delete container: %s', ex)
-            self.container.log_entries.create(
+            self.job.add_container_log_entry(
                 text=f'Container with {self.container.container_id} not found, nothing to delete',
                 process=PROCESS_TASK,
                 user=self.user,
@@ -596,9 +860,17 @@ class ContainerMachine(StateMachine):
     def on_delete_success(self):
         self.container.state = STATE_DELETED
         self.container.container_id = None
-        self.container.save()
+        self.container.config_fingerprint = None
+        self.container.save(
+            update_fields=[
+                'state',
+                'container_id',
+                'config_fingerprint',
+                'date_modified',
+            ]
+        )
 
-        self.container.log_entries.create(
+        self.job.add_container_log_entry(
             text='Deleting succeeded',
             process=PROCESS_TASK,
             user=self.user,
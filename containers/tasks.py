@@ -1,40 +1,66 @@
 import logging
-import traceback
+from datetime import timedelta
 
 import docker
 import docker.errors
 import statemachine.exceptions
+from celery import chord, group
 
-from bgjobs.models import LOG_LEVEL_DEBUG
+from bgjobs.models import (
+    BackgroundJob,
+    JOB_STATE_INITIAL,
+    JOB_STATE_RUNNING,
+)
 from django.conf import settings
 
+from django.apps import apps
 from django.db import transaction
 from django.utils import timezone
 
-from projectroles.models import SODAR_CONSTANTS
+from projectroles.models import Project, SODAR_CONSTANTS
 from projectroles.plugins import PluginAPI
 
-from config.celery import app
+from config.celery import (
+    app,
+    QUEUE_BULK,
+    QUEUE_INTERACTIVE,
+    QUEUE_MAINTENANCE,
+)
 from django.contrib import auth
 
 # Projectroles dependency
 from projectroles.app_settings import AppSettingAPI
 
 from containers.models import (
+    Container,
     ContainerBackgroundJob,
+    ContainerBatchJob,
+    ContainerLogEntry,
+    ContainerReplica,
+    PROCESS_ACTION,
     LOG_LEVEL_ERROR,
     STATE_INITIAL,
+    STATE_DELETED,
     STATE_FAILED,
     PROCESS_TASK,
     PROCESS_DOCKER,
     LOG_LEVEL_WARNING,
     ContainerActionLock,
+    ACTION_START,
+    ACTION_STOP,
+    ACTION_RESTART,
+    ACTION_PAUSE,
+    ACTION_UNPAUSE,
+    ACTION_DELETE,
 )
 from containers.statemachines import (
     connect_docker,
+    get_instance_filter,
     ContainerMachine,
     ActionSwitch,
 )
+from containers.logwriter import JobLogWriter
+from containers.quotas import QuotaExceeded
 
 User = auth.get_user_model()
 app_settings = AppSettingAPI()
@@ -49,25 +75,275 @@ DEFAULT_GRACE_PERIOD_CONTAINER_STATUS = 180
 SITE_MODE_TARGET = SODAR_CONSTANTS['SITE_MODE_TARGET']
 SITE_MODE_SOURCE = SODAR_CONSTANTS['SITE_MODE_SOURCE']
 
+#: Celery task priority per action (0 is the highest). Fast actions that free
+#: resources overtake slow starts waiting in the same queue.
+ACTION_PRIORITY = {
+    ACTION_STOP: 0,
+    ACTION_PAUSE: 0,
+    ACTION_UNPAUSE: 0,
+    ACTION_DELETE: 3,
+    ACTION_RESTART: 6,
+    ACTION_START: 6,
+}
+
+
+def get_container_task_options(action, queue=QUEUE_INTERACTIVE):
+    """Return the queue and priority for submitting ``container_task``."""
+    return {'queue': queue, 'priority': ACTION_PRIORITY.get(action, 6)}
+
+
+def _get_pending_jobs(action):
+    """Return the jobs that absorb a new submission of ``action``."""
+    statuses = [JOB_STATE_INITIAL]
+
+    if action != ACTION_RESTART:
+        statuses.append(JOB_STATE_RUNNING)
+
+    return ContainerBackgroundJob.objects.filter(
+        action=action,
+        bg_job__status__in=statuses,
+        date_created__gte=timezone.now()
+        - timedelta(seconds=settings.KIOSC_JOB_COALESCE_TIMEOUT),
+    )
+
+
+def submit_container_job(
+    container, action, user, name, countdown, queue=QUEUE_INTERACTIVE
+):
+    """Create a background job for a container action and submit it.
+
+    Repeated submissions are coalesced: if a job with the same action is
+    still pending for the container, it is returned instead of creating and
+    queueing another one. A restart that is already running is not considered
+    pending, as it may not pick up the latest container configuration. The
+    container row is locked while checking, so concurrent submissions are
+    serialized. A new job releases a container parked by the crash loop
+    detection. The task is queued once the current transaction is committed,
+    so the worker always finds the job.
+
+    :param container: Container object
+    :param action: Action to perform
+    :param user: User on behalf of whom the action is performed
+    :param name: Name of the background job
+    :param countdown: Seconds to wait before executing the task
+    :param queue: Celery queue to submit the task to
+    :return: Tuple of the ``ContainerBackgroundJob`` and whether it was created
+    """
+    with transaction.atomic():
+        locked = Container.objects.select_for_update().get(pk=container.pk)
+        job = (
+            _get_pending_jobs(action)
+            .filter(container=container)
+            .order_by('-date_created')
+            .first()
+        )
+
+        if job:
+            return job, False
+
+        bg_job = BackgroundJob.objects.create(
+            name=name,
+            project=container.project,
+            job_type=ContainerBackgroundJob.spec_name,
+            user=user,
+        )
+        job = ContainerBackgroundJob.objects.create(
+            action=action,
+            project=container.project,
+            container=container,
+            bg_job=bg_job,
+        )
+
+        if locked.parked:
+            Container.objects.filter(pk=container.pk).update(
+                parked=False, crash_count=0
+            )
+            container.parked = False
+            container.crash_count = 0
+
+        transaction.on_commit(
+            lambda: container_task.apply_async(
+                kwargs={'job_id': job.id},
+                countdown=countdown,
+                **get_container_task_options(action, queue=queue),
+            )
+        )
+
+    return job, True
+
+
+def submit_container_jobs(
+    project, containers, action, user, name, text, workers=None
+):
+    """Create background jobs for an action on many containers and submit
+    them as one group to the bulk queue.
+
+    Containers with a pending job for the same action are skipped, same as
+    in ``submit_container_job``. The jobs and the container log entries are
+    inserted with ``bulk_create``. The jobs are split into at most
+    ``workers`` chunks, which are run by a group of tasks on the bulk queue,
+    queued once the current transaction is committed. After a delete action,
+    the deleted containers are removed from the database, same as with the
+    delete API.
+
+    :param project: Project the containers belong to
+    :param containers: QuerySet of Container objects
+    :param action: Action to perform
+    :param user: User on behalf of whom the action is performed
+    :param name: Name of the background jobs
+    :param text: Text of the container log entries
+    :param workers: Max number of jobs run at once, defaults to
+                    ``KIOSC_BULK_CONCURRENCY``
+    :return: ``ContainerBatchJob`` object
+    """
+    with transaction.atomic():
+        containers = list(containers.select_for_update())
+        pending = set(
+            _get_pending_jobs(action)
+            .filter(container__in=containers)
+            .values_list('container_id', flat=True)
+        )
+        containers = [c for c in containers if c.pk not in pending]
+        batch = ContainerBatchJob.objects.create(
+            project=project, user=user, action=action
+        )
+        bg_jobs = BackgroundJob.objects.bulk_create(
+            [
+                BackgroundJob(
+                    name=name,
+                    project=project,
+                    job_type=ContainerBackgroundJob.spec_name,
+                    user=user,
+                )
+                for _ in containers
+            ]
+        )
+        jobs = ContainerBackgroundJob.objects.bulk_create(
+            [
+                ContainerBackgroundJob(
+                    action=action,
+                    project=project,
+                    container=container,
+                    bg_job=bg_job,
+                    batch=batch,
+                )
+                for container, bg_job in zip(containers, bg_jobs)
+            ]
+        )
+        # bulk_create() bypasses ContainerBackgroundJob.save()
+        Container.objects.update_last_job(pk__in=[c.pk for c in containers])
+        Container.objects.filter(
+            pk__in=[c.pk for c in containers], parked=True
+        ).update(parked=False, crash_count=0)
+        ContainerLogEntry.objects.bulk_create(
+            [
+                ContainerLogEntry(
+                    container=container,
+                    text=text,
+                    process=PROCESS_ACTION,
+                    user=user,
+                )
+                for container in containers
+            ]
+        )
+
+    if jobs:
+        job_ids = [job.id for job in jobs]
+        n = workers or settings.KIOSC_BULK_CONCURRENCY
+        header = [
+            container_jobs_task.si(job_ids[i::n]).set(
+                countdown=0.5,
+                **get_container_task_options(action, queue=QUEUE_BULK),
+            )
+            for i in range(min(n, len(job_ids)))
+        ]
+
+        if action == ACTION_DELETE:
+            transaction.on_commit(
+                lambda: chord(header)(
+                    delete_batch_containers_task.si(batch.pk).set(
+                        queue=QUEUE_BULK
+                    )
+                )
+            )
+
+        else:
+            transaction.on_commit(lambda: group(header).apply_async())
+
+    return batch
+
 
 class State:
     def __init__(self, state):
         self.state = state
 
 
-def sync_container_state(container):
-    # Update container state
-    cli = connect_docker()
+def get_docker_states(cli, containers):
+    """Return the Docker states of containers.
+
+    The Docker containers of this instance are listed with one request
+    filtered by the instance label. Docker containers created before the
+    labels were introduced are not listed and are inspected one by one.
+
+    :param cli: Docker API client
+    :param containers: Iterable of Container objects
+    :return: Dict mapping Docker container IDs to their state, Docker
+             containers that don't exist are missing
+    """
+    states = {
+        c['Id']: c['State']
+        for c in cli.containers(all=True, filters=get_instance_filter())
+    }
+
+    for container in containers:
+        if not container.container_id or container.container_id in states:
+            continue
+
+        try:
+            data = cli.inspect_container(container.container_id)
+
+        except docker.errors.NotFound:
+            continue
+
+        states[container.container_id] = data.get('State', {}).get('Status')
+
+    return states
+
+
+def sync_container_state(container, docker_states=None):
+    """Update the state of a container with the state of its Docker
+    container.
+
+    :param container: Container object
+    :param docker_states: Optional dict from ``get_docker_states``, if given
+                          the Docker container is not inspected
+    """
     try:
-        data = cli.inspect_container(container.container_id)
-        actual_state = data.get('State', {}).get('Status')
+        if docker_states is not None and container.container_id:
+            if container.container_id not in docker_states:
+                raise docker.errors.NotFound(
+                    f'No such container: {container.container_id}'
+                )
+
+            actual_state = docker_states[container.container_id]
+
+        else:
+            data = connect_docker().inspect_container(container.container_id)
+            actual_state = data.get('State', {}).get('Status')
+
         if container.state != actual_state:
             logger.warning(
                 '%s: Container state our of sync', container.sodar_uuid
             )
             container.date_last_status_update = timezone.now()
             container.state = actual_state
-            container.save()
+            container.save(
+                update_fields=[
+                    'state',
+                    'date_last_status_update',
+                    'date_modified',
+                ]
+            )
     except docker.errors.NullResource as ex:
         if container.state not in (STATE_INITIAL, STATE_FAILED):
             logger.error(
@@ -79,7 +355,14 @@ def sync_container_state(container):
             container.date_last_status_update = timezone.now()
             container.state = STATE_FAILED
             container.container_id = ''
-            container.save()
+            container.save(
+                update_fields=[
+                    'state',
+                    'container_id',
+                    'date_last_status_update',
+                    'date_modified',
+                ]
+            )
     except docker.errors.NotFound as ex:
         # We mark it as failed. STATE_DELETED could also be an option,
         # but failed is more general. Besides, the container record in the db
@@ -88,58 +371,177 @@ def sync_container_state(container):
         container.date_last_status_update = timezone.now()
         container.state = STATE_FAILED
         container.container_id = ''
-        container.save()
+        container.save(
+            update_fields=[
+                'state',
+                'container_id',
+                'date_last_status_update',
+                'date_modified',
+            ]
+        )
+
+
+def sync_replica_states(docker_states):
+    """Update the states of the container replicas, which decide whether
+    the proxy balances requests to them.
+
+    :param docker_states: Dict from ``get_docker_states``, replicas without
+                          Docker container are marked as failed
+    """
+    for replica in ContainerReplica.objects.exclude(docker_id=''):
+        state = docker_states.get(replica.docker_id, STATE_FAILED)
+
+        if replica.state != state:
+            replica.state = state
+            replica.save(update_fields=['state'])
+
+
+@app.task(bind=True)
+def sync_container_state_task(_self, container_id):
+    """Task to synchronize the state of a container with Docker"""
+    container = Container.objects.filter(pk=container_id).first()
+
+    if container:
+        sync_container_state(container)
+
+
+def submit_container_state_sync(container):
+    """Submit a synchronization of the container state with Docker to the
+    interactive queue with the highest priority.
+
+    :param container: Container object
+    """
+    sync_container_state_task.apply_async(
+        args=[container.pk], queue=QUEUE_INTERACTIVE, priority=0
+    )
+
+
+def get_timeline_event(
+    project,
+    user,
+    event_name,
+    description,
+    status_type,
+    status_desc=None,
+    objects=(),
+):
+    """Return a timeline event for ``submit_timeline_events``.
+
+    :param project: Project object
+    :param user: User object or None
+    :param event_name: Event ID string
+    :param description: Description, may reference the object labels
+    :param status_type: Final status type of the event
+    :param status_desc: Final status description
+    :param objects: Tuples of object, label and name of referenced objects
+    :return: Dict that can be passed to a task
+    """
+    return {
+        'project': project.pk,
+        'user': user.pk if user else None,
+        'event_name': event_name,
+        'description': description,
+        'status_type': status_type,
+        'status_desc': status_desc,
+        'objects': [
+            {
+                'object_model': obj.__class__.__name__,
+                'object_uuid': str(obj.sodar_uuid),
+                'label': label,
+                'name': name,
+            }
+            for obj, label, name in objects
+        ],
+    }
+
+
+def submit_timeline_events(events, app_name=APP_NAME):
+    """Submit timeline events to be written in the background in one task
+    on the maintenance queue, after the current transaction is committed.
+
+    :param events: List of events from ``get_timeline_event``
+    :param app_name: Name of the app adding the events
+    """
+    if not events or not plugin_api.get_backend_api('timeline_backend'):
+        return
+
+    transaction.on_commit(
+        lambda: add_timeline_events_task.apply_async(
+            kwargs={'events': events, 'app_name': app_name},
+            queue=QUEUE_MAINTENANCE,
+        )
+    )
+
+
+@app.task(bind=True)
+def add_timeline_events_task(_self, events, app_name=APP_NAME):
+    """Task to write timeline events with their final status.
+
+    The object references of all events are inserted with ``bulk_create``.
+    Referenced objects may have been deleted in the meantime.
+    """
+    timeline = plugin_api.get_backend_api('timeline_backend')
+
+    if not timeline:
+        return
+
+    TimelineEventObjectRef = apps.get_model(
+        'timeline', 'TimelineEventObjectRef'
+    )
+    projects = Project.objects.in_bulk({e['project'] for e in events})
+    users = User.objects.in_bulk({e['user'] for e in events if e['user']})
+    refs = []
+
+    with transaction.atomic():
+        for event in events:
+            tl_event = timeline.add_event(
+                project=projects.get(event['project']),
+                app_name=app_name,
+                user=users.get(event['user']),
+                event_name=event['event_name'],
+                description=event['description'],
+                status_type=event['status_type'],
+                status_desc=event['status_desc'],
+            )
+            refs.extend(
+                TimelineEventObjectRef(event=tl_event, **obj)
+                for obj in event['objects']
+            )
+
+        TimelineEventObjectRef.objects.bulk_create(refs)
 
 
 @app.task(bind=True)
 def container_task(_self, job_id):
     """Task to change a container state"""
     job = ContainerBackgroundJob.objects.get(pk=job_id)
-    timeline = plugin_api.get_backend_api('timeline_backend')
     container = job.container
     user = job.bg_job.user
-    tl_event = None
     sync_container_state(container)
 
     cm = ContainerMachine(State(container.state), job=job)
+    acs = ActionSwitch(cm, job)
+    # The timeline event is written with its final status after the action
+    status_type, status_desc = 'OK', 'action succeeded'
 
-    if timeline:
-        tl_event = timeline.add_event(
-            project=job.project,
-            app_name=APP_NAME,
-            user=user,
-            event_name='container_task',
-            description='{action} container {container}',
-        )
-        tl_event.add_object(
-            obj=job.container,
-            label='container',
-            name=job.container.get_display_name(),
-        )
-        tl_event.add_object(
-            obj=job,
-            label='action',
-            name=job.action,
-        )
-
-    acs = ActionSwitch(cm, job, tl_event)
-
-    with job.marks():
+    # The log entries are written in bulk after every transition
+    with job.marks(), JobLogWriter(job) as log_writer:
         try:
             acs.do(job.action, job.container.state)
 
         except docker.errors.NotFound as e:
             logger.error(e)
+            status_type, status_desc = 'FAILED', 'action failed'
             job.add_log_entry(
                 f'Action failed: {job.action}', level=LOG_LEVEL_ERROR
             )
-            job.container.log_entries.create(
+            job.add_container_log_entry(
                 text=f'Action failed: {job.action}',
                 process=PROCESS_TASK,
                 user=user,
                 level=LOG_LEVEL_ERROR,
             )
-            job.container.log_entries.create(
+            job.add_container_log_entry(
                 text=e,
                 process=PROCESS_DOCKER,
                 date_docker_log=timezone.now(),
@@ -152,21 +554,29 @@ def container_task(_self, job_id):
                 job.container.container_id = ''
                 job.container.image_id = ''
                 job.container.state = STATE_FAILED
-                job.container.save()
+                job.container.save(
+                    update_fields=[
+                        'state',
+                        'container_id',
+                        'image_id',
+                        'date_modified',
+                    ]
+                )
 
         except docker.errors.DockerException as e:
             logger.error(e)
+            status_type, status_desc = 'FAILED', 'action failed'
             # Catch Docker-specific exceptions
             job.add_log_entry(
                 f'Action failed: {job.action}', level=LOG_LEVEL_ERROR
             )
-            container.log_entries.create(
+            job.add_container_log_entry(
                 text=f'Action failed: {job.action}',
                 process=PROCESS_TASK,
                 user=user,
                 level=LOG_LEVEL_ERROR,
             )
-            container.log_entries.create(
+            job.add_container_log_entry(
                 text=e,
                 process=PROCESS_DOCKER,
                 date_docker_log=timezone.now(),
@@ -177,14 +587,15 @@ def container_task(_self, job_id):
             with transaction.atomic():
                 container.refresh_from_db()
                 container.state = STATE_FAILED
-                container.save(force_update=True)
+                container.save(update_fields=['state', 'date_modified'])
 
         except statemachine.exceptions.StateMachineError as e:
             logger.error(e)
+            status_type, status_desc = 'FAILED', 'action failed'
             job.add_log_entry(
                 f'Action failed: {job.action}', level=LOG_LEVEL_ERROR
             )
-            container.log_entries.create(
+            job.add_container_log_entry(
                 text=f'Action failed: {job.action} ({e})',
                 process=PROCESS_TASK,
                 user=user,
@@ -193,33 +604,43 @@ def container_task(_self, job_id):
 
         except ContainerActionLock.CoolDown as e:
             logger.warning(e)
+            status_type, status_desc = 'FAILED', 'cool-down active'
             job.add_log_entry(
                 f'Action not performed: {job.action} (cool-down)',
                 level=LOG_LEVEL_WARNING,
             )
-            container.log_entries.create(
+            job.add_container_log_entry(
                 text=f'Action not performed: {job.action}. Cool-down is active ({settings.KIOSC_DOCKER_ACTION_MIN_DELAY}s)',
                 process=PROCESS_TASK,
                 user=user,
                 level=LOG_LEVEL_WARNING,
             )
 
+        except QuotaExceeded as e:
+            logger.warning(e)
+            status_type, status_desc = 'FAILED', 'quota exceeded'
+            job.add_log_entry(
+                f'Action not performed: {job.action} (quota exceeded)',
+                level=LOG_LEVEL_WARNING,
+            )
+            job.add_container_log_entry(
+                text=f'Action not performed: {job.action}. {e}',
+                process=PROCESS_TASK,
+                user=user,
+                level=LOG_LEVEL_WARNING,
+            )
+
         except Exception as e:
             logger.error(e)
+            status_type, status_desc = 'FAILED', 'action failed'
             # Catch all exceptions that are not coming from Docker
             job.add_log_entry(
                 f'Action failed: {job.action}', level=LOG_LEVEL_ERROR
             )
 
-            for line in traceback.format_exc().split('\n'):
-                container.log_entries.create(
-                    text=line,
-                    process=PROCESS_TASK,
-                    user=user,
-                    level=LOG_LEVEL_DEBUG,
-                )
+            log_writer.add_traceback(user=user)
 
-            container.log_entries.create(
+            job.add_container_log_entry(
                 text='Action failed: {}{}'.format(
                     job.action, f' ({str(e)})' if str(e) else ''
                 ),
@@ -231,4 +652,135 @@ def container_task(_self, job_id):
             with transaction.atomic():
                 container.refresh_from_db()
                 container.state = STATE_FAILED
-                container.save(force_update=True)
+                container.save(update_fields=['state', 'date_modified'])
+
+    submit_timeline_events(
+        [
+            get_timeline_event(
+                project=job.project,
+                user=user,
+                event_name='container_task',
+                description='{action} container {container}',
+                status_type=status_type,
+                status_desc=status_desc,
+                objects=[
+                    (container, 'container', container.get_display_name()),
+                    (job, 'action', job.action),
+                ],
+            )
+        ]
+    )
+
+
+@app.task(bind=True)
+def container_jobs_task(_self, job_ids):
+    """Run a chunk of the jobs of a bulk action one after another.
+
+    The jobs of a chunk run sequentially on purpose: the number of chunks
+    limits how many jobs of a bulk action run at once, so a large action
+    does not occupy every worker of the bulk queue and the Docker daemon.
+    A failed job is logged and does not stop the rest of the chunk.
+
+    :param job_ids: List of ``ContainerBackgroundJob`` IDs
+    """
+    for job_id in job_ids:
+        try:
+            container_task(job_id=job_id)
+
+        except Exception as e:
+            logger.error('Job %s failed: %s', job_id, e)
+
+
+@app.task(bind=True)
+def delete_batch_containers_task(_self, batch_id):
+    """Remove the containers deleted by a bulk delete action from the
+    database.
+
+    :param batch_id: ``ContainerBatchJob`` ID
+    """
+    batch = ContainerBatchJob.objects.get(pk=batch_id)
+    containers = Container.objects.filter(
+        containerbackgroundjob__batch=batch,
+        state__in=(STATE_INITIAL, STATE_DELETED),
+    ).distinct()
+    tl_events = []
+
+    for container in containers:
+        tl_events.append(
+            get_timeline_event(
+                project=container.project,
+                user=batch.user,
+                event_name='delete_container',
+                description=f'deleted {container.get_display_name()}',
+                status_type='OK',
+            )
+        )
+        container.delete()
+
+    submit_timeline_events(tl_events)
+
+
+@app.task(bind=True)
+def teardown_containers_task(self, container_ids):
+    """Force-remove Docker containers, e.g. of a deleted project.
+
+    Progress is reported in the task state while the containers are removed.
+
+    :param container_ids: List of Docker container IDs
+    :return: Number of removed Docker containers
+    """
+    cli = connect_docker()
+    removed = 0
+
+    for i, container_id in enumerate(container_ids):
+        try:
+            cli.remove_container(container_id, force=True)
+            removed += 1
+
+        except docker.errors.NotFound:
+            removed += 1
+
+        except docker.errors.DockerException as e:
+            logger.error('%s: Failed to remove container: %s', container_id, e)
+
+        if not self.request.is_eager:
+            self.update_state(
+                state='PROGRESS',
+                meta={'done': i + 1, 'total': len(container_ids)},
+            )
+
+    return removed
+
+
+@app.task(bind=True)
+def teardown_containers_done_task(_self, results, name, total):
+    """Log the summary of a container teardown."""
+    removed = sum(results)
+    log = logger.info if removed == total else logger.warning
+    log('%s: Removed %d of %d Docker containers', name, removed, total)
+    return removed
+
+
+def submit_containers_teardown(container_ids, name):
+    """Remove Docker containers in parallel in the background.
+
+    The containers are split into at most ``KIOSC_TEARDOWN_CONCURRENCY``
+    chunks, which are removed by a group of tasks on the bulk queue. A final
+    task logs the summary.
+
+    :param container_ids: List of Docker container IDs
+    :param name: Name of the teardown used in the log
+    :return: ``AsyncResult`` of the summary task or ``None``
+    """
+    if not container_ids:
+        return None
+
+    n = settings.KIOSC_TEARDOWN_CONCURRENCY
+    header = [
+        teardown_containers_task.si(container_ids[i::n]).set(queue=QUEUE_BULK)
+        for i in range(min(n, len(container_ids)))
+    ]
+    body = teardown_containers_done_task.s(name, len(container_ids)).set(
+        queue=QUEUE_BULK
+    )
+    return chord(header)(body)
@@ -13,6 +13,7 @@ from containers.models import (
     ACTION_UNPAUSE,
     ACTION_RESTART,
 )
+from containers.rules import get_container_perms as _get_container_perms
 
 
 register = template.Library()
@@ -55,6 +56,20 @@ def pretty_json(obj):
     return json.dumps(obj, indent=4, sort_keys=True)
 
 
-@register.inclusion_tag('containers/_container_controls.html')
-def container_controls(container, user, display=False):
-    return {'container': container, 'user': user, 'display': display}
+@register.simple_tag(takes_context=True)
+def get_container_perms(context, project):
+    return _get_container_perms(context['request'], project)
+
+
+@register.inclusion_tag(
+    'containers/_container_controls.html', takes_context=True
+)
+def container_controls(context, container, user, display=False):
+    return {
+        'container': container,
+        'user': user,
+        'display': display,
+        'container_perms': _get_container_perms(
+            context['request'], container.project
+        ),
+    }
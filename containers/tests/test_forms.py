@@ -1,7 +1,8 @@
 """Tests for the ``forms`` module."""
 
 from containers.forms import ContainerForm
-from containers.models import MASKED_KEYWORD
+from containers.models import ContainerReplica, HostPortBlock, MASKED_KEYWORD
+from containers.tests.factories import ContainerFactory
 from containers.tests.helpers import TestBase
 
 from django.test import override_settings
@@ -21,6 +22,7 @@ class TestContainerForm(TestBase):
             'timeout': 60,
             'project': self.project,
             'max_retries': 10,
+            'replicas': 1,
             'inactivity_threshold': 20,
         }
         self.form_data_min_mode_host = {
@@ -94,7 +96,62 @@ class TestContainerForm(TestBase):
         key = 'host_port'
         self.form_data_min_mode_host.pop(key)
         form = ContainerForm(self.form_data_min_mode_host)
-        self.assertEqual(form.errors[key], ['This field is required.'])
+        self.assertNotIn(key, form.errors)
+
+    @override_settings(
+        KIOSC_NETWORK_MODE='host',
+        KIOSC_HOST_PORT_MIN=10000,
+        KIOSC_HOST_PORT_MAX=10000,
+    )
+    def test_missing_field_host_port_range_exhausted(self):
+        key = 'host_port'
+        ContainerFactory(project=self.project, host_port=10000)
+        self.form_data_min_mode_host.pop(key)
+        form = ContainerForm(self.form_data_min_mode_host)
+        self.assertEqual(
+            form.errors[key], ['No free host port left, please specify one']
+        )
+
+    @override_settings(
+        KIOSC_NETWORK_MODE='host',
+        KIOSC_HOST_PORT_MIN=10000,
+        KIOSC_HOST_PORT_MAX=10000,
+    )
+    def test_cleared_field_host_port_range_exhausted(self):
+        key = 'host_port'
+        container = ContainerFactory(project=self.project, host_port=10000)
+        self.form_data_min_mode_host.pop(key)
+        form = ContainerForm(self.form_data_min_mode_host, instance=container)
+        self.assertNotIn(key, form.errors)
+
+    @override_settings(KIOSC_NETWORK_MODE='host')
+    def test_host_port_used_by_replica(self):
+        container = ContainerFactory(project=self.project, host_port=9000)
+        ContainerReplica.objects.create(
+            container=container, index=1, host_port=8000
+        )
+        form = ContainerForm(self.form_data_min_mode_host)
+        self.assertEqual(
+            form.errors['host_port'], ['Host port is already in use']
+        )
+
+    @override_settings(
+        KIOSC_NETWORK_MODE='host',
+        KIOSC_HOST_PORT_MIN=8000,
+        KIOSC_HOST_PORT_MAX=8099,
+    )
+    def test_host_port_allocated(self):
+        HostPortBlock.objects.allocate()
+        form = ContainerForm(self.form_data_min_mode_host)
+        self.assertEqual(
+            form.errors['host_port'], ['Host port is already in use']
+        )
+
+    @override_settings(KIOSC_NETWORK_MODE='host')
+    def test_host_port_unchanged(self):
+        container = ContainerFactory(project=self.project, host_port=8000)
+        form = ContainerForm(self.form_data_min_mode_host, instance=container)
+        self.assertNotIn('host_port', form.errors)
 
     @override_settings(KIOSC_NETWORK_MODE='host')
     def test_missing_field_title(self):
@@ -0,0 +1,77 @@
+"""Tests for the buffered log writer."""
+
+from bgjobs.models import BackgroundJobLogEntry
+
+from containers.logwriter import JobLogWriter
+from containers.models import ContainerLogEntry, LOG_LEVEL_ERROR
+from containers.tests.factories import ContainerBackgroundJobFactory
+from containers.tests.helpers import TestBase
+
+
+class TestJobLogWriter(TestBase):
+    """Tests for ``JobLogWriter``."""
+
+    def setUp(self):
+        super().setUp()
+        self.job = ContainerBackgroundJobFactory(
+            project=self.project, user=self.superuser
+        )
+        self.container = self.job.container
+
+    def _count(self):
+        return (
+            BackgroundJobLogEntry.objects.filter(job=self.job.bg_job).count(),
+            ContainerLogEntry.objects.filter(container=self.container).count(),
+        )
+
+    def test_unbuffered(self):
+        self.job.add_log_entry('Job entry')
+        self.job.add_container_log_entry(text='Container entry')
+        self.assertEqual(self._count(), (1, 1))
+
+    def test_flush_on_exit(self):
+        with JobLogWriter(self.job, flush_interval=60):
+            self.job.add_log_entry('Job entry')
+            self.job.add_container_log_entry(text='Container entry')
+            self.assertEqual(self._count(), (0, 0))
+
+        self.assertEqual(self._count(), (1, 1))
+        self.assertIsNone(self.job.log_writer)
+
+    def test_flush_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with JobLogWriter(self.job, flush_interval=60):
+                self.job.add_container_log_entry(text='Container entry')
+                raise RuntimeError('Failure')
+
+        self.assertEqual(self._count(), (0, 1))
+
+    def test_flush_max_entries(self):
+        with JobLogWriter(self.job, flush_interval=60, max_entries=2):
+            self.job.add_container_log_entry(text='Entry 1')
+            self.assertEqual(self._count(), (0, 0))
+            self.job.add_log_entry('Entry 2')
+            self.assertEqual(self._count(), (1, 1))
+
+    def test_date_created(self):
+        with JobLogWriter(self.job, flush_interval=60):
+            self.job.add_container_log_entry(text='Entry 1')
+            self.job.add_container_log_entry(text='Entry 2')
+
+        entries = ContainerLogEntry.objects.merge_order(
+            container=self.container
+        )
+        self.assertEqual([e.text for e in entries], ['Entry 1', 'Entry 2'])
+
+    def test_add_traceback(self):
+        with JobLogWriter(self.job) as log_writer:
+            try:
+                raise RuntimeError('Failure')
+
+            except RuntimeError:
+                log_writer.add_traceback(user=self.superuser)
+
+        entry = ContainerLogEntry.objects.get(container=self.container)
+        self.assertIn('Traceback', entry.text)
+        self.assertIn('RuntimeError: Failure', entry.text)
+        self.assertNotEqual(entry.level, LOG_LEVEL_ERROR)
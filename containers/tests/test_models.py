@@ -2,12 +2,15 @@
 
 import json
 from datetime import timedelta
+from unittest.mock import patch
 
+from django.conf import settings
 from django.db import IntegrityError
 from django.forms import model_to_dict
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.timezone import localtime
+from projectroles.constants import SODAR_CONSTANTS
 from django.test import override_settings, TransactionTestCase
 
 import containers
@@ -20,9 +23,16 @@ from containers.models import (
     PROCESS_OBJECT,
     ACTION_START,
     ContainerActionLock,
+    ContainerReplica,
+    HostPortBlock,
     MASKED_KEYWORD,
+    ProjectContainerStats,
+    STATE_EXITED,
+    STATE_RUNNING,
 )
+from containers.tasks import submit_container_jobs, sync_container_state
 from containers.tests.factories import (
+    ContainerBackgroundJobFactory,
     ContainerLogEntryFactory,
     ProjectFactory,
     ContainerFactory,
@@ -59,7 +69,7 @@ class TestContainerModel(TestBase):
             'containertemplatesite': None,
             'containertemplateproject': None,
             'heartbeat_url': None,
-            'host_port': None,
+            'host_port': settings.KIOSC_HOST_PORT_MIN,
             'environment': None,
             'environment_secret_keys': None,
             'image_id': None,
@@ -69,6 +79,18 @@ class TestContainerModel(TestBase):
             'sodar_uuid': container.sodar_uuid,
             'max_retries': container.max_retries,
             'inactivity_threshold': container.inactivity_threshold,
+            'inactivity_pause_threshold': None,
+            'inactivity_delete_threshold': None,
+            'cpu_limit': None,
+            'memory_limit': None,
+            'pids_limit': None,
+            'replicas': 1,
+            'schedule_start': None,
+            'schedule_stop': None,
+            'crash_count': 0,
+            'date_last_crash': None,
+            'parked': False,
+            'last_job': None,
         }
         self.assertEqual(model_to_dict(container), expected)
 
@@ -91,7 +113,7 @@ class TestContainerModel(TestBase):
             'containertemplatesite': None,
             'containertemplateproject': None,
             'heartbeat_url': None,
-            'host_port': None,
+            'host_port': settings.KIOSC_HOST_PORT_MIN,
             'environment_secret_keys': None,
             'image_id': None,
             'date_last_status_update': None,
@@ -100,6 +122,18 @@ class TestContainerModel(TestBase):
             'sodar_uuid': container.sodar_uuid,
             'max_retries': container.max_retries,
             'inactivity_threshold': container.inactivity_threshold,
+            'inactivity_pause_threshold': None,
+            'inactivity_delete_threshold': None,
+            'cpu_limit': None,
+            'memory_limit': None,
+            'pids_limit': None,
+            'replicas': 1,
+            'schedule_start': None,
+            'schedule_stop': None,
+            'crash_count': 0,
+            'date_last_crash': None,
+            'parked': False,
+            'last_job': None,
         }
         self.assertEqual(model_to_dict(container), expected)
 
@@ -116,7 +150,7 @@ class TestContainerModel(TestBase):
             'containertemplatesite': self.containertemplatesite1.id,
             'containertemplateproject': None,
             'heartbeat_url': None,
-            'host_port': None,
+            'host_port': settings.KIOSC_HOST_PORT_MIN,
             'environment': None,
             'environment_secret_keys': None,
             'image_id': None,
@@ -126,6 +160,18 @@ class TestContainerModel(TestBase):
             'sodar_uuid': container.sodar_uuid,
             'max_retries': container.max_retries,
             'inactivity_threshold': container.inactivity_threshold,
+            'inactivity_pause_threshold': None,
+            'inactivity_delete_threshold': None,
+            'cpu_limit': None,
+            'memory_limit': None,
+            'pids_limit': None,
+            'replicas': 1,
+            'schedule_start': None,
+            'schedule_stop': None,
+            'crash_count': 0,
+            'date_last_crash': None,
+            'parked': False,
+            'last_job': None,
         }
         self.assertEqual(model_to_dict(container), expected)
 
@@ -144,7 +190,7 @@ class TestContainerModel(TestBase):
             'containertemplatesite': None,
             'containertemplateproject': self.containertemplateproject1.id,
             'heartbeat_url': None,
-            'host_port': None,
+            'host_port': settings.KIOSC_HOST_PORT_MIN,
             'environment': None,
             'environment_secret_keys': None,
             'image_id': None,
@@ -154,6 +200,18 @@ class TestContainerModel(TestBase):
             'sodar_uuid': container.sodar_uuid,
             'max_retries': container.max_retries,
             'inactivity_threshold': container.inactivity_threshold,
+            'inactivity_pause_threshold': None,
+            'inactivity_delete_threshold': None,
+            'cpu_limit': None,
+            'memory_limit': None,
+            'pids_limit': None,
+            'replicas': 1,
+            'schedule_start': None,
+            'schedule_stop': None,
+            'crash_count': 0,
+            'date_last_crash': None,
+            'parked': False,
+            'last_job': None,
         }
         self.assertEqual(model_to_dict(container), expected)
 
@@ -429,11 +487,11 @@ class TestContainerActionLock(TransactionTestCase):
         }
         self.assertEqual(model_to_dict(lock), expected)
 
-    def test_queryset(self):
-        lock = ContainerActionLock.objects.create(**self.data)
-        self.assertListEqual(
-            list(ContainerActionLock.objects.all()), list(lock.queryset())
-        )
+    def test_unique_container(self):
+        ContainerActionLock.objects.create(**self.data)
+
+        with self.assertRaises(IntegrityError):
+            ContainerActionLock.objects.create(**self.data)
 
     @override_settings(KIOSC_DOCKER_ACTION_MIN_DELAY=20)
     def test_is_locked_true(self):
@@ -446,20 +504,355 @@ class TestContainerActionLock(TransactionTestCase):
         self.assertFalse(lock.is_locked())
 
     @override_settings(KIOSC_DOCKER_ACTION_MIN_DELAY=10)
-    def test_lock_in_cooldown(self):
-        lock = ContainerActionLock.objects.create(**self.data)
+    def test_acquire_create(self):
+        ContainerActionLock.acquire(self.container, ACTION_START)
+        lock = ContainerActionLock.objects.get(container=self.container)
+        self.assertEqual(lock.action, ACTION_START)
+
+    @override_settings(KIOSC_DOCKER_ACTION_MIN_DELAY=10)
+    def test_acquire_in_cooldown(self):
+        ContainerActionLock.objects.create(**self.data)
 
         with self.assertRaises(containers.models.ContainerActionLock.CoolDown):
-            lock.lock('stop')
+            ContainerActionLock.acquire(self.container, 'stop')
+
+        self.assertEqual(
+            ContainerActionLock.objects.get(container=self.container).action,
+            ACTION_START,
+        )
 
     @override_settings(KIOSC_DOCKER_ACTION_MIN_DELAY=0)
-    def test_lock(self):
-        lock = ContainerActionLock.objects.create(**self.data)
-        lock.lock('stop')
-
-    # TODO Test the database locking (select_for_update)
-    # https://medium.com/@alexandre.laplante/djangos-select-for-update-with-examples-and-tests-caff09414766
-    # Somehow implementing that approach the other database is just empty.
-    # I guess I'm just too stupid to implement that.
-    # Note: Since Django 2.2 you have to define in this class:
-    # databases = "__all__"
+    def test_acquire(self):
+        ContainerActionLock.objects.create(**self.data)
+        ContainerActionLock.acquire(self.container, 'stop')
+        self.assertEqual(ContainerActionLock.objects.count(), 1)
+        self.assertEqual(
+            ContainerActionLock.objects.get(container=self.container).action,
+            'stop',
+        )
+
+
+class TestProjectContainerStats(TestBase):
+    """Tests for the ``ProjectContainerStats`` model."""
+
+    def setUp(self):
+        super().setUp()
+        self.category = ProjectFactory(
+            type=SODAR_CONSTANTS['PROJECT_TYPE_CATEGORY']
+        )
+        self.project.parent = self.category
+        self.project.save()
+
+    def _get_counts(self, project):
+        return dict(
+            ProjectContainerStats.objects.filter(
+                project=project, count__gt=0
+            ).values_list('state', 'count')
+        )
+
+    def test_create_container(self):
+        ContainerFactory(project=self.project)
+        ContainerFactory(project=self.project)
+
+        self.assertEqual(self._get_counts(self.project), {STATE_INITIAL: 2})
+        self.assertEqual(self._get_counts(self.category), {STATE_INITIAL: 2})
+
+    def test_change_state(self):
+        container = ContainerFactory(project=self.project)
+        container.state = STATE_RUNNING
+        container.save()
+
+        self.assertEqual(self._get_counts(self.project), {STATE_RUNNING: 1})
+        self.assertEqual(self._get_counts(self.category), {STATE_RUNNING: 1})
+
+    def test_save_without_state(self):
+        container = ContainerFactory(project=self.project)
+        container.state = STATE_RUNNING
+        container.save(update_fields=['description'])
+
+        self.assertEqual(self._get_counts(self.project), {STATE_INITIAL: 1})
+
+    def test_save_stale_state(self):
+        container = ContainerFactory(project=self.project)
+        stale = Container.objects.get(pk=container.pk)
+        container.state = STATE_RUNNING
+        container.save()
+
+        stale.description = 'Changed'
+        stale.save()
+
+        container.refresh_from_db()
+        self.assertEqual(container.state, STATE_INITIAL)
+        self.assertEqual(self._get_counts(self.project), {STATE_INITIAL: 1})
+
+    def test_delete_container(self):
+        container = ContainerFactory(project=self.project)
+        container.delete()
+
+        self.assertEqual(self._get_counts(self.project), {})
+        self.assertEqual(self._get_counts(self.category), {})
+
+    def test_rebuild(self):
+        ContainerFactory(project=self.project)
+        ProjectContainerStats.objects.all().delete()
+
+        ProjectContainerStats.objects.rebuild()
+
+        self.assertEqual(self._get_counts(self.project), {STATE_INITIAL: 1})
+        self.assertEqual(self._get_counts(self.category), {STATE_INITIAL: 1})
+
+    def test_move_project(self):
+        top = ProjectFactory(type=SODAR_CONSTANTS['PROJECT_TYPE_CATEGORY'])
+        self.category.parent = top
+        self.category.save()
+        other = ProjectFactory(
+            type=SODAR_CONSTANTS['PROJECT_TYPE_CATEGORY'], parent=top
+        )
+        ContainerFactory(project=self.project)
+        ContainerFactory(project=self.project, state=STATE_RUNNING)
+
+        self.project.parent = other
+        self.project.save()
+        ProjectContainerStats.objects.move_project(self.project, self.category)
+
+        expected = {STATE_INITIAL: 1, STATE_RUNNING: 1}
+        self.assertEqual(self._get_counts(self.project), expected)
+        self.assertEqual(self._get_counts(self.category), {})
+        self.assertEqual(self._get_counts(other), expected)
+        self.assertEqual(self._get_counts(top), expected)
+
+    def test_move_project_to_top_level(self):
+        ContainerFactory(project=self.project)
+
+        self.project.parent = None
+        self.project.save()
+        ProjectContainerStats.objects.move_project(self.project, self.category)
+
+        self.assertEqual(self._get_counts(self.project), {STATE_INITIAL: 1})
+        self.assertEqual(self._get_counts(self.category), {})
+
+
+class TestContainerLastJob(TestBase):
+    """Tests for ``Container.last_job``."""
+
+    def setUp(self):
+        super().setUp()
+        self.container = ContainerFactory(project=self.project)
+
+    def test_create_job(self):
+        job1 = ContainerBackgroundJobFactory(
+            project=self.project, user=self.user, container=self.container
+        )
+        self.container.refresh_from_db()
+        self.assertEqual(self.container.last_job, job1)
+
+        job2 = ContainerBackgroundJobFactory(
+            project=self.project, user=self.user, container=self.container
+        )
+        self.container.refresh_from_db()
+        self.assertEqual(self.container.last_job, job2)
+
+    @patch('docker.api.client.APIClient.inspect_container')
+    def test_sync_stale_container(self, inspect_container):
+        inspect_container.return_value = {'State': {'Status': STATE_RUNNING}}
+        job = ContainerBackgroundJobFactory(
+            project=self.project, user=self.user, container=self.container
+        )
+        sync_container_state(self.container)
+
+        self.container.refresh_from_db()
+        self.assertEqual(self.container.last_job, job)
+        self.assertEqual(self.container.state, STATE_RUNNING)
+
+    @patch('containers.tasks.container_task.run')
+    def test_submit_container_jobs(self, container_task):
+        batch = submit_container_jobs(
+            self.project,
+            Container.objects.filter(pk=self.container.pk),
+            ACTION_START,
+            self.user,
+            'Start container',
+            'Start',
+        )
+
+        self.container.refresh_from_db()
+        self.assertEqual(self.container.last_job, batch.jobs.get())
+
+
+@override_settings(
+    KIOSC_NETWORK_MODE='host',
+    KIOSC_HOST_PORT_MIN=10000,
+    KIOSC_HOST_PORT_MAX=10199,
+)
+class TestHostPortBlock(TestBase):
+    """Tests for the ``HostPortBlock`` model."""
+
+    def _create(self, **kwargs):
+        return ContainerFactory(project=self.project, host_port=None, **kwargs)
+
+    def test_allocate(self):
+        container1 = self._create()
+        container2 = self._create()
+
+        self.assertEqual(container1.host_port, 10000)
+        self.assertEqual(container2.host_port, 10001)
+        # 10000 to 10199 lies in four blocks of 63 ports
+        self.assertEqual(HostPortBlock.objects.count(), 4)
+
+    def test_allocate_skip_assigned(self):
+        ContainerFactory(project=self.project, host_port=10000)
+        self.assertEqual(self._create().host_port, 10001)
+
+    def test_allocate_manual(self):
+        self._create()
+        ContainerFactory(project=self.project, host_port=10001)
+        self.assertEqual(self._create().host_port, 10002)
+
+    def test_allocate_mode_docker_shared(self):
+        with self.settings(KIOSC_NETWORK_MODE='docker-shared'):
+            self.assertIsNone(self._create().host_port)
+
+    def test_release_on_delete(self):
+        container = self._create()
+        self._create()
+        container.delete()
+        self.assertEqual(self._create().host_port, 10000)
+
+    def test_release_on_change(self):
+        container = self._create()
+        container.host_port = 8080
+        container.save()
+        self.assertEqual(self._create().host_port, 10000)
+
+    def test_allocate_on_clear(self):
+        container = ContainerFactory(project=self.project, host_port=8080)
+        container.host_port = None
+        container.save()
+
+        container.refresh_from_db()
+        self.assertEqual(container.host_port, 10000)
+        self.assertEqual(self._create().host_port, 10001)
+
+    def test_allocate_on_clear_range_exhausted(self):
+        with self.settings(KIOSC_HOST_PORT_MAX=10000):
+            container = self._create()
+            container.host_port = None
+            container.save()
+            self.assertEqual(container.host_port, 10000)
+
+    def test_range_exhausted(self):
+        with self.settings(
+            KIOSC_HOST_PORT_MIN=10060, KIOSC_HOST_PORT_MAX=10064
+        ):
+            ports = [self._create().host_port for _ in range(5)]
+            self.assertEqual(ports, list(range(10060, 10065)))
+            self.assertFalse(HostPortBlock.objects.has_free_port())
+
+            with self.assertRaises(HostPortBlock.RangeExhausted):
+                self._create()
+
+    def test_extend_range(self):
+        with self.settings(KIOSC_HOST_PORT_MAX=10000):
+            self._create()
+
+        ContainerFactory(project=self.project, host_port=10100)
+        ports = [self._create().host_port for _ in range(100)]
+        self.assertNotIn(10100, ports)
+        self.assertEqual(self._create().host_port, 10102)
+
+    def test_release_replica(self):
+        container = self._create()
+        replica = ContainerReplica.objects.create(
+            container=container,
+            index=1,
+            host_port=HostPortBlock.objects.allocate(),
+        )
+        self.assertEqual(replica.host_port, 10001)
+        replica.delete()
+        self.assertEqual(self._create().host_port, 10001)
+
+    def test_reserve_used(self):
+        self._create()
+
+        with self.assertRaises(HostPortBlock.PortInUse):
+            HostPortBlock.objects.reserve(10000)
+
+    def test_reserve_manual_replica_port(self):
+        container = self._create()
+        ContainerReplica.objects.create(
+            container=container,
+            index=1,
+            host_port=HostPortBlock.objects.allocate(),
+        )
+
+        with self.assertRaises(HostPortBlock.PortInUse):
+            ContainerFactory(project=self.project, host_port=10001)
+
+    def test_is_used(self):
+        container = self._create()
+        ContainerReplica.objects.create(
+            container=container, index=1, host_port=9001
+        )
+        HostPortBlock.objects.allocate()
+
+        self.assertTrue(HostPortBlock.objects.is_used(10000))
+        self.assertTrue(HostPortBlock.objects.is_used(10001))
+        self.assertTrue(HostPortBlock.objects.is_used(9001))
+        self.assertFalse(HostPortBlock.objects.is_used(10002))
+
+
+class TestContainerReplica(TestBase):
+    """Tests for the replica selection of ``Container``."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_one_container()
+        self.container1.replicas = 3
+        self.container1.state = STATE_RUNNING
+        self.container1.save()
+
+        for index, state in ((1, STATE_RUNNING), (2, STATE_INITIAL)):
+            ContainerReplica.objects.create(
+                container=self.container1,
+                index=index,
+                docker_id=f'replica{index}',
+                host_port=9000 + index,
+                state=state,
+            )
+
+    @override_settings(KIOSC_NETWORK_MODE='host')
+    def test_get_replica_addresses_mode_host(self):
+        self.assertEqual(
+            self.container1.get_replica_addresses(),
+            {
+                0: ('localhost', self.container1.host_port),
+                1: ('localhost', 9001),
+            },
+        )
+
+    @override_settings(KIOSC_NETWORK_MODE='docker-shared')
+    def test_get_replica_addresses_mode_docker_shared(self):
+        self.assertEqual(
+            self.container1.get_replica_addresses(),
+            {
+                0: (self.container1.container_id[:12], 80),
+                1: ('replica1', 80),
+            },
+        )
+
+    def test_get_replica_addresses_single(self):
+        self.container1.replicas = 1
+        self.assertEqual(list(self.container1.get_replica_addresses()), [0])
+
+    def test_select_replica_sticky(self):
+        for _ in range(10):
+            self.assertEqual(self.container1.select_replica('1')[0], 1)
+
+    def test_select_replica_not_running(self):
+        for sticky in ('2', 'invalid', None):
+            self.assertIn(self.container1.select_replica(sticky)[0], (0, 1))
+
+    def test_select_replica_stopped(self):
+        self.container1.replicas = 1
+        self.container1.state = STATE_EXITED
+        self.assertEqual(self.container1.select_replica(), (None, None))
@@ -103,6 +103,24 @@ class TestContainerPermissions(ProjectPermissionTestBase):
         self.assert_response(url, good_users, 200)
         self.assert_response(url, bad_users, 302)
 
+    @patch('containers.tasks.sync_container_state_task.apply_async')
+    def test_container_refresh_state(self, apply_async):
+        """Test permissions for the ``ajax-refresh-state`` view."""
+        url = reverse(
+            'containers:ajax-refresh-state',
+            kwargs={'container': self.container.sodar_uuid},
+        )
+        good_users = [
+            self.superuser,
+            self.user_owner,
+            self.user_delegate,
+            self.user_contributor,
+            self.user_guest,
+        ]
+        bad_users = [self.user_no_roles, self.anonymous, self.user_finder_cat]
+        self.assert_response(url, good_users, 200)
+        self.assert_response(url, bad_users, 302)
+
     def test_container_delete(self):
         """Test permissions for the ``delete`` view."""
         url = reverse(
@@ -143,15 +161,16 @@ class TestContainerPermissions(ProjectPermissionTestBase):
             self.anonymous,
             self.user_finder_cat,
         ]
-        self.assert_response(
-            url,
-            good_users,
-            302,
-            redirect_user=reverse(
-                'containers:detail',
-                kwargs={'container': self.container.sodar_uuid},
-            ),
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assert_response(
+                url,
+                good_users,
+                302,
+                redirect_user=reverse(
+                    'containers:detail',
+                    kwargs={'container': self.container.sodar_uuid},
+                ),
+            )
         self.assert_response(url, bad_users, 302)
         mock.assert_called()
 
@@ -174,15 +193,16 @@ class TestContainerPermissions(ProjectPermissionTestBase):
             self.anonymous,
             self.user_finder_cat,
         ]
-        self.assert_response(
-            url,
-            good_users,
-            302,
-            redirect_user=reverse(
-                'containers:detail',
-                kwargs={'container': self.container.sodar_uuid},
-            ),
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assert_response(
+                url,
+                good_users,
+                302,
+                redirect_user=reverse(
+                    'containers:detail',
+                    kwargs={'container': self.container.sodar_uuid},
+                ),
+            )
         self.assert_response(url, bad_users, 302)
         mock.assert_called()
 
@@ -205,15 +225,16 @@ class TestContainerPermissions(ProjectPermissionTestBase):
             self.anonymous,
             self.user_finder_cat,
         ]
-        self.assert_response(
-            url,
-            good_users,
-            302,
-            redirect_user=reverse(
-                'containers:detail',
-                kwargs={'container': self.container.sodar_uuid},
-            ),
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assert_response(
+                url,
+                good_users,
+                302,
+                redirect_user=reverse(
+                    'containers:detail',
+                    kwargs={'container': self.container.sodar_uuid},
+                ),
+            )
         self.assert_response(url, bad_users, 302)
         mock.assert_called()
 
@@ -236,15 +257,16 @@ class TestContainerPermissions(ProjectPermissionTestBase):
             self.anonymous,
             self.user_finder_cat,
         ]
-        self.assert_response(
-            url,
-            good_users,
-            302,
-            redirect_user=reverse(
-                'containers:detail',
-                kwargs={'container': self.container.sodar_uuid},
-            ),
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assert_response(
+                url,
+                good_users,
+                302,
+                redirect_user=reverse(
+                    'containers:detail',
+                    kwargs={'container': self.container.sodar_uuid},
+                ),
+            )
         self.assert_response(url, bad_users, 302)
         mock.assert_called()
 
@@ -267,15 +289,16 @@ class TestContainerPermissions(ProjectPermissionTestBase):
             self.anonymous,
             self.user_finder_cat,
         ]
-        self.assert_response(
-            url,
-            good_users,
-            302,
-            redirect_user=reverse(
-                'containers:detail',
-                kwargs={'container': self.container.sodar_uuid},
-            ),
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assert_response(
+                url,
+                good_users,
+                302,
+                redirect_user=reverse(
+                    'containers:detail',
+                    kwargs={'container': self.container.sodar_uuid},
+                ),
+            )
         self.assert_response(url, bad_users, 302)
         mock.assert_called()
 
@@ -442,15 +465,16 @@ class TestContainerPermissionReadOnly(ProjectPermissionTestBase):
             'containers:start',
             kwargs={'container': self.container.sodar_uuid},
         )
-        self.assert_response(
-            url,
-            self.good_users,
-            302,
-            redirect_user=reverse(
-                'containers:detail',
-                kwargs={'container': self.container.sodar_uuid},
-            ),
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assert_response(
+                url,
+                self.good_users,
+                302,
+                redirect_user=reverse(
+                    'containers:detail',
+                    kwargs={'container': self.container.sodar_uuid},
+                ),
+            )
         self.assert_response(url, self.bad_users, 302)
         mock.assert_called()
 
@@ -461,15 +485,16 @@ class TestContainerPermissionReadOnly(ProjectPermissionTestBase):
             'containers:stop',
             kwargs={'container': self.container.sodar_uuid},
         )
-        self.assert_response(
-            url,
-            self.good_users,
-            302,
-            redirect_user=reverse(
-                'containers:detail',
-                kwargs={'container': self.container.sodar_uuid},
-            ),
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assert_response(
+                url,
+                self.good_users,
+                302,
+                redirect_user=reverse(
+                    'containers:detail',
+                    kwargs={'container': self.container.sodar_uuid},
+                ),
+            )
         self.assert_response(url, self.bad_users, 302)
         mock.assert_called()
 
@@ -480,15 +505,16 @@ class TestContainerPermissionReadOnly(ProjectPermissionTestBase):
             'containers:restart',
             kwargs={'container': self.container.sodar_uuid},
         )
-        self.assert_response(
-            url,
-            self.good_users,
-            302,
-            redirect_user=reverse(
-                'containers:detail',
-                kwargs={'container': self.container.sodar_uuid},
-            ),
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assert_response(
+                url,
+                self.good_users,
+                302,
+                redirect_user=reverse(
+                    'containers:detail',
+                    kwargs={'container': self.container.sodar_uuid},
+                ),
+            )
         self.assert_response(url, self.bad_users, 302)
         mock.assert_called()
 
@@ -499,15 +525,16 @@ class TestContainerPermissionReadOnly(ProjectPermissionTestBase):
             'containers:pause',
             kwargs={'container': self.container.sodar_uuid},
         )
-        self.assert_response(
-            url,
-            self.good_users,
-            302,
-            redirect_user=reverse(
-                'containers:detail',
-                kwargs={'container': self.container.sodar_uuid},
-            ),
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assert_response(
+                url,
+                self.good_users,
+                302,
+                redirect_user=reverse(
+                    'containers:detail',
+                    kwargs={'container': self.container.sodar_uuid},
+                ),
+            )
         self.assert_response(url, self.bad_users, 302)
         mock.assert_called()
 
@@ -518,15 +545,16 @@ class TestContainerPermissionReadOnly(ProjectPermissionTestBase):
             'containers:unpause',
             kwargs={'container': self.container.sodar_uuid},
         )
-        self.assert_response(
-            url,
-            self.good_users,
-            302,
-            redirect_user=reverse(
-                'containers:detail',
-                kwargs={'container': self.container.sodar_uuid},
-            ),
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assert_response(
+                url,
+                self.good_users,
+                302,
+                redirect_user=reverse(
+                    'containers:detail',
+                    kwargs={'container': self.container.sodar_uuid},
+                ),
+            )
         self.assert_response(url, self.bad_users, 302)
         mock.assert_called()
 
@@ -178,7 +178,10 @@ class TestContainerAPIPermissions(ProjectAPIPermissionTestBase):
             self.user_contributor,
         ]
         bad_users = [self.user_guest, self.user_no_roles, self.user_finder_cat]
-        self.assert_response_api(url, good_users, status.HTTP_200_OK, knox=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assert_response_api(
+                url, good_users, status.HTTP_200_OK, knox=True
+            )
         self.assert_response_api(
             url, bad_users, status.HTTP_403_FORBIDDEN, knox=True
         )
@@ -201,7 +204,10 @@ class TestContainerAPIPermissions(ProjectAPIPermissionTestBase):
             self.user_contributor,
         ]
         bad_users = [self.user_guest, self.user_no_roles, self.user_finder_cat]
-        self.assert_response_api(url, good_users, status.HTTP_200_OK, knox=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assert_response_api(
+                url, good_users, status.HTTP_200_OK, knox=True
+            )
         self.assert_response_api(
             url, bad_users, status.HTTP_403_FORBIDDEN, knox=True
         )
@@ -209,3 +215,45 @@ class TestContainerAPIPermissions(ProjectAPIPermissionTestBase):
             url, self.anonymous, status.HTTP_401_UNAUTHORIZED
         )
         mock.assert_called()
+
+    @patch('containers.tasks.container_task.run')
+    def test_container_bulk(self, mock):
+        """Test permissions for the ``api-bulk`` view."""
+        url = reverse(
+            'containers:api-bulk',
+            kwargs={'project': self.project.sodar_uuid},
+        )
+        data = {
+            'action': 'start',
+            'containers': [str(self.container.sodar_uuid)],
+        }
+        good_users = [
+            self.superuser,
+            self.user_owner,
+            self.user_delegate,
+            self.user_contributor,
+        ]
+        bad_users = [self.user_guest, self.user_no_roles, self.user_finder_cat]
+        self.assert_response_api(
+            url,
+            good_users,
+            status.HTTP_202_ACCEPTED,
+            method='POST',
+            data=data,
+            knox=True,
+        )
+        self.assert_response_api(
+            url,
+            bad_users,
+            status.HTTP_403_FORBIDDEN,
+            method='POST',
+            data=data,
+            knox=True,
+        )
+        self.assert_response_api(
+            url,
+            self.anonymous,
+            status.HTTP_401_UNAUTHORIZED,
+            method='POST',
+            data=data,
+        )
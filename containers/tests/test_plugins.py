@@ -1,12 +1,24 @@
 """Tests for the plugin methods."""
 
-from unittest.mock import patch
+from unittest.mock import call, patch
 
 from django.test import override_settings
 from django.urls import reverse
 
-from containers.models import Container, ContainerBackgroundJob
+from projectroles.constants import SODAR_CONSTANTS
+from projectroles.plugins import ProjectAppPluginPoint
+
+from containers.models import (
+    Container,
+    ContainerBackgroundJob,
+    ContainerReplica,
+    ProjectContainerStats,
+    STATE_EXITED,
+    STATE_RUNNING,
+)
+from containers.tests.factories import ContainerFactory, ProjectFactory
 from containers.tests.helpers import TestBase
+from containers.views import project_list_counts
 
 
 class TestProjectrolesModifyAPI(TestBase):
@@ -15,8 +27,14 @@ class TestProjectrolesModifyAPI(TestBase):
     def setUp(self):
         super().setUp()
         self.create_two_containers()
+        self.container2.container_id = 'zyxwvutsrqponmlkjihgfedcba'
+        self.container2.replicas = 2
+        self.container2.save()
+        ContainerReplica.objects.create(
+            container=self.container2, index=1, docker_id='replica'
+        )
 
-    @patch('containers.statemachines.ActionSwitch._delete')
+    @patch('docker.api.client.APIClient.remove_container')
     @override_settings(PROJECTROLES_ENABLE_MODIFY_API=True)
     def test_project_delete(self, mock):
         """Test that containers belonging to a project are deleted with it"""
@@ -40,9 +58,16 @@ class TestProjectrolesModifyAPI(TestBase):
             ContainerBackgroundJob.objects.filter(project=self.project).count(),
             0,
         )
-        mock.assert_called()
+        mock.assert_has_calls(
+            [
+                call(self.container1.container_id, force=True),
+                call(self.container2.container_id, force=True),
+                call('replica', force=True),
+            ],
+            any_order=True,
+        )
 
-    @patch('containers.statemachines.ActionSwitch._delete')
+    @patch('docker.api.client.APIClient.remove_container')
     @override_settings(PROJECTROLES_ENABLE_MODIFY_API=False)
     def test_project_delete_disabled(self, mock):
         """Test that containers belonging to a project are NOT deleted"""
@@ -67,3 +92,112 @@ class TestProjectrolesModifyAPI(TestBase):
             0,
         )
         mock.assert_not_called()
+
+
+class TestGetProjectListValue(TestBase):
+    """Tests for ``get_project_list_value``."""
+
+    def setUp(self):
+        super().setUp()
+        self.plugin = ProjectAppPluginPoint.get_plugin('containers')
+        self.project2 = ProjectFactory()
+
+    def test_get_project_list_value_no_containers(self):
+        self.assertEqual(
+            self.plugin.get_project_list_value(
+                'containers', self.project, self.user
+            ),
+            '0',
+        )
+
+    def test_get_project_list_value(self):
+        self.create_two_containers()
+        self.container1.state = STATE_RUNNING
+        self.container1.save()
+        self.container2.state = STATE_EXITED
+        self.container2.save()
+
+        self.assertEqual(
+            self.plugin.get_project_list_value(
+                'containers', self.project, self.user
+            ),
+            '1 running,</br>1 failed',
+        )
+
+    def test_get_project_list_value_listed_counts(self):
+        self.create_two_containers()
+        token = project_list_counts.set(
+            ProjectContainerStats.objects.get_counts([self.project2])
+        )
+
+        try:
+            with self.assertNumQueries(0):
+                self.assertEqual(
+                    self.plugin.get_project_list_value(
+                        'containers', self.project, self.user
+                    ),
+                    '0',
+                )
+
+        finally:
+            project_list_counts.reset(token)
+
+    def test_project_list_columns_view(self):
+        self.create_two_containers()
+        ContainerFactory(project=self.project2)
+
+        with self.login(self.superuser):
+            response = self.client.post(
+                reverse('projectroles:ajax_project_list_columns'),
+                {'projects': [str(self.project.sodar_uuid)]},
+                content_type='application/json',
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()[str(self.project.sodar_uuid)]['containers'][
+                'containers'
+            ],
+            {'html': '2 stopped'},
+        )
+        self.assertIsNone(project_list_counts.get())
+
+    def test_get_project_list_value_unknown_column(self):
+        with self.assertRaises(ValueError):
+            self.plugin.get_project_list_value(
+                'unknown', self.project, self.user
+            )
+
+
+class TestGetCategoryStats(TestBase):
+    """Tests for ``get_category_stats``."""
+
+    def setUp(self):
+        super().setUp()
+        self.plugin = ProjectAppPluginPoint.get_plugin('containers')
+        self.category = ProjectFactory(
+            type=SODAR_CONSTANTS['PROJECT_TYPE_CATEGORY']
+        )
+        self.project.parent = self.category
+        self.project.save()
+
+    def test_get_category_stats(self):
+        self.create_two_containers()
+        self.container1.state = STATE_RUNNING
+        self.container1.save()
+
+        with self.assertNumQueries(1):
+            stats = self.plugin.get_category_stats(self.category)
+
+        self.assertEqual(
+            [(s.title, s.value) for s in stats],
+            [('Containers Initial', 1), ('Containers Running', 1)],
+        )
+
+    def test_get_statistics(self):
+        self.create_two_containers()
+        ContainerFactory(project=ProjectFactory())
+
+        self.assertEqual(
+            self.plugin.get_statistics()['container_count']['value'], 3
+        )
@@ -0,0 +1,174 @@
+"""Tests for the container admission control."""
+
+from django.test import override_settings
+from projectroles.app_settings import AppSettingAPI
+
+from containers.models import (
+    ACTION_START,
+    Container,
+    ContainerActionJournal,
+    STATE_RUNNING,
+    STATE_PAUSED,
+    STATE_PULLING,
+    STATE_EXITED,
+)
+from containers.quotas import (
+    QuotaExceeded,
+    check_quotas,
+    get_usage,
+    lock_admission,
+)
+from containers.tests.factories import (
+    ContainerBackgroundJobFactory,
+    ContainerFactory,
+    ProjectFactory,
+)
+from containers.tests.helpers import TestBase
+
+
+app_settings = AppSettingAPI()
+
+
+class TestGetUsage(TestBase):
+    """Tests for ``get_usage``."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_two_containers()
+
+    def test_no_active_containers(self):
+        usage = get_usage(Container.objects.all())
+        self.assertEqual(usage, {'containers': 0, 'cpu': 0, 'memory': 0})
+
+    def test_active_containers(self):
+        self.container1.state = STATE_RUNNING
+        self.container1.cpu_limit = 1.5
+        self.container1.memory_limit = 512
+        self.container1.save()
+        self.container2.state = STATE_PAUSED
+        self.container2.cpu_limit = 0.5
+        self.container2.save()
+        ContainerFactory(
+            project=self.project, state=STATE_EXITED, memory_limit=1024
+        )
+
+        usage = get_usage(Container.objects.all())
+        self.assertEqual(usage, {'containers': 2, 'cpu': 2, 'memory': 512})
+
+    def test_replicas(self):
+        self.container1.state = STATE_RUNNING
+        self.container1.cpu_limit = 0.5
+        self.container1.memory_limit = 512
+        self.container1.replicas = 3
+        self.container1.save()
+
+        usage = get_usage(Container.objects.all())
+        self.assertEqual(usage, {'containers': 1, 'cpu': 1.5, 'memory': 1536})
+
+    def test_starting_containers(self):
+        self.container1.state = STATE_PULLING
+        self.container1.cpu_limit = 1
+        self.container1.save()
+        self.container2.state = STATE_EXITED
+        self.container2.cpu_limit = 0.5
+        self.container2.save()
+        job = ContainerBackgroundJobFactory(
+            user=self.superuser,
+            project=self.project,
+            container=self.container2,
+            action=ACTION_START,
+        )
+        ContainerActionJournal.objects.create(
+            container=self.container2,
+            job=job,
+            action=ACTION_START,
+            state_before=STATE_EXITED,
+            state=STATE_EXITED,
+        )
+
+        usage = get_usage(Container.objects.all())
+        self.assertEqual(usage, {'containers': 2, 'cpu': 1.5, 'memory': 0})
+
+
+class TestCheckQuotas(TestBase):
+    """Tests for ``check_quotas``."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_two_containers()
+        self.container1.state = STATE_RUNNING
+        self.container1.cpu_limit = 1
+        self.container1.memory_limit = 1024
+        self.container1.save()
+        self.container2.cpu_limit = 1
+        self.container2.memory_limit = 1024
+        self.container2.save()
+
+    def test_no_quotas(self):
+        check_quotas(self.container2)
+
+    @override_settings(KIOSC_SITE_MAX_RUNNING_CONTAINERS=2)
+    def test_lock_admission(self):
+        lock_admission(self.project)
+        check_quotas(self.container2)
+
+    def test_project_containers_exceeded(self):
+        app_settings.set(
+            'containers', 'quota_containers', 1, project=self.project
+        )
+
+        with self.assertRaises(QuotaExceeded):
+            check_quotas(self.container2)
+
+    def test_project_containers_not_exceeded(self):
+        app_settings.set(
+            'containers', 'quota_containers', 2, project=self.project
+        )
+        check_quotas(self.container2)
+
+    def test_project_containers_other_project(self):
+        app_settings.set(
+            'containers', 'quota_containers', 1, project=self.project
+        )
+        self.container1.project = ProjectFactory()
+        self.container1.save()
+        check_quotas(self.container2)
+
+    def test_project_cpu_exceeded(self):
+        app_settings.set('containers', 'quota_cpu', 1, project=self.project)
+
+        with self.assertRaises(QuotaExceeded):
+            check_quotas(self.container2)
+
+    def test_project_cpu_no_limit(self):
+        app_settings.set('containers', 'quota_cpu', 4, project=self.project)
+        self.container2.cpu_limit = None
+        self.container2.save()
+
+        with self.assertRaises(QuotaExceeded):
+            check_quotas(self.container2)
+
+    def test_project_memory_exceeded(self):
+        app_settings.set(
+            'containers', 'quota_memory', 1536, project=self.project
+        )
+
+        with self.assertRaises(QuotaExceeded):
+            check_quotas(self.container2)
+
+    @override_settings(KIOSC_SITE_MAX_RUNNING_CONTAINERS=1)
+    def test_site_containers_exceeded(self):
+        self.container1.project = ProjectFactory()
+        self.container1.save()
+
+        with self.assertRaises(QuotaExceeded):
+            check_quotas(self.container2)
+
+    @override_settings(KIOSC_SITE_MAX_CPU=2, KIOSC_SITE_MAX_MEMORY=2048)
+    def test_site_not_exceeded(self):
+        check_quotas(self.container2)
+
+    @override_settings(KIOSC_SITE_MAX_MEMORY=2000)
+    def test_site_memory_exceeded(self):
+        with self.assertRaises(QuotaExceeded):
+            check_quotas(self.container2)
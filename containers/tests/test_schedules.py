@@ -0,0 +1,100 @@
+"""Tests for the container schedules."""
+
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from django.core.exceptions import ValidationError
+from test_plus.test import TestCase
+
+from containers.schedules import (
+    get_last_due,
+    is_due,
+    parse_schedule,
+    validate_schedule,
+)
+
+
+#: Monday, 8:00 in the configured time zone.
+MONDAY_8AM = datetime(2024, 1, 1, 8, 0, tzinfo=ZoneInfo('Europe/Berlin'))
+#: Sunday, 8:00 in the configured time zone.
+SUNDAY_8AM = datetime(2024, 1, 7, 8, 0, tzinfo=ZoneInfo('Europe/Berlin'))
+
+
+class TestParseSchedule(TestCase):
+    """Tests for ``parse_schedule`` and ``validate_schedule``."""
+
+    def test_parse(self):
+        schedule = parse_schedule('0 8 * * 1-5')
+        self.assertEqual(schedule.minute, {0})
+        self.assertEqual(schedule.hour, {8})
+        self.assertEqual(schedule.day_of_week, {1, 2, 3, 4, 5})
+
+    def test_parse_wrong_number_of_fields(self):
+        with self.assertRaises(ValueError):
+            parse_schedule('0 8 * *')
+
+    def test_parse_invalid_value(self):
+        with self.assertRaises(ValueError):
+            parse_schedule('0 25 * * *')
+
+    def test_validate(self):
+        validate_schedule('*/15 9-17 * * mon-fri')
+
+        with self.assertRaises(ValidationError):
+            validate_schedule('every morning')
+
+
+class TestIsDue(TestCase):
+    """Tests for ``is_due``."""
+
+    def test_due(self):
+        self.assertTrue(is_due('0 8 * * 1-5', MONDAY_8AM))
+
+    def test_not_due_minute(self):
+        self.assertFalse(is_due('30 8 * * 1-5', MONDAY_8AM))
+
+    def test_not_due_weekday(self):
+        self.assertFalse(is_due('0 8 * * 1-5', SUNDAY_8AM))
+
+    def test_due_sunday(self):
+        self.assertTrue(is_due('0 8 * * 0', SUNDAY_8AM))
+
+    def test_empty(self):
+        self.assertFalse(is_due('', MONDAY_8AM))
+        self.assertFalse(is_due(None, MONDAY_8AM))
+
+    def test_invalid(self):
+        self.assertFalse(is_due('every morning', MONDAY_8AM))
+
+
+class TestGetLastDue(TestCase):
+    """Tests for ``get_last_due``."""
+
+    def test_due_now(self):
+        self.assertEqual(
+            get_last_due(
+                '0 8 * * *', MONDAY_8AM - timedelta(minutes=1), MONDAY_8AM
+            ),
+            MONDAY_8AM,
+        )
+
+    def test_missed(self):
+        now = MONDAY_8AM + timedelta(minutes=5, seconds=30)
+        self.assertEqual(
+            get_last_due('0 8 * * *', now - timedelta(minutes=10), now),
+            MONDAY_8AM,
+        )
+
+    def test_before_since(self):
+        now = MONDAY_8AM + timedelta(minutes=5)
+        self.assertIsNone(get_last_due('0 8 * * *', MONDAY_8AM, now))
+
+    def test_last_of_several(self):
+        now = MONDAY_8AM + timedelta(minutes=20)
+        self.assertEqual(
+            get_last_due('*/15 * * * *', MONDAY_8AM - timedelta(hours=1), now),
+            MONDAY_8AM + timedelta(minutes=15),
+        )
+
+    def test_empty(self):
+        self.assertIsNone(get_last_due('', MONDAY_8AM, MONDAY_8AM))
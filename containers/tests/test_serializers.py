@@ -1,7 +1,9 @@
 from test_plus.test import TestCase
 from django.test import override_settings
 
+from containers.models import ContainerReplica
 from containers.serializers import ContainerSerializer
+from containers.tests.factories import ContainerFactory
 
 
 class TestContainerSerializer(TestCase):
@@ -25,6 +27,13 @@ class TestContainerSerializer(TestCase):
             'command': None,
             'containertemplatesite': None,
             'containertemplateproject': None,
+            'inactivity_pause_threshold': None,
+            'inactivity_delete_threshold': None,
+            'cpu_limit': None,
+            'memory_limit': None,
+            'pids_limit': None,
+            'schedule_start': None,
+            'schedule_stop': None,
             'description': None,
         }
         serializer = ContainerSerializer(data=data)
@@ -32,16 +41,46 @@ class TestContainerSerializer(TestCase):
         self.assertEqual(serializer.data, expected)
 
     @override_settings(KIOSC_NETWORK_MODE='host')
-    def test_invalid_mode_host_missing_host_port(self):
+    def test_valid_mode_host_missing_host_port(self):
         data = {
             'title': 'some title',
             'repository': 'some repos',
             'tag': 'some tag',
         }
         serializer = ContainerSerializer(data=data)
+        self.assertTrue(serializer.is_valid())
+
+    @override_settings(
+        KIOSC_NETWORK_MODE='host',
+        KIOSC_HOST_PORT_MIN=10000,
+        KIOSC_HOST_PORT_MAX=10000,
+    )
+    def test_invalid_mode_host_range_exhausted(self):
+        ContainerFactory(host_port=10000)
+        data = {
+            'title': 'some title',
+            'repository': 'some repos',
+            'tag': 'some tag',
+        }
+        serializer = ContainerSerializer(data=data)
+        self.assertFalse(serializer.is_valid())
+        self.assertTrue('host_port' in serializer.errors)
+
+    @override_settings(KIOSC_NETWORK_MODE='host')
+    def test_invalid_mode_host_port_used_by_replica(self):
+        container = ContainerFactory(host_port=9000)
+        ContainerReplica.objects.create(
+            container=container, index=1, host_port=8080
+        )
+        data = {
+            'title': 'some title',
+            'repository': 'some repos',
+            'tag': 'some tag',
+            'host_port': 8080,
+        }
+        serializer = ContainerSerializer(data=data)
         self.assertFalse(serializer.is_valid())
         self.assertTrue('host_port' in serializer.errors)
-        self.assertEqual(serializer.errors['host_port'][0].code, 'required')
 
     @override_settings(KIOSC_NETWORK_MODE='host')
     def test_invalid_mode_host_missing_title(self):
@@ -100,6 +139,13 @@ class TestContainerSerializer(TestCase):
             'command': None,
             'containertemplatesite': None,
             'containertemplateproject': None,
+            'inactivity_pause_threshold': None,
+            'inactivity_delete_threshold': None,
+            'cpu_limit': None,
+            'memory_limit': None,
+            'pids_limit': None,
+            'schedule_start': None,
+            'schedule_stop': None,
             'description': None,
         }
         serializer = ContainerSerializer(data=data)
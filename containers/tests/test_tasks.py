@@ -4,11 +4,18 @@ import time
 from unittest.mock import patch, call
 
 import docker.errors
+from bgjobs.models import JOB_STATE_DONE, JOB_STATE_RUNNING
 from django.conf import settings
 from django.test import tag, override_settings
+from timeline.models import TimelineEvent
 
 from containers.models import (
     ACTION_STOP,
+    ContainerActionJournal,
+    ContainerBackgroundJob,
+    ContainerReplica,
+    HostPortBlock,
+    STATE_CREATED,
     STATE_EXITED,
     STATE_RUNNING,
     Container,
@@ -18,17 +25,353 @@ from containers.models import (
     STATE_PAUSED,
     ACTION_UNPAUSE,
     ACTION_DELETE,
+    ACTION_START,
     STATE_DELETED,
+    STATE_FAILED,
+)
+from containers.statemachines import (
+    connect_docker,
+    get_docker_labels,
+    ContainerMachine,
+    LABEL_REPLICA,
+)
+from containers.tasks import (
+    container_task,
+    get_container_task_options,
+    get_docker_states,
+    get_timeline_event,
+    submit_container_job,
+    submit_containers_teardown,
+    submit_timeline_events,
+    sync_container_state,
+    sync_replica_states,
+    State,
+)
+from containers.tests.factories import (
+    ContainerBackgroundJobFactory,
+    ContainerFactory,
 )
-from containers.statemachines import connect_docker
-from containers.tasks import container_task
-from containers.tests.factories import ContainerBackgroundJobFactory
 from containers.tests.helpers import (
     TestBase,
     DockerMock,
 )
 
 
+class TestGetContainerTaskOptions(TestBase):
+    """Tests for ``get_container_task_options``."""
+
+    def test_interactive(self):
+        self.assertEqual(
+            get_container_task_options(ACTION_STOP),
+            {'queue': 'interactive', 'priority': 0},
+        )
+        self.assertEqual(
+            get_container_task_options(ACTION_START),
+            {'queue': 'interactive', 'priority': 6},
+        )
+
+    def test_bulk(self):
+        self.assertEqual(
+            get_container_task_options(ACTION_DELETE, queue='bulk'),
+            {'queue': 'bulk', 'priority': 3},
+        )
+
+
+@patch('containers.tasks.container_task.apply_async')
+class TestSubmitContainerJob(TestBase):
+    """Tests for ``submit_container_job``."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_one_container()
+
+    def _submit(self, action=ACTION_START):
+        with self.captureOnCommitCallbacks(execute=True):
+            return submit_container_job(
+                self.container1, action, self.superuser, 'Job', countdown=0
+            )
+
+    def test_create(self, mock):
+        job, created = self._submit()
+
+        self.assertTrue(created)
+        self.assertEqual(job.action, ACTION_START)
+        self.assertEqual(job.container, self.container1)
+        self.assertEqual(ContainerBackgroundJob.objects.count(), 1)
+        mock.assert_called_once_with(
+            kwargs={'job_id': job.id},
+            countdown=0,
+            **get_container_task_options(ACTION_START),
+        )
+
+    def test_submit_on_commit(self, mock):
+        with self.captureOnCommitCallbacks() as callbacks:
+            submit_container_job(
+                self.container1,
+                ACTION_START,
+                self.superuser,
+                'Job',
+                countdown=0,
+            )
+
+        mock.assert_not_called()
+        callbacks[0]()
+        mock.assert_called_once()
+
+    def test_coalesce_pending(self, mock):
+        job1, _ = self._submit()
+        job2, created = self._submit()
+
+        self.assertFalse(created)
+        self.assertEqual(job1, job2)
+        self.assertEqual(ContainerBackgroundJob.objects.count(), 1)
+        self.assertEqual(mock.call_count, 1)
+
+    def test_coalesce_running(self, mock):
+        job1, _ = self._submit()
+        job1.bg_job.status = JOB_STATE_RUNNING
+        job1.bg_job.save()
+
+        self.assertEqual(self._submit(), (job1, False))
+
+    def test_no_coalesce_running_restart(self, mock):
+        job1, _ = self._submit(ACTION_RESTART)
+        job1.bg_job.status = JOB_STATE_RUNNING
+        job1.bg_job.save()
+        _, created = self._submit(ACTION_RESTART)
+
+        self.assertTrue(created)
+        self.assertEqual(mock.call_count, 2)
+
+    def test_no_coalesce_done(self, mock):
+        job1, _ = self._submit()
+        job1.bg_job.status = JOB_STATE_DONE
+        job1.bg_job.save()
+
+        self.assertTrue(self._submit()[1])
+
+    def test_no_coalesce_other_action(self, mock):
+        self._submit()
+
+        self.assertTrue(self._submit(ACTION_STOP)[1])
+
+    @override_settings(KIOSC_JOB_COALESCE_TIMEOUT=0)
+    def test_no_coalesce_stale(self, mock):
+        self._submit()
+
+        self.assertTrue(self._submit()[1])
+
+
+@patch('docker.api.client.APIClient.remove_container')
+class TestSubmitContainersTeardown(TestBase):
+    """Tests for ``submit_containers_teardown``."""
+
+    def test_teardown(self, remove_container):
+        remove_container.side_effect = [
+            None,
+            docker.errors.NotFound('x'),
+            docker.errors.APIError('x'),
+        ]
+
+        # Run
+        result = submit_containers_teardown(['a', 'b', 'c'], 'Test')
+
+        # Assert
+        self.assertEqual(result.get(), 2)
+        self.assertEqual(remove_container.call_count, 3)
+
+    def test_teardown_empty(self, remove_container):
+        self.assertIsNone(submit_containers_teardown([], 'Test'))
+        remove_container.assert_not_called()
+
+
+class TestGetDockerStates(TestBase):
+    """Tests for ``get_docker_states`` and ``sync_container_state``."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_two_containers()
+        self.container1.state = STATE_RUNNING
+        self.container1.save()
+        self.container2.container_id = 'legacy'
+        self.container2.state = STATE_RUNNING
+        self.container2.save()
+
+    @patch('docker.api.client.APIClient.inspect_container')
+    @patch('docker.api.client.APIClient.containers')
+    def test_labeled(self, containers, inspect_container):
+        containers.return_value = [
+            {'Id': self.container1.container_id, 'State': STATE_EXITED}
+        ]
+        inspect_container.return_value = DockerMock.inspect_container_started
+
+        # Run
+        states = get_docker_states(
+            connect_docker(), [self.container1, self.container2]
+        )
+
+        # Assert
+        self.assertEqual(
+            states,
+            {self.container1.container_id: STATE_EXITED, 'legacy': 'running'},
+        )
+        inspect_container.assert_called_once_with('legacy')
+
+    @patch('docker.api.client.APIClient.inspect_container')
+    @patch('docker.api.client.APIClient.containers')
+    def test_not_found(self, containers, inspect_container):
+        containers.return_value = []
+        inspect_container.side_effect = docker.errors.NotFound('x')
+
+        # Run
+        states = get_docker_states(connect_docker(), [self.container2])
+
+        # Assert
+        self.assertEqual(states, {})
+
+    @patch('docker.api.client.APIClient.inspect_container')
+    def test_sync_container_state(self, inspect_container):
+        # Run
+        sync_container_state(
+            self.container1, {self.container1.container_id: STATE_EXITED}
+        )
+        sync_container_state(self.container2, {})
+
+        # Assert
+        inspect_container.assert_not_called()
+        self.container1.refresh_from_db()
+        self.container2.refresh_from_db()
+        self.assertEqual(self.container1.state, STATE_EXITED)
+        self.assertEqual(self.container2.state, STATE_FAILED)
+
+    def test_sync_replica_states(self):
+        replica1 = ContainerReplica.objects.create(
+            container=self.container1, index=1, docker_id='replica1'
+        )
+        replica2 = ContainerReplica.objects.create(
+            container=self.container1,
+            index=2,
+            docker_id='replica2',
+            state=STATE_RUNNING,
+        )
+
+        # Run
+        sync_replica_states({'replica1': STATE_CREATED})
+
+        # Assert
+        replica1.refresh_from_db()
+        replica2.refresh_from_db()
+        self.assertEqual(replica1.state, STATE_CREATED)
+        self.assertEqual(replica2.state, STATE_FAILED)
+
+
+class TestSubmitTimelineEvents(TestBase):
+    """Tests for ``submit_timeline_events``."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_one_container()
+
+    def _submit(self):
+        submit_timeline_events(
+            [
+                get_timeline_event(
+                    project=self.project,
+                    user=self.user,
+                    event_name='container_task',
+                    description='{action} container {container}',
+                    status_type='OK',
+                    status_desc='action succeeded',
+                    objects=[
+                        (self.container1, 'container', self.container1.title)
+                    ],
+                )
+            ]
+        )
+
+    def test_submit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._submit()
+
+        event = TimelineEvent.objects.get(event_name='container_task')
+        self.assertEqual(event.project, self.project)
+        self.assertEqual(event.user, self.user)
+        self.assertEqual(event.get_status().status_type, 'OK')
+        self.assertEqual(
+            list(
+                event.event_objects.values_list('object_uuid', 'label', 'name')
+            ),
+            [(self.container1.sodar_uuid, 'container', self.container1.title)],
+        )
+
+    def test_submit_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self._submit()
+            self.assertFalse(TimelineEvent.objects.exists())
+
+        self.assertEqual(len(callbacks), 1)
+
+    def test_submit_deleted_object(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self._submit()
+
+        self.container1.delete()
+        callbacks[0]()
+
+        event = TimelineEvent.objects.get(event_name='container_task')
+        self.assertEqual(event.event_objects.count(), 1)
+
+
+@override_settings(
+    KIOSC_NETWORK_MODE='host',
+    KIOSC_HOST_PORT_MIN=10000,
+    KIOSC_HOST_PORT_MAX=10099,
+)
+class TestCreateReplicas(TestBase):
+    """Tests for ``ContainerMachine._create_replicas``."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_one_container()
+        self.container1.replicas = 3
+        self.container1.save()
+        bg_job = ContainerBackgroundJobFactory(
+            project=self.project, user=self.superuser, container=self.container1
+        )
+        self.cm = ContainerMachine(State(self.container1.state), job=bg_job)
+
+    @patch('containers.statemachines.ContainerMachine._create_docker_container')
+    def test_create(self, create_docker_container):
+        create_docker_container.side_effect = [
+            {'Id': 'replica1'},
+            {'Id': 'replica2'},
+        ]
+        self.cm._create_replicas('image')
+
+        replicas = self.container1.replica_set.order_by('index')
+        self.assertEqual(
+            [(r.docker_id, r.host_port, r.state) for r in replicas],
+            [
+                ('replica1', 10000, STATE_CREATED),
+                ('replica2', 10001, STATE_CREATED),
+            ],
+        )
+
+    @patch('containers.statemachines.ContainerMachine._create_docker_container')
+    def test_create_failed(self, create_docker_container):
+        create_docker_container.side_effect = [
+            {'Id': 'replica1'},
+            docker.errors.APIError('failed'),
+        ]
+
+        with self.assertRaises(docker.errors.APIError):
+            self.cm._create_replicas('image')
+
+        self.assertEqual(self.container1.replica_set.count(), 1)
+        # The port of the failed replica is free again
+        self.assertEqual(HostPortBlock.objects.allocate(), 10001)
+
+
 class TestContainerTask(TestBase):
     """Tests for ``container_task``."""
 
@@ -42,6 +385,13 @@ class TestContainerTask(TestBase):
         )
         self.cli = connect_docker()
 
+    def _set_config_fingerprint(self):
+        cm = ContainerMachine(State(self.container1.state), job=self.bg_job)
+        self.container1.config_fingerprint = cm._get_config_fingerprint(
+            DockerMock.inspect_image.get('Id')
+        )
+        self.container1.save()
+
     @tag('docker-server')
     def tearDown(self):
         for container in Container.objects.all():
@@ -113,6 +463,7 @@ class TestContainerTask(TestBase):
             environment=environment,
             command=self.container1.command or None,
             ports=[self.container1.container_port],
+            labels=get_docker_labels(self.container1),
             host_config=None,
         )
         create_host_config.assert_called_once_with(
@@ -205,6 +556,7 @@ class TestContainerTask(TestBase):
             environment=environment,
             command=self.container1.command or None,
             ports=[self.container1.container_port],
+            labels=get_docker_labels(self.container1),
             host_config=None,
             networking_config={},
         )
@@ -235,6 +587,175 @@ class TestContainerTask(TestBase):
         unpause.assert_not_called()
         remove_container.assert_not_called()
 
+    @override_settings(KIOSC_NETWORK_MODE='host')
+    @patch('containers.tasks.sync_container_state')
+    @patch('docker.api.client.APIClient.start')
+    @patch('docker.api.client.APIClient.pull')
+    @patch('docker.api.client.APIClient.images')
+    @patch('docker.api.client.APIClient.inspect_container')
+    @patch('docker.api.client.APIClient.inspect_image')
+    @patch('docker.api.client.APIClient.create_host_config')
+    @patch('docker.api.client.APIClient.create_container')
+    def test_start_resource_limits_mocked(
+        self,
+        create_container,
+        create_host_config,
+        inspect_image,
+        inspect_container,
+        images,
+        pull,
+        start,
+        sync_container_state,
+    ):
+        # Prepare
+        self.container1.cpu_limit = 1.5
+        self.container1.memory_limit = 512
+        self.container1.pids_limit = 100
+        self.container1.save()
+        images.return_value = []
+        pull.return_value = []
+        create_container.side_effect = [DockerMock.create_container]
+        create_host_config.side_effect = [DockerMock.create_host_config]
+        inspect_container.side_effect = [DockerMock.inspect_container_started]
+        inspect_image.side_effect = [DockerMock.inspect_image]
+
+        # Run
+        container_task(job_id=self.bg_job.pk)
+
+        # Assert objects
+        self.container1.refresh_from_db()
+        self.assertEqual(self.container1.state, STATE_RUNNING)
+
+        # Assert mocks
+        create_host_config.assert_called_once_with(
+            ulimits=[
+                {
+                    'Name': 'nofile',
+                    'Soft': settings.KIOSC_DOCKER_MAX_ULIMIT_NOFILE_SOFT,
+                    'Hard': settings.KIOSC_DOCKER_MAX_ULIMIT_NOFILE_HARD,
+                }
+            ],
+            port_bindings={
+                self.container1.container_port: self.container1.host_port
+            },
+            nano_cpus=1500000000,
+            mem_limit='512m',
+            pids_limit=100,
+        )
+        start.assert_called_once_with(self.container1.container_id)
+
+    @override_settings(
+        KIOSC_NETWORK_MODE='host',
+        KIOSC_HOST_PORT_MIN=10000,
+        KIOSC_HOST_PORT_MAX=10199,
+    )
+    @patch('containers.tasks.sync_container_state')
+    @patch('docker.api.client.APIClient.start')
+    @patch('docker.api.client.APIClient.pull')
+    @patch('docker.api.client.APIClient.images')
+    @patch('docker.api.client.APIClient.inspect_container')
+    @patch('docker.api.client.APIClient.inspect_image')
+    @patch('docker.api.client.APIClient.create_host_config')
+    @patch('docker.api.client.APIClient.create_container')
+    def test_start_replicas_mocked(
+        self,
+        create_container,
+        create_host_config,
+        inspect_image,
+        inspect_container,
+        images,
+        pull,
+        start,
+        sync_container_state,
+    ):
+        # Prepare
+        self.container1.replicas = 3
+        self.container1.save()
+        images.return_value = []
+        pull.return_value = []
+        create_container.side_effect = [
+            DockerMock.create_container,
+            {'Id': 'replica1'},
+            {'Id': 'replica2'},
+        ]
+        create_host_config.return_value = DockerMock.create_host_config
+        inspect_container.return_value = DockerMock.inspect_container_started
+        inspect_image.side_effect = [DockerMock.inspect_image]
+
+        # Run
+        container_task(job_id=self.bg_job.pk)
+
+        # Assert objects
+        self.container1.refresh_from_db()
+        self.assertEqual(self.container1.state, STATE_RUNNING)
+        replicas = list(self.container1.replica_set.all())
+        self.assertEqual(
+            [(r.index, r.docker_id, r.state) for r in replicas],
+            [(1, 'replica1', STATE_RUNNING), (2, 'replica2', STATE_RUNNING)],
+        )
+        self.assertEqual([r.host_port for r in replicas], [10000, 10001])
+
+        # Assert mocks
+        self.assertEqual(
+            create_container.call_args_list[2].kwargs['labels'][LABEL_REPLICA],
+            '2',
+        )
+        self.assertEqual(
+            create_host_config.call_args_list[1].kwargs['port_bindings'],
+            {self.container1.container_port: 10000},
+        )
+        self.assertEqual(
+            start.call_args_list,
+            [
+                call(self.container1.container_id),
+                call('replica1'),
+                call('replica2'),
+            ],
+        )
+
+    @override_settings(KIOSC_SITE_MAX_RUNNING_CONTAINERS=1)
+    @patch('containers.tasks.sync_container_state')
+    @patch('docker.api.client.APIClient.start')
+    @patch('docker.api.client.APIClient.pull')
+    @patch('docker.api.client.APIClient.images')
+    @patch('docker.api.client.APIClient.inspect_container')
+    @patch('docker.api.client.APIClient.inspect_image')
+    @patch('docker.api.client.APIClient.create_host_config')
+    @patch('docker.api.client.APIClient.create_container')
+    def test_start_quota_exceeded_mocked(
+        self,
+        create_container,
+        create_host_config,
+        inspect_image,
+        inspect_container,
+        images,
+        pull,
+        start,
+        sync_container_state,
+    ):
+        # Prepare
+        ContainerFactory(
+            project=self.project, state=STATE_RUNNING, container_id=None
+        )
+
+        # Run
+        container_task(job_id=self.bg_job.pk)
+
+        # Assert objects
+        self.container1.refresh_from_db()
+        self.assertEqual(self.container1.state, STATE_INITIAL)
+        self.assertTrue(
+            self.container1.log_entries.filter(
+                text__startswith='Action not performed: start'
+            ).exists()
+        )
+
+        # Assert mocks
+        images.assert_not_called()
+        pull.assert_not_called()
+        create_container.assert_not_called()
+        start.assert_not_called()
+
     @override_settings(KIOSC_DOCKER_ACTION_MIN_DELAY=10)
     @patch('containers.tasks.sync_container_state')
     @patch('docker.api.client.APIClient.remove_container')
@@ -308,6 +829,7 @@ class TestContainerTask(TestBase):
             environment=environment,
             command=self.container1.command or None,
             ports=[self.container1.container_port],
+            labels=get_docker_labels(self.container1),
             host_config=None,
         )
         create_host_config.assert_called_once_with(
@@ -412,6 +934,7 @@ class TestContainerTask(TestBase):
             environment=environment,
             command=self.container1.command or None,
             ports=[self.container1.container_port],
+            labels=get_docker_labels(self.container1),
             host_config=None,
         )
         create_host_config.assert_called_once_with(
@@ -505,6 +1028,33 @@ class TestContainerTask(TestBase):
         unpause.assert_not_called()
         remove_container.assert_not_called()
 
+    @patch('containers.tasks.sync_container_state')
+    @patch('docker.api.client.APIClient.stop')
+    @patch('docker.api.client.APIClient.inspect_container')
+    def test_stop_journal_mocked(
+        self, inspect_container, stop, sync_container_state
+    ):
+        # Prepare
+        self.bg_job.action = ACTION_STOP
+        self.bg_job.save()
+        self.container1.container_id = DockerMock.create_container.get('Id')
+        self.container1.state = STATE_RUNNING
+        self.container1.save()
+        inspect_container.side_effect = [DockerMock.inspect_container_stopped]
+        journal = []
+        stop.side_effect = lambda *args, **kwargs: journal.extend(
+            ContainerActionJournal.objects.values_list(
+                'action', 'state_before', 'transition'
+            )
+        )
+
+        # Run
+        container_task(job_id=self.bg_job.pk)
+
+        # Assert objects
+        self.assertEqual(journal, [(ACTION_STOP, STATE_RUNNING, '')])
+        self.assertEqual(ContainerActionJournal.objects.count(), 0)
+
     @patch('containers.tasks.sync_container_state')
     @patch('docker.api.client.APIClient.remove_container')
     @patch('docker.api.client.APIClient.unpause')
@@ -571,6 +1121,7 @@ class TestContainerTask(TestBase):
             environment=environment,
             command=self.container1.command or None,
             ports=[self.container1.container_port],
+            labels=get_docker_labels(self.container1),
             host_config=None,
         )
         create_host_config.assert_called_once_with(
@@ -605,6 +1156,224 @@ class TestContainerTask(TestBase):
             self.container1.container_id, force=True
         )
 
+    @patch('containers.tasks.sync_container_state')
+    @patch('docker.api.client.APIClient.remove_container')
+    @patch('docker.api.client.APIClient.restart')
+    @patch('docker.api.client.APIClient.stop')
+    @patch('docker.api.client.APIClient.start')
+    @patch('docker.api.client.APIClient.pull')
+    @patch('docker.api.client.APIClient.inspect_container')
+    @patch('docker.api.client.APIClient.inspect_image')
+    @patch('docker.api.client.APIClient.create_container')
+    def test_restart_config_unchanged_mocked(
+        self,
+        create_container,
+        inspect_image,
+        inspect_container,
+        pull,
+        start,
+        stop,
+        restart,
+        remove_container,
+        sync_container_state,
+    ):
+        # Prepare
+        self.bg_job.action = ACTION_RESTART
+        self.bg_job.save()
+        self.container1.image_id = DockerMock.inspect_image.get('Id')
+        self.container1.container_id = DockerMock.create_container.get('Id')
+        self.container1.state = STATE_RUNNING
+        self.container1.save()
+        self._set_config_fingerprint()
+        inspect_container.side_effect = [DockerMock.inspect_container_restarted]
+        inspect_image.side_effect = [DockerMock.inspect_image]
+
+        # Run
+        container_task(job_id=self.bg_job.pk)
+
+        # Assert objects
+        self.container1.refresh_from_db()
+        self.assertEqual(self.container1.state, STATE_RUNNING)
+
+        # Assert mocks
+        create_container.assert_not_called()
+        pull.assert_called_once_with(
+            repository=self.container1.repository,
+            tag=self.container1.tag,
+            stream=True,
+            decode=True,
+        )
+        inspect_image.assert_called_once_with(self.container1.get_repos_full())
+        restart.assert_called_once_with(self.container1.container_id)
+        start.assert_not_called()
+        stop.assert_not_called()
+        remove_container.assert_not_called()
+
+    @patch('containers.tasks.sync_container_state')
+    @patch('docker.api.client.APIClient.remove_container')
+    @patch('docker.api.client.APIClient.restart')
+    @patch('docker.api.client.APIClient.stop')
+    @patch('docker.api.client.APIClient.start')
+    @patch('docker.api.client.APIClient.pull')
+    @patch('docker.api.client.APIClient.inspect_container')
+    @patch('docker.api.client.APIClient.inspect_image')
+    @patch('docker.api.client.APIClient.create_container')
+    def test_restart_config_changed_mocked(
+        self,
+        create_container,
+        inspect_image,
+        inspect_container,
+        pull,
+        start,
+        stop,
+        restart,
+        remove_container,
+        sync_container_state,
+    ):
+        # Prepare
+        self.bg_job.action = ACTION_RESTART
+        self.bg_job.save()
+        self.container1.image_id = DockerMock.inspect_image.get('Id')
+        self.container1.container_id = DockerMock.create_container.get('Id')
+        self.container1.state = STATE_RUNNING
+        self.container1.save()
+        self._set_config_fingerprint()
+        self.container1.command = 'changed command'
+        self.container1.save()
+        create_container.side_effect = [DockerMock.create_container]
+        inspect_container.side_effect = [
+            DockerMock.inspect_container_stopped,
+            DockerMock.inspect_container_started,
+        ]
+        inspect_image.side_effect = [
+            DockerMock.inspect_image,
+            DockerMock.inspect_image,
+        ]
+
+        # Run
+        container_task(job_id=self.bg_job.pk)
+
+        # Assert objects
+        self.container1.refresh_from_db()
+        self.assertEqual(self.container1.state, STATE_RUNNING)
+        self.assertIsNotNone(self.container1.config_fingerprint)
+
+        # Assert mocks
+        create_container.assert_called_once()
+        restart.assert_not_called()
+        stop.assert_called_once_with(self.container1.container_id)
+        start.assert_called_once_with(self.container1.container_id)
+        remove_container.assert_called_once_with(
+            self.container1.container_id, force=True
+        )
+
+    @patch('containers.tasks.sync_container_state')
+    @patch('docker.api.client.APIClient.remove_container')
+    @patch('docker.api.client.APIClient.restart')
+    @patch('docker.api.client.APIClient.stop')
+    @patch('docker.api.client.APIClient.start')
+    @patch('docker.api.client.APIClient.images')
+    @patch('docker.api.client.APIClient.pull')
+    @patch('docker.api.client.APIClient.inspect_container')
+    @patch('docker.api.client.APIClient.inspect_image')
+    @patch('docker.api.client.APIClient.create_container')
+    def test_restart_image_updated_mocked(
+        self,
+        create_container,
+        inspect_image,
+        inspect_container,
+        pull,
+        images,
+        start,
+        stop,
+        restart,
+        remove_container,
+        sync_container_state,
+    ):
+        # Prepare
+        self.bg_job.action = ACTION_RESTART
+        self.bg_job.save()
+        self.container1.image_id = DockerMock.inspect_image.get('Id')
+        self.container1.container_id = DockerMock.create_container.get('Id')
+        self.container1.state = STATE_RUNNING
+        self.container1.save()
+        self._set_config_fingerprint()
+        updated_image = {**DockerMock.inspect_image, 'Id': 'sha256:updated'}
+        images.return_value = [{'RepoTags': [self.container1.get_repos_full()]}]
+        create_container.side_effect = [DockerMock.create_container]
+        inspect_container.side_effect = [
+            DockerMock.inspect_container_stopped,
+            DockerMock.inspect_container_started,
+        ]
+        inspect_image.side_effect = [updated_image, updated_image]
+
+        # Run
+        container_task(job_id=self.bg_job.pk)
+
+        # Assert objects
+        self.container1.refresh_from_db()
+        self.assertEqual(self.container1.state, STATE_RUNNING)
+        self.assertEqual(self.container1.image_id, 'sha256:updated')
+
+        # Assert mocks
+        pull.assert_called_once()
+        create_container.assert_called_once()
+        restart.assert_not_called()
+        stop.assert_called_once_with(self.container1.container_id)
+        start.assert_called_once_with(self.container1.container_id)
+
+    @patch('containers.tasks.sync_container_state')
+    @patch('docker.api.client.APIClient.remove_container')
+    @patch('docker.api.client.APIClient.restart')
+    @patch('docker.api.client.APIClient.stop')
+    @patch('docker.api.client.APIClient.start')
+    @patch('docker.api.client.APIClient.pull')
+    @patch('docker.api.client.APIClient.inspect_container')
+    @patch('docker.api.client.APIClient.inspect_image')
+    @patch('docker.api.client.APIClient.create_container')
+    def test_start_exited_config_unchanged_mocked(
+        self,
+        create_container,
+        inspect_image,
+        inspect_container,
+        pull,
+        start,
+        stop,
+        restart,
+        remove_container,
+        sync_container_state,
+    ):
+        # Prepare
+        self.bg_job.action = ACTION_START
+        self.bg_job.save()
+        self.container1.image_id = DockerMock.inspect_image.get('Id')
+        self.container1.container_id = DockerMock.create_container.get('Id')
+        self.container1.state = STATE_EXITED
+        self.container1.save()
+        self._set_config_fingerprint()
+        inspect_container.side_effect = [DockerMock.inspect_container_started]
+        inspect_image.side_effect = [DockerMock.inspect_image]
+
+        # Run
+        container_task(job_id=self.bg_job.pk)
+
+        # Assert objects
+        self.container1.refresh_from_db()
+        self.assertEqual(self.container1.state, STATE_RUNNING)
+
+        # Assert mocks
+        create_container.assert_not_called()
+        pull.assert_called_once_with(
+            repository=self.container1.repository,
+            tag=self.container1.tag,
+            stream=True,
+            decode=True,
+        )
+        start.assert_called_once_with(self.container1.container_id)
+        restart.assert_not_called()
+        stop.assert_not_called()
+        remove_container.assert_not_called()
+
     @patch('containers.tasks.sync_container_state')
     @patch('docker.api.client.APIClient.remove_container')
     @patch('docker.api.client.APIClient.unpause')
@@ -723,6 +1492,65 @@ class TestContainerTask(TestBase):
         unpause.assert_called_once_with(self.container1.container_id)
         remove_container.assert_not_called()
 
+    @patch('containers.tasks.sync_container_state')
+    @patch('docker.api.client.APIClient.remove_container')
+    @patch('docker.api.client.APIClient.unpause')
+    @patch('docker.api.client.APIClient.pause')
+    @patch('docker.api.client.APIClient.stop')
+    @patch('docker.api.client.APIClient.start')
+    @patch('docker.api.client.APIClient.pull')
+    @patch('docker.api.client.APIClient.inspect_container')
+    @patch('docker.api.client.APIClient.inspect_image')
+    @patch('docker.api.client.APIClient.create_host_config')
+    @patch('docker.api.client.APIClient.create_networking_config')
+    @patch('docker.api.client.APIClient.create_endpoint_config')
+    @patch('docker.api.client.APIClient.create_container')
+    def test_start_paused_mocked(
+        self,
+        create_container,
+        create_endpoint_config,
+        create_networking_config,
+        create_host_config,
+        inspect_image,
+        inspect_container,
+        pull,
+        start,
+        stop,
+        pause,
+        unpause,
+        remove_container,
+        sync_container_state,
+    ):
+        # Prepare
+        self.bg_job.action = ACTION_START
+        self.bg_job.save()
+        self.container1.image_id = DockerMock.inspect_image.get('Id')
+        self.container1.container_id = DockerMock.create_container.get('Id')
+        self.container1.state = STATE_PAUSED
+        self.container1.save()
+        inspect_container.side_effect = [DockerMock.inspect_container_started]
+
+        # Run
+        container_task(job_id=self.bg_job.pk)
+
+        # Assert objects
+        self.container1.refresh_from_db()
+        self.assertEqual(self.container1.state, STATE_RUNNING)
+
+        # Assert mocks
+        create_container.assert_not_called()
+        create_host_config.assert_not_called()
+        create_networking_config.assert_not_called()
+        create_endpoint_config.assert_not_called()
+        inspect_image.assert_not_called()
+        inspect_container.assert_called_once_with(self.container1.container_id)
+        pull.assert_not_called()
+        start.assert_not_called()
+        stop.assert_not_called()
+        pause.assert_not_called()
+        unpause.assert_called_once_with(self.container1.container_id)
+        remove_container.assert_not_called()
+
     @patch('containers.tasks.sync_container_state')
     @patch('docker.api.client.APIClient.remove_container')
     @patch('docker.api.client.APIClient.unpause')
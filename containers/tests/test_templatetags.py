@@ -1,7 +1,9 @@
 """Tests for the ``templatetags`` module."""
 
 import json
+from unittest.mock import patch
 
+from django.test import RequestFactory
 from test_plus.test import TestCase
 
 from containers.models import (
@@ -14,8 +16,11 @@ from containers.models import (
     ACTION_PAUSE,
     STATE_PULLING,
 )
+from containers.tests.helpers import TestBase
+from containers.rules import CONTAINER_PERMS
 from containers.templatetags.container_tags import (
     colorize_state,
+    get_container_perms,
     pretty_json,
     state_bell,
 )
@@ -99,3 +104,43 @@ class TestContainerTags(TestCase):
             state_bell(STATE_EXITED, ACTION_START),
             'Should be exited',
         )
+
+
+class TestGetContainerPerms(TestBase):
+    """Tests for ``get_container_perms``."""
+
+    def get_context(self, user):
+        request = RequestFactory().get('/')
+        request.user = user
+        return {'request': request}
+
+    def test_get_container_perms_owner(self):
+        perms = get_container_perms(self.get_context(self.user), self.project)
+        self.assertEqual(set(perms.keys()), set(CONTAINER_PERMS))
+        self.assertTrue(all(perms.values()))
+
+    def test_get_container_perms_no_role(self):
+        user = self.make_user('bob')
+        perms = get_container_perms(self.get_context(user), self.project)
+        self.assertFalse(any(perms.values()))
+
+    def test_get_container_perms_memoized(self):
+        context = self.get_context(self.user)
+
+        with patch.object(
+            self.user, 'has_perm', wraps=self.user.has_perm
+        ) as has_perm:
+            get_container_perms(context, self.project)
+            get_container_perms(context, self.project)
+
+        self.assertEqual(has_perm.call_count, len(CONTAINER_PERMS))
+
+    def test_get_container_perms_per_request(self):
+        get_container_perms(self.get_context(self.user), self.project)
+
+        with patch.object(
+            self.user, 'has_perm', wraps=self.user.has_perm
+        ) as has_perm:
+            get_container_perms(self.get_context(self.user), self.project)
+
+        self.assertEqual(has_perm.call_count, len(CONTAINER_PERMS))
@@ -14,6 +14,7 @@ from django.test import override_settings
 from containers.models import (
     Container,
     ContainerBackgroundJob,
+    ContainerReplica,
     ACTION_START,
     ACTION_STOP,
     ACTION_RESTART,
@@ -25,9 +26,11 @@ from containers.models import (
     MASKED_KEYWORD,
     PROCESS_DOCKER,
     ContainerLogEntry,
+    REPLICA_COOKIE,
     STATE_EXITED,
 )
 from containers.templatetags.container_tags import colorize_state
+from containers.tasks import get_container_task_options
 from containers.tests.factories import (
     ContainerBackgroundJobFactory,
     ContainerLogEntryFactory,
@@ -108,6 +111,7 @@ class TestContainerCreateView(TestBase):
             'timeout': 60,
             'project': self.project.pk,
             'max_retries': 10,
+            'replicas': 1,
             'inactivity_threshold': 20,
         }
         self.post_data_min_host = {
@@ -349,6 +353,7 @@ class TestContainerUpdateView(TestBase):
             'timeout': self.container1.timeout + 60,
             'project': self.project.pk,
             'max_retries': 12,
+            'replicas': 1,
             'inactivity_threshold': 20,
         }
         self.post_data_host = {
@@ -528,26 +533,27 @@ class TestContainerUpdateView(TestBase):
         self.container1.save()
 
         with self.login(self.superuser):
-            response = self.client.post(
-                reverse(
-                    'containers:update',
-                    kwargs={'container': self.container1.sodar_uuid},
-                ),
-                self.post_data_host,
-            )
-
-            # Get updated object
-            self.container1.refresh_from_db()
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse(
+                        'containers:update',
+                        kwargs={'container': self.container1.sodar_uuid},
+                    ),
+                    self.post_data_host,
+                )
 
-            self.assertRedirects(
-                response,
-                reverse(
-                    'containers:restart',
-                    kwargs={'container': self.container1.sodar_uuid},
-                ),
-                status_code=302,
-                target_status_code=302,
-            )
+                # Get updated object
+                self.container1.refresh_from_db()
+
+                self.assertRedirects(
+                    response,
+                    reverse(
+                        'containers:restart',
+                        kwargs={'container': self.container1.sodar_uuid},
+                    ),
+                    status_code=302,
+                    target_status_code=302,
+                )
 
             self.post_data_host['environment'] = json.loads(
                 self.post_data_host['environment']
@@ -566,7 +572,9 @@ class TestContainerUpdateView(TestBase):
 
             # Assert job call
             mock.assert_called_with(
-                kwargs={'job_id': bg_job.pk}, countdown=CELERY_SUBMIT_COUNTDOWN
+                kwargs={'job_id': bg_job.pk},
+                countdown=CELERY_SUBMIT_COUNTDOWN,
+                **get_container_task_options(bg_job.action),
             )
 
     @override_settings(KIOSC_NETWORK_MODE='docker-shared')
@@ -576,26 +584,27 @@ class TestContainerUpdateView(TestBase):
         self.container1.save()
 
         with self.login(self.superuser):
-            response = self.client.post(
-                reverse(
-                    'containers:update',
-                    kwargs={'container': self.container1.sodar_uuid},
-                ),
-                self.post_data_shared,
-            )
-
-            # Get updated object
-            self.container1.refresh_from_db()
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse(
+                        'containers:update',
+                        kwargs={'container': self.container1.sodar_uuid},
+                    ),
+                    self.post_data_shared,
+                )
 
-            self.assertRedirects(
-                response,
-                reverse(
-                    'containers:restart',
-                    kwargs={'container': self.container1.sodar_uuid},
-                ),
-                status_code=302,
-                target_status_code=302,
-            )
+                # Get updated object
+                self.container1.refresh_from_db()
+
+                self.assertRedirects(
+                    response,
+                    reverse(
+                        'containers:restart',
+                        kwargs={'container': self.container1.sodar_uuid},
+                    ),
+                    status_code=302,
+                    target_status_code=302,
+                )
 
             self.post_data_shared['environment'] = json.loads(
                 self.post_data_shared['environment']
@@ -614,7 +623,9 @@ class TestContainerUpdateView(TestBase):
 
             # Assert job call
             mock.assert_called_with(
-                kwargs={'job_id': bg_job.pk}, countdown=CELERY_SUBMIT_COUNTDOWN
+                kwargs={'job_id': bg_job.pk},
+                countdown=CELERY_SUBMIT_COUNTDOWN,
+                **get_container_task_options(bg_job.action),
             )
 
     @override_settings(KIOSC_NETWORK_MODE='host')
@@ -624,26 +635,27 @@ class TestContainerUpdateView(TestBase):
         self.container1.save()
 
         with self.login(self.superuser):
-            response = self.client.post(
-                reverse(
-                    'containers:update',
-                    kwargs={'container': self.container1.sodar_uuid},
-                ),
-                self.post_data_host,
-            )
-
-            # Get updated object
-            self.container1.refresh_from_db()
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse(
+                        'containers:update',
+                        kwargs={'container': self.container1.sodar_uuid},
+                    ),
+                    self.post_data_host,
+                )
 
-            self.assertRedirects(
-                response,
-                reverse(
-                    'containers:restart',
-                    kwargs={'container': self.container1.sodar_uuid},
-                ),
-                status_code=302,
-                target_status_code=302,
-            )
+                # Get updated object
+                self.container1.refresh_from_db()
+
+                self.assertRedirects(
+                    response,
+                    reverse(
+                        'containers:restart',
+                        kwargs={'container': self.container1.sodar_uuid},
+                    ),
+                    status_code=302,
+                    target_status_code=302,
+                )
 
             self.post_data_host['environment'] = json.loads(
                 self.post_data_host['environment']
@@ -660,7 +672,9 @@ class TestContainerUpdateView(TestBase):
             bg_job = ContainerBackgroundJob.objects.first()
             self.assertEqual(bg_job.action, ACTION_RESTART)
             mock.assert_called_with(
-                kwargs={'job_id': bg_job.pk}, countdown=CELERY_SUBMIT_COUNTDOWN
+                kwargs={'job_id': bg_job.pk},
+                countdown=CELERY_SUBMIT_COUNTDOWN,
+                **get_container_task_options(bg_job.action),
             )
 
     @override_settings(KIOSC_NETWORK_MODE='docker-shared')
@@ -670,26 +684,27 @@ class TestContainerUpdateView(TestBase):
         self.container1.save()
 
         with self.login(self.superuser):
-            response = self.client.post(
-                reverse(
-                    'containers:update',
-                    kwargs={'container': self.container1.sodar_uuid},
-                ),
-                self.post_data_shared,
-            )
-
-            # Get updated object
-            self.container1.refresh_from_db()
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse(
+                        'containers:update',
+                        kwargs={'container': self.container1.sodar_uuid},
+                    ),
+                    self.post_data_shared,
+                )
 
-            self.assertRedirects(
-                response,
-                reverse(
-                    'containers:restart',
-                    kwargs={'container': self.container1.sodar_uuid},
-                ),
-                status_code=302,
-                target_status_code=302,
-            )
+                # Get updated object
+                self.container1.refresh_from_db()
+
+                self.assertRedirects(
+                    response,
+                    reverse(
+                        'containers:restart',
+                        kwargs={'container': self.container1.sodar_uuid},
+                    ),
+                    status_code=302,
+                    target_status_code=302,
+                )
 
             self.post_data_shared['environment'] = json.loads(
                 self.post_data_shared['environment']
@@ -708,7 +723,9 @@ class TestContainerUpdateView(TestBase):
 
             # Assert job call
             mock.assert_called_with(
-                kwargs={'job_id': bg_job.pk}, countdown=CELERY_SUBMIT_COUNTDOWN
+                kwargs={'job_id': bg_job.pk},
+                countdown=CELERY_SUBMIT_COUNTDOWN,
+                **get_container_task_options(bg_job.action),
             )
 
     def test_post_non_existent(self):
@@ -732,7 +749,8 @@ class TestContainerDetailView(TestBase):
         self.create_one_container()
         self.create_fake_uuid()
 
-    def test_get_success(self):
+    @patch('docker.api.client.APIClient.inspect_container')
+    def test_get_success(self, inspect_container):
         with self.login(self.superuser):
             response = self.client.get(
                 reverse(
@@ -743,6 +761,7 @@ class TestContainerDetailView(TestBase):
 
             self.assertEqual(response.status_code, 200)
             self.assertEqual(response.context['object'], self.container1)
+            inspect_container.assert_not_called()
 
     def test_get_non_existent(self):
         with self.login(self.superuser):
@@ -767,12 +786,13 @@ class TestContainerStartView(TestBase):
     @patch('containers.tasks.container_task.apply_async')
     def test_get_success(self, mock):
         with self.login(self.superuser):
-            response = self.client.get(
-                reverse(
-                    'containers:start',
-                    kwargs={'container': self.container1.sodar_uuid},
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.get(
+                    reverse(
+                        'containers:start',
+                        kwargs={'container': self.container1.sodar_uuid},
+                    )
                 )
-            )
 
             self.assertEqual(ContainerBackgroundJob.objects.count(), 1)
             job = ContainerBackgroundJob.objects.first()
@@ -787,7 +807,9 @@ class TestContainerStartView(TestBase):
             self.assertEqual(job.action, ACTION_START)
             self.assertEqual(job.container, self.container1)
             mock.assert_called_with(
-                kwargs={'job_id': job.pk}, countdown=CELERY_SUBMIT_COUNTDOWN
+                kwargs={'job_id': job.pk},
+                countdown=CELERY_SUBMIT_COUNTDOWN,
+                **get_container_task_options(job.action),
             )
 
     def test_get_non_existent(self):
@@ -813,12 +835,13 @@ class TestContainerStopView(TestBase):
     @patch('containers.tasks.container_task.apply_async')
     def test_get_success(self, mock):
         with self.login(self.superuser):
-            response = self.client.get(
-                reverse(
-                    'containers:stop',
-                    kwargs={'container': self.container1.sodar_uuid},
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.get(
+                    reverse(
+                        'containers:stop',
+                        kwargs={'container': self.container1.sodar_uuid},
+                    )
                 )
-            )
 
             self.assertEqual(ContainerBackgroundJob.objects.count(), 1)
 
@@ -834,7 +857,9 @@ class TestContainerStopView(TestBase):
             self.assertEqual(job.action, ACTION_STOP)
             self.assertEqual(job.container, self.container1)
             mock.assert_called_with(
-                kwargs={'job_id': job.pk}, countdown=CELERY_SUBMIT_COUNTDOWN
+                kwargs={'job_id': job.pk},
+                countdown=CELERY_SUBMIT_COUNTDOWN,
+                **get_container_task_options(job.action),
             )
 
     def test_get_non_existent(self):
@@ -860,12 +885,13 @@ class TestContainerRestartView(TestBase):
     @patch('containers.tasks.container_task.apply_async')
     def test_get_success(self, mock):
         with self.login(self.superuser):
-            response = self.client.get(
-                reverse(
-                    'containers:restart',
-                    kwargs={'container': self.container1.sodar_uuid},
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.get(
+                    reverse(
+                        'containers:restart',
+                        kwargs={'container': self.container1.sodar_uuid},
+                    )
                 )
-            )
 
             self.assertEqual(ContainerBackgroundJob.objects.count(), 1)
 
@@ -881,7 +907,9 @@ class TestContainerRestartView(TestBase):
             self.assertEqual(job.action, ACTION_RESTART)
             self.assertEqual(job.container, self.container1)
             mock.assert_called_with(
-                kwargs={'job_id': job.pk}, countdown=CELERY_SUBMIT_COUNTDOWN
+                kwargs={'job_id': job.pk},
+                countdown=CELERY_SUBMIT_COUNTDOWN,
+                **get_container_task_options(job.action),
             )
 
     def test_get_non_existent(self):
@@ -907,12 +935,13 @@ class TestContainerPauseView(TestBase):
     @patch('containers.tasks.container_task.apply_async')
     def test_get_success(self, mock):
         with self.login(self.superuser):
-            response = self.client.get(
-                reverse(
-                    'containers:pause',
-                    kwargs={'container': self.container1.sodar_uuid},
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.get(
+                    reverse(
+                        'containers:pause',
+                        kwargs={'container': self.container1.sodar_uuid},
+                    )
                 )
-            )
 
             self.assertEqual(ContainerBackgroundJob.objects.count(), 1)
 
@@ -928,7 +957,9 @@ class TestContainerPauseView(TestBase):
             self.assertEqual(job.action, ACTION_PAUSE)
             self.assertEqual(job.container, self.container1)
             mock.assert_called_with(
-                kwargs={'job_id': job.pk}, countdown=CELERY_SUBMIT_COUNTDOWN
+                kwargs={'job_id': job.pk},
+                countdown=CELERY_SUBMIT_COUNTDOWN,
+                **get_container_task_options(job.action),
             )
 
     def test_get_non_existent(self):
@@ -954,12 +985,13 @@ class TestContainerUnpauseView(TestBase):
     @patch('containers.tasks.container_task.apply_async')
     def test_get_success(self, mock):
         with self.login(self.superuser):
-            response = self.client.get(
-                reverse(
-                    'containers:unpause',
-                    kwargs={'container': self.container1.sodar_uuid},
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.get(
+                    reverse(
+                        'containers:unpause',
+                        kwargs={'container': self.container1.sodar_uuid},
+                    )
                 )
-            )
 
             self.assertEqual(ContainerBackgroundJob.objects.count(), 1)
 
@@ -975,7 +1007,9 @@ class TestContainerUnpauseView(TestBase):
             self.assertEqual(job.action, ACTION_UNPAUSE)
             self.assertEqual(job.container, self.container1)
             mock.assert_called_with(
-                kwargs={'job_id': job.pk}, countdown=CELERY_SUBMIT_COUNTDOWN
+                kwargs={'job_id': job.pk},
+                countdown=CELERY_SUBMIT_COUNTDOWN,
+                **get_container_task_options(job.action),
             )
 
     def test_get_non_existent(self):
@@ -1034,9 +1068,11 @@ class TestReverseProxyView(TestBase):
     @override_settings(KIOSC_NETWORK_MODE='host')
     @responses.activate
     def test_get_success_mode_host_host_port_missing(self):
-        self.container1.host_port = None
-        self.container1.state = STATE_RUNNING
-        self.container1.save()
+        # Saving a container without a host port assigns one in host mode
+        Container.objects.filter(pk=self.container1.pk).update(
+            host_port=None, state=STATE_RUNNING
+        )
+        self.container1.refresh_from_db()
 
         with self.login(self.superuser):
 
@@ -1170,6 +1206,38 @@ class TestReverseProxyView(TestBase):
             )
             self.assertEqual(responses.calls[0].request.url, container_url)
 
+    @override_settings(KIOSC_NETWORK_MODE='docker-shared')
+    @responses.activate
+    def test_get_success_replica_sticky(self):
+        self.container1.replicas = 2
+        self.container1.state = STATE_RUNNING
+        self.container1.save()
+        ContainerReplica.objects.create(
+            container=self.container1,
+            index=1,
+            docker_id='replica1abcdef',
+            state=STATE_RUNNING,
+        )
+        self.client.cookies[REPLICA_COOKIE] = '1'
+
+        with self.login(self.superuser):
+            container_url = f'/{self.container1.container_path}'
+            responses.add('GET', container_url, body='abc')
+            response = self.client.get(
+                reverse(
+                    'containers:proxy',
+                    kwargs={
+                        'container': self.container1.sodar_uuid,
+                        'path': self.container1.container_path,
+                    },
+                )
+            )
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(responses.calls), 1)
+            self.assertEqual(responses.calls[0].request.host, 'replica1abcd')
+            self.assertEqual(response.cookies[REPLICA_COOKIE].value, '1')
+
     def test_get_non_existent(self):
         with self.login(self.superuser):
             response = self.client.get(
@@ -1250,15 +1318,16 @@ class TestContainerProxyLobbyView(TestBase):
 
             mock.side_effect = _mock_start
 
-            response = self.client.get(
-                reverse(
-                    'containers:proxy-lobby',
-                    kwargs={
-                        'container': self.container1.sodar_uuid,
-                    },
-                ),
-                follow=True,
-            )
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.get(
+                    reverse(
+                        'containers:proxy-lobby',
+                        kwargs={
+                            'container': self.container1.sodar_uuid,
+                        },
+                    ),
+                    follow=True,
+                )
 
             self.assertEqual(response.status_code, 200)
             self.assertEqual(ContainerBackgroundJob.objects.count(), 1)
@@ -1289,14 +1358,15 @@ class TestContainerProxyLobbyView(TestBase):
 
             mock.side_effect = _mock_start
 
-            response = self.client.get(
-                reverse(
-                    'containers:proxy-lobby',
-                    kwargs={
-                        'container': self.container1.sodar_uuid,
-                    },
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.get(
+                    reverse(
+                        'containers:proxy-lobby',
+                        kwargs={
+                            'container': self.container1.sodar_uuid,
+                        },
+                    )
                 )
-            )
 
             self.assertEqual(response.status_code, 200)
             self.assertEqual(ContainerBackgroundJob.objects.count(), 1)
@@ -1383,6 +1453,44 @@ class TestFileServeView(FileMixin, TestBase):
         self.assertEqual(response.content, b'')
 
 
+class TestContainerRefreshStateApiView(TestBase):
+    """Tests for ``ContainerRefreshStateApiView``."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_one_container()
+
+    @patch('containers.tasks.sync_container_state_task.apply_async')
+    def test_get(self, apply_async):
+        with self.login(self.superuser):
+            response = self.client.get(
+                reverse(
+                    'containers:ajax-refresh-state',
+                    kwargs={'container': self.container1.sodar_uuid},
+                )
+            )
+
+            self.assertEqual(response.status_code, 200)
+            apply_async.assert_called_once_with(
+                args=[self.container1.pk], queue='interactive', priority=0
+            )
+
+    @patch('docker.api.client.APIClient.inspect_container')
+    def test_get_sync(self, inspect_container):
+        inspect_container.return_value = {'State': {'Status': STATE_RUNNING}}
+
+        with self.login(self.superuser):
+            self.client.get(
+                reverse(
+                    'containers:ajax-refresh-state',
+                    kwargs={'container': self.container1.sodar_uuid},
+                )
+            )
+
+        self.container1.refresh_from_db()
+        self.assertEqual(self.container1.state, STATE_RUNNING)
+
+
 class TestContainerGetDynamicDetailsApiView(TestBase):
     """Tests for ``ContainerGetDynamicDetailsApiView``."""
 
@@ -1546,3 +1654,30 @@ class TestContainerGetDynamicDetailsApiView(TestBase):
             }
 
             self.assertEqual(response.json(), expected)
+
+
+class TestContainerGetResourceUsageApiView(TestBase):
+    """Tests for ``ContainerGetResourceUsageApiView``."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_one_container()
+
+    def _get(self, hours):
+        with self.login(self.superuser):
+            return self.client.get(
+                reverse(
+                    'containers:ajax-get-resource-usage',
+                    kwargs={'container': self.container1.sodar_uuid},
+                ),
+                {'hours': hours},
+            )
+
+    def test_get(self):
+        response = self._get(2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'usage': []})
+
+    def test_get_invalid_hours(self):
+        response = self._get('abc')
+        self.assertEqual(response.status_code, 400)
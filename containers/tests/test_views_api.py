@@ -1,7 +1,14 @@
 """Tests for the container API views."""
 
+from datetime import timedelta
 from unittest.mock import patch
 
+from bgjobs.models import (
+    JOB_STATE_DONE,
+    JOB_STATE_FAILED,
+    JOB_STATE_INITIAL,
+    JOB_STATE_RUNNING,
+)
 from rest_framework import status
 
 from django.forms import model_to_dict
@@ -11,11 +18,20 @@ from django.test import override_settings
 from containers.models import (
     Container,
     ContainerBackgroundJob,
+    ContainerBatchJob,
+    ContainerResourceUsage,
+    RESOLUTION_RAW,
+    ACTION_DELETE,
     ACTION_START,
     ACTION_STOP,
     STATE_RUNNING,
     STATE_DELETED,
 )
+from containers.tasks import (
+    get_container_task_options,
+    submit_container_job,
+    submit_container_jobs,
+)
 from containers.tests.helpers import (
     TestContainerCreationMixin,
     ContainersAPIViewTestBase,
@@ -52,7 +68,9 @@ class TestContainerListAPIView(
             )
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        expected = model_to_dict(self.container1, exclude=['id'])
+        expected = model_to_dict(
+            self.container1, exclude=['id', *Container.TRACKING_FIELDS]
+        )
         expected['date_created'] = self.get_drf_datetime(
             self.container1.date_created
         )
@@ -81,7 +99,9 @@ class TestContainerListAPIView(
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        container1 = model_to_dict(self.container1, exclude=['id'])
+        container1 = model_to_dict(
+            self.container1, exclude=['id', *Container.TRACKING_FIELDS]
+        )
         container1['date_created'] = self.get_drf_datetime(
             self.container1.date_created
         )
@@ -92,7 +112,9 @@ class TestContainerListAPIView(
             Project.objects.get(id=container1['project']).sodar_uuid
         )
         container1['sodar_uuid'] = str(container1['sodar_uuid'])
-        container2 = model_to_dict(self.container2, exclude=['id'])
+        container2 = model_to_dict(
+            self.container2, exclude=['id', *Container.TRACKING_FIELDS]
+        )
         container2['date_created'] = self.get_drf_datetime(
             self.container2.date_created
         )
@@ -293,7 +315,9 @@ class TestContainerDetailAPIView(
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        expected = model_to_dict(self.container1, exclude=['id'])
+        expected = model_to_dict(
+            self.container1, exclude=['id', *Container.TRACKING_FIELDS]
+        )
         expected['date_created'] = self.get_drf_datetime(
             self.container1.date_created
         )
@@ -330,12 +354,13 @@ class TestContainerStartAPIView(
 
     @patch('containers.tasks.container_task.apply_async')
     def test_get_success(self, mock):
-        response = self.request_knox(
-            reverse(
-                'containers:api-start',
-                kwargs={'container': self.container1.sodar_uuid},
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.request_knox(
+                reverse(
+                    'containers:api-start',
+                    kwargs={'container': self.container1.sodar_uuid},
+                )
             )
-        )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(ContainerBackgroundJob.objects.count(), 1)
@@ -345,7 +370,9 @@ class TestContainerStartAPIView(
         self.assertEqual(job.action, ACTION_START)
         self.assertEqual(job.container, self.container1)
         mock.assert_called_with(
-            kwargs={'job_id': job.pk}, countdown=CELERY_SUBMIT_COUNTDOWN
+            kwargs={'job_id': job.pk},
+            countdown=CELERY_SUBMIT_COUNTDOWN,
+            **get_container_task_options(job.action),
         )
 
     def test_get_non_existent(self):
@@ -371,12 +398,13 @@ class TestContainerStopAPIView(
 
     @patch('containers.tasks.container_task.apply_async')
     def test_get_success(self, mock):
-        response = self.request_knox(
-            reverse(
-                'containers:api-stop',
-                kwargs={'container': self.container1.sodar_uuid},
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.request_knox(
+                reverse(
+                    'containers:api-stop',
+                    kwargs={'container': self.container1.sodar_uuid},
+                )
             )
-        )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(ContainerBackgroundJob.objects.count(), 1)
@@ -386,7 +414,9 @@ class TestContainerStopAPIView(
         self.assertEqual(job.action, ACTION_STOP)
         self.assertEqual(job.container, self.container1)
         mock.assert_called_with(
-            kwargs={'job_id': job.pk}, countdown=CELERY_SUBMIT_COUNTDOWN
+            kwargs={'job_id': job.pk},
+            countdown=CELERY_SUBMIT_COUNTDOWN,
+            **get_container_task_options(job.action),
         )
 
     def test_get_non_existent(self):
@@ -398,3 +428,274 @@ class TestContainerStopAPIView(
         )
 
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TestContainerResourceUsageAPIView(
+    TestContainerCreationMixin, ContainersAPIViewTestBase
+):
+    """Tests for ``ContainerResourceUsageAPIView``."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_one_container()
+
+    def test_get_success(self):
+        usage = ContainerResourceUsage.objects.create(
+            container=self.container1,
+            cpu_percent=12.5,
+            memory_usage=1024,
+            memory_limit=2048,
+            network_rx=10,
+            network_tx=20,
+            pids=3,
+        )
+
+        response = self.request_knox(
+            reverse(
+                'containers:api-resource-usage',
+                kwargs={'container': self.container1.sodar_uuid},
+            )
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json()['results'],
+            [
+                {
+                    'date_collected': self.get_drf_datetime(
+                        usage.date_collected
+                    ),
+                    'resolution': RESOLUTION_RAW,
+                    'cpu_percent': 12.5,
+                    'memory_usage': 1024,
+                    'memory_limit': 2048,
+                    'network_rx': 10,
+                    'network_tx': 20,
+                    'pids': 3,
+                }
+            ],
+        )
+
+    def test_get_outside_window(self):
+        usage = ContainerResourceUsage.objects.create(container=self.container1)
+        usage.date_collected -= timedelta(hours=3)
+        usage.save()
+
+        response = self.request_knox(
+            reverse(
+                'containers:api-resource-usage',
+                kwargs={'container': self.container1.sodar_uuid},
+            )
+            + '?hours=2'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['results'], [])
+
+    def test_get_invalid_hours(self):
+        url = reverse(
+            'containers:api-resource-usage',
+            kwargs={'container': self.container1.sodar_uuid},
+        )
+
+        for hours in ('abc', '0'):
+            response = self.request_knox(f'{url}?hours={hours}')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_unknown_container(self):
+        response = self.request_knox(
+            reverse(
+                'containers:api-resource-usage',
+                kwargs={'container': '11111111-1111-1111-1111-111111111111'},
+            )
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TestContainerBulkActionAPIView(
+    TestContainerCreationMixin, ContainersAPIViewTestBase
+):
+    """Tests for ``ContainerBulkActionAPIView``."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_two_containers()
+        self.url = reverse(
+            'containers:api-bulk', kwargs={'project': self.project.sodar_uuid}
+        )
+
+    @patch('containers.tasks.container_task.run')
+    def test_post_containers(self, mock):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.request_knox(
+                self.url,
+                method='POST',
+                data={
+                    'action': ACTION_START,
+                    'containers': [str(self.container1.sodar_uuid)],
+                },
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        batch = ContainerBatchJob.objects.get()
+        job = ContainerBackgroundJob.objects.get()
+        self.assertEqual(response.json()['sodar_uuid'], str(batch.sodar_uuid))
+        self.assertEqual(job.batch, batch)
+        self.assertEqual(job.action, ACTION_START)
+        self.assertEqual(job.container, self.container1)
+        self.assertEqual(self.container1.log_entries.count(), 1)
+        mock.assert_called_once_with(job_id=job.pk)
+
+    @patch('containers.tasks.container_task.run')
+    def test_post_state(self, mock):
+        self.container2.state = STATE_RUNNING
+        self.container2.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.request_knox(
+                self.url,
+                method='POST',
+                data={'action': ACTION_STOP, 'state': STATE_RUNNING},
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = ContainerBackgroundJob.objects.get()
+        self.assertEqual(job.container, self.container2)
+        mock.assert_called_once_with(job_id=job.pk)
+
+    @patch('containers.tasks.container_task.run')
+    def test_post_skip_pending(self, mock):
+        submit_container_job(
+            self.container1,
+            ACTION_START,
+            self.user,
+            'Start container',
+            countdown=0,
+        )
+        mock.reset_mock()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.request_knox(
+                self.url,
+                method='POST',
+                data={'action': ACTION_START, 'state': self.container1.state},
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = ContainerBackgroundJob.objects.get(batch__isnull=False)
+        self.assertEqual(job.container, self.container2)
+        mock.assert_called_once_with(job_id=job.pk)
+
+    @override_settings(KIOSC_BULK_CONCURRENCY=1)
+    @patch('containers.tasks.container_jobs_task.run')
+    def test_post_concurrency(self, mock):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.request_knox(
+                self.url,
+                method='POST',
+                data={'action': ACTION_START, 'state': self.container1.state},
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        mock.assert_called_once()
+        self.assertEqual(
+            sorted(mock.call_args.args[0]),
+            sorted(ContainerBackgroundJob.objects.values_list('pk', flat=True)),
+        )
+
+    @override_settings(KIOSC_BULK_CONCURRENCY=4)
+    @patch('containers.tasks.container_task.run')
+    def test_post_chunks(self, mock):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.request_knox(
+                self.url,
+                method='POST',
+                data={'action': ACTION_START, 'state': self.container1.state},
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(
+            sorted(c.kwargs['job_id'] for c in mock.call_args_list),
+            sorted(ContainerBackgroundJob.objects.values_list('pk', flat=True)),
+        )
+
+    @patch('containers.tasks.container_task.run')
+    def test_post_delete(self, mock):
+        self.container1.state = STATE_RUNNING
+        self.container1.save()
+        self.container2.state = STATE_DELETED
+        self.container2.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.request_knox(
+                self.url,
+                method='POST',
+                data={
+                    'action': ACTION_DELETE,
+                    'containers': [
+                        str(self.container1.sodar_uuid),
+                        str(self.container2.sodar_uuid),
+                    ],
+                },
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(mock.call_count, 2)
+        # Only the container the action did not fail for is removed
+        self.assertEqual(list(Container.objects.all()), [self.container1])
+
+    def test_post_invalid(self):
+        response = self.request_knox(
+            self.url, method='POST', data={'action': ACTION_START}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(ContainerBatchJob.objects.count(), 0)
+
+
+class TestContainerBatchJobAPIView(
+    TestContainerCreationMixin, ContainersAPIViewTestBase
+):
+    """Tests for ``ContainerBatchJobAPIView``."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_two_containers()
+
+    @patch('containers.tasks.container_task.run')
+    def test_get_success(self, mock):
+        batch = submit_container_jobs(
+            self.project,
+            Container.objects.all(),
+            ACTION_STOP,
+            self.user,
+            'Stop container',
+            'Stop',
+        )
+        job = batch.jobs.first()
+        job.bg_job.status = JOB_STATE_DONE
+        job.bg_job.save()
+
+        response = self.request_knox(
+            reverse(
+                'containers:api-batch',
+                kwargs={'containerbatchjob': batch.sodar_uuid},
+            )
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            {
+                'sodar_uuid': str(batch.sodar_uuid),
+                'date_created': self.get_drf_datetime(batch.date_created),
+                'action': ACTION_STOP,
+                'status': {
+                    JOB_STATE_INITIAL: 1,
+                    JOB_STATE_RUNNING: 0,
+                    JOB_STATE_DONE: 1,
+                    JOB_STATE_FAILED: 0,
+                },
+            },
+        )
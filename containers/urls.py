@@ -78,6 +78,16 @@ ui_urlpatterns = [
         view=views.ContainerGetDynamicDetailsApiView.as_view(),
         name='ajax-get-dynamic-details',
     ),
+    path(
+        'ajax/get-resource-usage/<uuid:container>',
+        view=views.ContainerGetResourceUsageApiView.as_view(),
+        name='ajax-get-resource-usage',
+    ),
+    path(
+        'ajax/refresh-state/<uuid:container>',
+        view=views.ContainerRefreshStateApiView.as_view(),
+        name='ajax-refresh-state',
+    ),
 ]
 
 api_urlpatterns = [
@@ -111,6 +121,21 @@ api_urlpatterns = [
         view=views_api.ContainerStopAPIView.as_view(),
         name='api-stop',
     ),
+    path(
+        'api/resource-usage/<uuid:container>',
+        view=views_api.ContainerResourceUsageAPIView.as_view(),
+        name='api-resource-usage',
+    ),
+    path(
+        'api/bulk/<uuid:project>',
+        view=views_api.ContainerBulkActionAPIView.as_view(),
+        name='api-bulk',
+    ),
+    path(
+        'api/batch/<uuid:containerbatchjob>',
+        view=views_api.ContainerBatchJobAPIView.as_view(),
+        name='api-batch',
+    ),
 ]
 
 websocket_urlpatterns = [
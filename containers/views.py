@@ -1,5 +1,6 @@
 import inspect
 import logging
+from contextvars import ContextVar
 from ipaddress import ip_address
 from typing import AsyncGenerator, Optional
 from urllib3.exceptions import NewConnectionError
@@ -43,17 +44,22 @@ from bgjobs.models import BackgroundJob, LOG_LEVEL_DEBUG
 from containers.templatetags.container_tags import colorize_state, state_bell
 from filesfolders.models import File, FileData
 from filesfolders.views import storage
+from projectroles.models import Project, SODAR_CONSTANTS
 from projectroles.plugins import PluginAPI
 from projectroles.views import (
     LoggedInPermissionMixin,
     ProjectContextMixin,
     ProjectPermissionMixin,
 )
+from projectroles.views_ajax import (
+    ProjectListColumnAjaxView as BaseProjectListColumnAjaxView,
+)
 
 from containers.forms import ContainerForm, FileSelectorForm
 from containers.models import (
     Container,
     ContainerBackgroundJob,
+    ProjectContainerStats,
     ACTION_START,
     ACTION_STOP,
     ACTION_PAUSE,
@@ -63,13 +69,20 @@ from containers.models import (
     PROCESS_OBJECT,
     PROCESS_ACTION,
     PROCESS_PROXY,
+    REPLICA_COOKIE,
     STATE_PAUSED,
     STATE_RUNNING,
     STATE_DELETED,
     STATE_INITIAL,
     LOG_LEVEL_ERROR,
 )
-from containers.tasks import container_task, sync_container_state
+from containers.rules import get_container_perms
+from containers.serializers import ContainerResourceUsageSerializer
+from containers.tasks import (
+    container_task,
+    submit_container_job,
+    submit_container_state_sync,
+)
 from containertemplates.forms import ContainerTemplateSelectorForm
 
 
@@ -78,7 +91,25 @@ plugin_api = PluginAPI()
 User = get_user_model()
 
 APP_NAME = 'containers'
+DEFAULT_RESOURCE_USAGE_HOURS = 24
 CELERY_SUBMIT_COUNTDOWN = 0.5
+PROJECT_TYPE_PROJECT = SODAR_CONSTANTS['PROJECT_TYPE_PROJECT']
+
+#: Container counters of the projects listed in the current
+#: ``ProjectListColumnAjaxView`` request, read by the plugin.
+project_list_counts = ContextVar('project_list_counts', default=None)
+
+
+def get_resource_usage_hours(value):
+    """Return the requested resource usage window in hours or ``None`` if
+    ``value`` is not a positive integer."""
+    try:
+        hours = int(value)
+
+    except (TypeError, ValueError):
+        return None
+
+    return hours if hours > 0 else None
 
 
 async def _stream_response(
@@ -116,7 +147,6 @@ async def _stream_response(
 
 class ContainerModifyMixin:
     @classmethod
-    @transaction.atomic
     def _container_delete_docker(cls, container: Container, user: User) -> bool:
         """Delete a container
 
@@ -381,6 +411,13 @@ class ContainerListView(
     slug_url_kwarg = 'project'
     slug_field = 'sodar_uuid'
 
+    def get_context_data(self, *args, **kwargs):
+        context = super().get_context_data(*args, **kwargs)
+        context['container_perms'] = get_container_perms(
+            self.request, context['project']
+        )
+        return context
+
 
 class ContainerDetailView(
     LoginRequiredMixin,
@@ -394,12 +431,16 @@ class ContainerDetailView(
     permission_required = 'containers.view_container'
     template_name = 'containers/container_detail.html'
     model = Container
+    queryset = Container.objects.select_related('last_job')
     slug_url_kwarg = 'container'
     slug_field = 'sodar_uuid'
 
-    def get(self, request, *args, **kwargs):
-        sync_container_state(self.get_object())
-        return super().get(request, *args, **kwargs)
+    def get_context_data(self, *args, **kwargs):
+        context = super().get_context_data(*args, **kwargs)
+        context['container_perms'] = get_container_perms(
+            self.request, self.object.project
+        )
+        return context
 
 
 class ContainerStartView(
@@ -419,32 +460,22 @@ class ContainerStartView(
 
     @transaction.atomic
     def get(self, request, *args, **kwargs):
-        project = self.get_project()
         container = self.get_object()
-        bg_job = BackgroundJob.objects.create(
-            name='Start container',
-            project=project,
-            job_type=ContainerBackgroundJob.spec_name,
-            user=request.user,
-        )
-        job = ContainerBackgroundJob.objects.create(
-            action=ACTION_START,
-            project=project,
-            container=container,
-            bg_job=bg_job,
+        _job, created = submit_container_job(
+            container,
+            ACTION_START,
+            request.user,
+            'Start container',
+            countdown=CELERY_SUBMIT_COUNTDOWN,
         )
 
-        # Add container log entry
-        container.log_entries.create(
-            text='Start',
-            process=PROCESS_ACTION,
-            user=request.user,
-        )
-
-        # Schedule task
-        container_task.apply_async(
-            kwargs={'job_id': job.id}, countdown=CELERY_SUBMIT_COUNTDOWN
-        )
+        # Add container log entry, unless coalesced into a pending job
+        if created:
+            container.log_entries.create(
+                text='Start',
+                process=PROCESS_ACTION,
+                user=request.user,
+            )
 
         return redirect(
             reverse(
@@ -471,32 +502,22 @@ class ContainerStopView(
 
     @transaction.atomic
     def get(self, request, *args, **kwargs):
-        project = self.get_project()
         container = self.get_object()
-        bg_job = BackgroundJob.objects.create(
-            name='Stop container',
-            project=project,
-            job_type=ContainerBackgroundJob.spec_name,
-            user=request.user,
-        )
-        job = ContainerBackgroundJob.objects.create(
-            action=ACTION_STOP,
-            project=project,
-            container=container,
-            bg_job=bg_job,
+        _job, created = submit_container_job(
+            container,
+            ACTION_STOP,
+            request.user,
+            'Stop container',
+            countdown=CELERY_SUBMIT_COUNTDOWN,
         )
 
-        # Add container log entry
-        container.log_entries.create(
-            text='Stop',
-            process=PROCESS_ACTION,
-            user=request.user,
-        )
-
-        # Schedule task
-        container_task.apply_async(
-            kwargs={'job_id': job.id}, countdown=CELERY_SUBMIT_COUNTDOWN
-        )
+        # Add container log entry, unless coalesced into a pending job
+        if created:
+            container.log_entries.create(
+                text='Stop',
+                process=PROCESS_ACTION,
+                user=request.user,
+            )
 
         return redirect(
             reverse(
@@ -523,32 +544,22 @@ class ContainerPauseView(
 
     @transaction.atomic
     def get(self, request, *args, **kwargs):
-        project = self.get_project()
         container = self.get_object()
-        bg_job = BackgroundJob.objects.create(
-            name='Pause container',
-            project=project,
-            job_type=ContainerBackgroundJob.spec_name,
-            user=request.user,
-        )
-        job = ContainerBackgroundJob.objects.create(
-            action=ACTION_PAUSE,
-            project=project,
-            container=container,
-            bg_job=bg_job,
+        _job, created = submit_container_job(
+            container,
+            ACTION_PAUSE,
+            request.user,
+            'Pause container',
+            countdown=CELERY_SUBMIT_COUNTDOWN,
         )
 
-        # Add container log entry
-        container.log_entries.create(
-            text='Pause',
-            process=PROCESS_ACTION,
-            user=request.user,
-        )
-
-        # Schedule task
-        container_task.apply_async(
-            kwargs={'job_id': job.id}, countdown=CELERY_SUBMIT_COUNTDOWN
-        )
+        # Add container log entry, unless coalesced into a pending job
+        if created:
+            container.log_entries.create(
+                text='Pause',
+                process=PROCESS_ACTION,
+                user=request.user,
+            )
 
         return redirect(
             reverse(
@@ -575,32 +586,22 @@ class ContainerUnpauseView(
 
     @transaction.atomic
     def get(self, request, *args, **kwargs):
-        project = self.get_project()
         container = self.get_object()
-        bg_job = BackgroundJob.objects.create(
-            name='Unpause container',
-            project=project,
-            job_type=ContainerBackgroundJob.spec_name,
-            user=request.user,
-        )
-        job = ContainerBackgroundJob.objects.create(
-            action=ACTION_UNPAUSE,
-            project=project,
-            container=container,
-            bg_job=bg_job,
+        _job, created = submit_container_job(
+            container,
+            ACTION_UNPAUSE,
+            request.user,
+            'Unpause container',
+            countdown=CELERY_SUBMIT_COUNTDOWN,
         )
 
-        # Add container log entry
-        container.log_entries.create(
-            text='Unpause',
-            process=PROCESS_ACTION,
-            user=request.user,
-        )
-
-        # Schedule task
-        container_task.apply_async(
-            kwargs={'job_id': job.id}, countdown=CELERY_SUBMIT_COUNTDOWN
-        )
+        # Add container log entry, unless coalesced into a pending job
+        if created:
+            container.log_entries.create(
+                text='Unpause',
+                process=PROCESS_ACTION,
+                user=request.user,
+            )
 
         return redirect(
             reverse(
@@ -627,32 +628,22 @@ class ContainerRestartView(
 
     @transaction.atomic
     def get(self, request, *args, **kwargs):
-        project = self.get_project()
         container = self.get_object()
-        bg_job = BackgroundJob.objects.create(
-            name='Restart container',
-            project=project,
-            job_type=ContainerBackgroundJob.spec_name,
-            user=request.user,
-        )
-        job = ContainerBackgroundJob.objects.create(
-            action=ACTION_RESTART,
-            project=project,
-            container=container,
-            bg_job=bg_job,
+        _job, created = submit_container_job(
+            container,
+            ACTION_RESTART,
+            request.user,
+            'Restart container',
+            countdown=CELERY_SUBMIT_COUNTDOWN,
         )
 
-        # Add container log entry
-        container.log_entries.create(
-            text='Restart',
-            process=PROCESS_ACTION,
-            user=request.user,
-        )
-
-        # Schedule task
-        container_task.apply_async(
-            kwargs={'job_id': job.id}, countdown=CELERY_SUBMIT_COUNTDOWN
-        )
+        # Add container log entry, unless coalesced into a pending job
+        if created:
+            container.log_entries.create(
+                text='Restart',
+                process=PROCESS_ACTION,
+                user=request.user,
+            )
 
         return redirect(
             reverse(
@@ -679,7 +670,6 @@ class ContainerProxyLobbyView(
 
     @transaction.atomic
     def get(self, request, *args, **kwargs):
-        project = self.get_project()
         container = self.get_object()
 
         if container.state == STATE_RUNNING:
@@ -699,28 +689,21 @@ class ContainerProxyLobbyView(
         else:
             action = ACTION_START
 
-        bg_job = BackgroundJob.objects.create(
-            name='Proxy lobby',
-            project=project,
-            job_type=ContainerBackgroundJob.spec_name,
-            user=request.user,
-        )
-
-        job = ContainerBackgroundJob.objects.create(
-            action=action,
-            project=project,
-            container=container,
-            bg_job=bg_job,
-        )
-
-        # Add container log entry
-        container.log_entries.create(
-            text='Proxy lobby',
-            process=PROCESS_ACTION,
-            user=request.user,
+        _job, created = submit_container_job(
+            container,
+            action,
+            request.user,
+            'Proxy lobby',
+            countdown=0.5,
         )
 
-        container_task.apply_async(kwargs={'job_id': job.id}, countdown=0.5)
+        # Add container log entry, unless coalesced into a pending job
+        if created:
+            container.log_entries.create(
+                text='Proxy lobby',
+                process=PROCESS_ACTION,
+                user=request.user,
+            )
 
         return super().get(request, *args, **kwargs)
 
@@ -828,23 +811,37 @@ class ReverseProxyView(
             )
         )
 
+        if container.state == STATE_PAUSED:
+            # Paused containers are resumed via unpause in the lobby
+            return redirect(
+                reverse(
+                    'containers:proxy-lobby',
+                    kwargs={'container': container.sodar_uuid},
+                )
+            )
+
         if not container.state == STATE_RUNNING:
             messages.error(
                 request, f"Container '{container.title}' not running."
             )
             return _redirect
 
-        if settings.KIOSC_NETWORK_MODE == 'host':
-            if container.host_port:
-                upstream = f'http://localhost:{container.host_port}'
+        if settings.KIOSC_NETWORK_MODE == 'host' and not container.host_port:
+            messages.error(request, 'Host port not set.')
+            return _redirect
 
-            else:
-                messages.error(request, 'Host port not set.')
-                return _redirect
+        # Keep the client on the replica that served it before
+        replica, address = container.select_replica(
+            request.COOKIES.get(REPLICA_COOKIE)
+        )
 
-        else:
-            upstream = f'http://{container.container_id[:12]}:{container.container_port}'
+        if not address:
+            messages.error(
+                request, f"Container '{container.title}' not running."
+            )
+            return _redirect
 
+        upstream = 'http://{}:{}'.format(*address)
         self.upstream = upstream
         self.suppress_empty_body = True
 
@@ -856,7 +853,7 @@ class ReverseProxyView(
         )
 
         try:
-            return super().dispatch(request, *args, **kwargs)
+            response = super().dispatch(request, *args, **kwargs)
 
         except NewConnectionError as e:
             container.log_entries.create(
@@ -877,6 +874,20 @@ class ReverseProxyView(
             )
             return _redirect
 
+        if container.replicas > 1:
+            response.set_cookie(
+                REPLICA_COOKIE,
+                replica,
+                path=reverse(
+                    'containers:proxy',
+                    kwargs={'container': container.sodar_uuid, 'path': ''},
+                ),
+                httponly=True,
+                samesite='Lax',
+            )
+
+        return response
+
 
 class FileServeView(View):
     """View for serving file to a container.
@@ -954,12 +965,13 @@ class ContainerGetDynamicDetailsApiView(
 
     permission_required = 'containers.view_container'
     model = Container
+    queryset = Container.objects.select_related('last_job')
     slug_url_kwarg = 'container'
     slug_field = 'sodar_uuid'
 
     def get(self, *args, **kwargs):
         container = self.get_object()
-        last_job = container.containerbackgroundjob.last()
+        last_job = container.last_job
         last_action = last_job.action if last_job else None
         log_lines = int(
             self.request.GET.get('log_lines', KIOSC_CONTAINER_DEFAULT_LOG_LINES)
@@ -985,4 +997,88 @@ class ContainerGetDynamicDetailsApiView(
         if last_job:
             response['retries'] = last_job.retries
 
+        usage = container.resource_usage.last()
+
+        if usage:
+            response.update(
+                {
+                    f'usage_{key}': value
+                    for key, value in usage.get_display().items()
+                }
+            )
+
         return JsonResponse(response)
+
+
+class ContainerRefreshStateApiView(
+    LoggedInPermissionMixin,
+    LoginRequiredMixin,
+    ProjectPermissionMixin,
+    ProjectContextMixin,
+    DetailView,
+):
+    """AJAX view for submitting a synchronization of the container state
+    with Docker. The result is picked up via
+    ``ContainerGetDynamicDetailsApiView``."""
+
+    permission_required = 'containers.view_container'
+    model = Container
+    slug_url_kwarg = 'container'
+    slug_field = 'sodar_uuid'
+
+    def get(self, *args, **kwargs):
+        submit_container_state_sync(self.get_object())
+        return JsonResponse({'detail': 'Submitted state synchronization'})
+
+
+class ContainerGetResourceUsageApiView(
+    LoggedInPermissionMixin,
+    LoginRequiredMixin,
+    ProjectPermissionMixin,
+    ProjectContextMixin,
+    DetailView,
+):
+    """AJAX view for getting the resource usage history of a container."""
+
+    permission_required = 'containers.view_container'
+    model = Container
+    slug_url_kwarg = 'container'
+    slug_field = 'sodar_uuid'
+
+    def get(self, *args, **kwargs):
+        container = self.get_object()
+        hours = get_resource_usage_hours(
+            self.request.GET.get('hours', DEFAULT_RESOURCE_USAGE_HOURS)
+        )
+
+        if hours is None:
+            return JsonResponse(
+                {'error': 'Hours must be a positive integer'},
+                status=400,
+            )
+
+        serializer = ContainerResourceUsageSerializer(
+            container.get_resource_usage(hours), many=True
+        )
+        return JsonResponse({'usage': serializer.data})
+
+
+class ProjectListColumnAjaxView(BaseProjectListColumnAjaxView):
+    """Project list column view fetching the container counters of all
+    listed projects with one query before the columns are rendered."""
+
+    def post(self, request, *args, **kwargs):
+        token = project_list_counts.set(
+            ProjectContainerStats.objects.get_counts(
+                Project.objects.filter(
+                    type=PROJECT_TYPE_PROJECT,
+                    sodar_uuid__in=request.data.get('projects') or [],
+                )
+            )
+        )
+
+        try:
+            return super().post(request, *args, **kwargs)
+
+        finally:
+            project_list_counts.reset(token)
@@ -4,13 +4,16 @@ from django.http import JsonResponse
 from projectroles.plugins import PluginAPI
 from projectroles.views_api import SODARAPIGenericProjectMixin
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import (
     ListAPIView,
     RetrieveAPIView,
     CreateAPIView,
     DestroyAPIView,
+    get_object_or_404,
 )
 from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
 from rest_framework.versioning import AcceptHeaderVersioning
 from rest_framework.views import APIView
 
@@ -19,15 +22,31 @@ from containers.models import (
     ContainerBackgroundJob,
     ACTION_START,
     ACTION_STOP,
+    ACTION_RESTART,
+    ACTION_PAUSE,
+    ACTION_UNPAUSE,
     PROCESS_OBJECT,
     PROCESS_ACTION,
     STATE_INITIAL,
     STATE_DELETED,
     ACTION_DELETE,
 )
-from containers.serializers import ContainerSerializer
-from containers.tasks import container_task
-from containers.views import CELERY_SUBMIT_COUNTDOWN
+from containers.serializers import (
+    ContainerBatchJobSerializer,
+    ContainerBulkActionSerializer,
+    ContainerSerializer,
+    ContainerResourceUsageSerializer,
+)
+from containers.tasks import (
+    container_task,
+    submit_container_job,
+    submit_container_jobs,
+)
+from containers.views import (
+    CELERY_SUBMIT_COUNTDOWN,
+    DEFAULT_RESOURCE_USAGE_HOURS,
+    get_resource_usage_hours,
+)
 
 
 # Local constants
@@ -38,6 +57,16 @@ CONTAINERS_API_MEDIA_TYPE = (
 CONTAINERS_API_DEFAULT_VERSION = '1.0'
 CONTAINERS_API_ALLOWED_VERSIONS = ['1.0']
 
+#: Permission required per bulk action.
+BULK_ACTION_PERMISSIONS = {
+    ACTION_START: 'containers.start_container',
+    ACTION_STOP: 'containers.stop_container',
+    ACTION_RESTART: 'containers.start_container',
+    ACTION_PAUSE: 'containers.pause_container',
+    ACTION_UNPAUSE: 'containers.unpause_container',
+    ACTION_DELETE: 'containers.delete_container',
+}
+
 
 plugin_api = PluginAPI()
 
@@ -121,7 +150,6 @@ class ContainerDeleteAPIView(
     lookup_field = 'sodar_uuid'
     permission_required = 'containers.delete_container'
 
-    @transaction.atomic
     def delete(self, request, *args, **kwargs):
         timeline = plugin_api.get_backend_api('timeline_backend')
         container = Container.objects.get(sodar_uuid=kwargs.get('container'))
@@ -196,33 +224,22 @@ class ContainerStartAPIView(
 
     @transaction.atomic
     def get(self, request, *args, **kwargs):
-        project = self.get_project()
         container = Container.objects.get(sodar_uuid=kwargs.get('container'))
-
-        bg_job = BackgroundJob.objects.create(
-            name='Start container',
-            project=project,
-            job_type=ContainerBackgroundJob.spec_name,
-            user=request.user,
-        )
-        job = ContainerBackgroundJob.objects.create(
-            action=ACTION_START,
-            project=project,
-            container=container,
-            bg_job=bg_job,
-        )
-
-        # Add container log entry
-        container.log_entries.create(
-            text='Start [API]',
-            process=PROCESS_ACTION,
-            user=request.user,
+        _job, created = submit_container_job(
+            container,
+            ACTION_START,
+            request.user,
+            'Start container',
+            countdown=CELERY_SUBMIT_COUNTDOWN,
         )
 
-        # Schedule task
-        container_task.apply_async(
-            kwargs={'job_id': job.id}, countdown=CELERY_SUBMIT_COUNTDOWN
-        )
+        # Add container log entry, unless coalesced into a pending job
+        if created:
+            container.log_entries.create(
+                text='Start [API]',
+                process=PROCESS_ACTION,
+                user=request.user,
+            )
 
         return JsonResponse(
             {'message': 'container starting job submitted'},
@@ -242,35 +259,111 @@ class ContainerStopAPIView(
 
     @transaction.atomic
     def get(self, request, *args, **kwargs):
-        project = self.get_project()
         container = Container.objects.get(sodar_uuid=kwargs.get('container'))
+        _job, created = submit_container_job(
+            container,
+            ACTION_STOP,
+            request.user,
+            'Stop container',
+            countdown=CELERY_SUBMIT_COUNTDOWN,
+        )
 
-        bg_job = BackgroundJob.objects.create(
-            name='Stop container',
-            project=project,
-            job_type=ContainerBackgroundJob.spec_name,
-            user=request.user,
+        # Add container log entry, unless coalesced into a pending job
+        if created:
+            container.log_entries.create(
+                text='Stop [API]',
+                process=PROCESS_ACTION,
+                user=request.user,
+            )
+
+        return JsonResponse(
+            {'message': 'container stopping job submitted'},
+            status=status.HTTP_200_OK,
         )
-        job = ContainerBackgroundJob.objects.create(
-            action=ACTION_STOP,
-            project=project,
-            container=container,
-            bg_job=bg_job,
+
+
+class ContainerBulkActionAPIView(
+    ContainersAPIVersioningMixin,
+    SODARAPIGenericProjectMixin,
+    APIView,
+):
+    """Submit an action for many containers of a project at once."""
+
+    def get_permission_required(self):
+        # Unknown actions are rejected by the serializer
+        action = (
+            self.request.data.get('action')
+            if isinstance(self.request.data, dict)
+            else None
         )
+        return BULK_ACTION_PERMISSIONS.get(action, 'containers.edit_container')
 
-        # Add container log entry
-        container.log_entries.create(
-            text='Stop [API]',
-            process=PROCESS_ACTION,
-            user=request.user,
+    def post(self, request, *args, **kwargs):
+        serializer = ContainerBulkActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        action = serializer.validated_data['action']
+        project = self.get_project()
+        containers = Container.objects.filter(project=project)
+
+        if 'containers' in serializer.validated_data:
+            containers = containers.filter(
+                sodar_uuid__in=serializer.validated_data['containers']
+            )
+
+        if 'state' in serializer.validated_data:
+            containers = containers.filter(
+                state=serializer.validated_data['state']
+            )
+
+        batch = submit_container_jobs(
+            project,
+            containers,
+            action,
+            request.user,
+            f'{action.capitalize()} container',
+            f'{action.capitalize()} [API bulk]',
         )
 
-        # Schedule task
-        container_task.apply_async(
-            kwargs={'job_id': job.id}, countdown=CELERY_SUBMIT_COUNTDOWN
+        return Response(
+            ContainerBatchJobSerializer(batch).data,
+            status=status.HTTP_202_ACCEPTED,
         )
 
-        return JsonResponse(
-            {'message': 'container stopping job submitted'},
-            status=status.HTTP_200_OK,
+
+class ContainerBatchJobAPIView(
+    ContainersAPIVersioningMixin,
+    SODARAPIGenericProjectMixin,
+    RetrieveAPIView,
+):
+    """Return the progress of a bulk action."""
+
+    serializer_class = ContainerBatchJobSerializer
+    lookup_url_kwarg = 'containerbatchjob'
+    lookup_field = 'sodar_uuid'
+    permission_required = 'containers.view_container'
+
+
+class ContainerResourceUsageAPIView(
+    ContainersAPIVersioningMixin,
+    SODARAPIGenericProjectMixin,
+    ListAPIView,
+):
+    serializer_class = ContainerResourceUsageSerializer
+    lookup_url_kwarg = 'container'
+    lookup_field = 'sodar_uuid'
+    permission_required = 'containers.view_container'
+
+    def get_queryset(self):
+        container = get_object_or_404(
+            Container,
+            project=self.get_project(),
+            sodar_uuid=self.kwargs.get('container'),
+        )
+        hours = get_resource_usage_hours(
+            self.request.query_params.get('hours', DEFAULT_RESOURCE_USAGE_HOURS)
         )
+
+        if hours is None:
+            raise ValidationError({'hours': 'Must be a positive integer'})
+
+        return container.get_resource_usage(hours)
@@ -20,6 +20,14 @@ fields = [
     'tag',
     'max_retries',
     'inactivity_threshold',
+    'inactivity_pause_threshold',
+    'inactivity_delete_threshold',
+    'cpu_limit',
+    'memory_limit',
+    'pids_limit',
+    'replicas',
+    'schedule_start',
+    'schedule_stop',
 ]
 
 
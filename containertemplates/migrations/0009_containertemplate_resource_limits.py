@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        (
+            'containertemplates',
+            '0008_containertemplate_inactivity_pause_delete_threshold',
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='containertemplateproject',
+            name='cpu_limit',
+            field=models.FloatField(
+                blank=True,
+                help_text='Number of CPUs the container is allowed to use, e.g. 0.5 (empty for no limit).',
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name='containertemplateproject',
+            name='memory_limit',
+            field=models.IntegerField(
+                blank=True,
+                help_text='Memory in MB the container is allowed to use (empty for no limit).',
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name='containertemplateproject',
+            name='pids_limit',
+            field=models.IntegerField(
+                blank=True,
+                help_text='Number of processes the container is allowed to run (empty for no limit).',
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name='containertemplatesite',
+            name='cpu_limit',
+            field=models.FloatField(
+                blank=True,
+                help_text='Number of CPUs the container is allowed to use, e.g. 0.5 (empty for no limit).',
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name='containertemplatesite',
+            name='memory_limit',
+            field=models.IntegerField(
+                blank=True,
+                help_text='Memory in MB the container is allowed to use (empty for no limit).',
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name='containertemplatesite',
+            name='pids_limit',
+            field=models.IntegerField(
+                blank=True,
+                help_text='Number of processes the container is allowed to run (empty for no limit).',
+                null=True,
+            ),
+        ),
+    ]
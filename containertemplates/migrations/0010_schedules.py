@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:13
+
+import containers.schedules
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('containertemplates', '0009_containertemplate_resource_limits'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='containertemplateproject',
+            name='schedule_start',
+            field=models.CharField(
+                blank=True,
+                help_text='Schedule in crontab notation (minute hour day-of-month month day-of-week) when the container is started, e.g. "0 8 * * 1-5" (empty to disable).',
+                max_length=128,
+                null=True,
+                validators=[containers.schedules.validate_schedule],
+            ),
+        ),
+        migrations.AddField(
+            model_name='containertemplateproject',
+            name='schedule_stop',
+            field=models.CharField(
+                blank=True,
+                help_text='Schedule in crontab notation (minute hour day-of-month month day-of-week) when the container is stopped, e.g. "0 17 * * 1-5" (empty to disable).',
+                max_length=128,
+                null=True,
+                validators=[containers.schedules.validate_schedule],
+            ),
+        ),
+        migrations.AddField(
+            model_name='containertemplatesite',
+            name='schedule_start',
+            field=models.CharField(
+                blank=True,
+                help_text='Schedule in crontab notation (minute hour day-of-month month day-of-week) when the container is started, e.g. "0 8 * * 1-5" (empty to disable).',
+                max_length=128,
+                null=True,
+                validators=[containers.schedules.validate_schedule],
+            ),
+        ),
+        migrations.AddField(
+            model_name='containertemplatesite',
+            name='schedule_stop',
+            field=models.CharField(
+                blank=True,
+                help_text='Schedule in crontab notation (minute hour day-of-month month day-of-week) when the container is stopped, e.g. "0 17 * * 1-5" (empty to disable).',
+                max_length=128,
+                null=True,
+                validators=[containers.schedules.validate_schedule],
+            ),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:14
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('containertemplates', '0010_schedules'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='containertemplateproject',
+            name='replicas',
+            field=models.PositiveIntegerField(
+                blank=True,
+                default=1,
+                help_text='Number of Docker containers started for the container, requests are balanced across them.',
+                null=True,
+                validators=[django.core.validators.MinValueValidator(1)],
+            ),
+        ),
+        migrations.AddField(
+            model_name='containertemplatesite',
+            name='replicas',
+            field=models.PositiveIntegerField(
+                blank=True,
+                default=1,
+                help_text='Number of Docker containers started for the container, requests are balanced across them.',
+                null=True,
+                validators=[django.core.validators.MinValueValidator(1)],
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:52
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('containertemplates', '0011_replicas'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='containertemplateproject',
+            name='replicas',
+            field=models.PositiveIntegerField(
+                default=1,
+                help_text='Number of Docker containers started for the container, requests are balanced across them.',
+                validators=[django.core.validators.MinValueValidator(1)],
+            ),
+        ),
+        migrations.AlterField(
+            model_name='containertemplatesite',
+            name='replicas',
+            field=models.PositiveIntegerField(
+                default=1,
+                help_text='Number of Docker containers started for the container, requests are balanced across them.',
+                validators=[django.core.validators.MinValueValidator(1)],
+            ),
+        ),
+    ]
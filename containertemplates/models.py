@@ -3,12 +3,15 @@ import uuid
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.db.models import JSONField, Q, QuerySet
 from django.urls import reverse
 from django.utils.timezone import localtime
 from projectroles.models import Project
 
+from containers.schedules import validate_schedule
+
 
 class ContainerTemplateBase(models.Model):
     """Base model for a ContainerTemplate* instances."""
@@ -125,6 +128,66 @@ class ContainerTemplateBase(models.Model):
         default=settings.KIOSC_DOCKER_MAX_INACTIVITY,
     )
 
+    #: Number of minutes the container can run without proxy access before it is paused
+    inactivity_pause_threshold = models.IntegerField(
+        help_text='Number of minutes the container is allowed to run without proxy access before it is paused (empty to disable).',
+        blank=True,
+        null=True,
+    )
+
+    #: Number of days the container can be stopped without proxy access before it is removed from Docker
+    inactivity_delete_threshold = models.IntegerField(
+        help_text='Number of days the container is allowed to be stopped without proxy access before it is removed from Docker (empty to disable).',
+        blank=True,
+        null=True,
+    )
+
+    #: Number of CPUs the container may use
+    cpu_limit = models.FloatField(
+        help_text='Number of CPUs the container is allowed to use, e.g. 0.5 (empty for no limit).',
+        blank=True,
+        null=True,
+    )
+
+    #: Memory the container may use in MB
+    memory_limit = models.IntegerField(
+        help_text='Memory in MB the container is allowed to use (empty for no limit).',
+        blank=True,
+        null=True,
+    )
+
+    #: Number of processes the container may run
+    pids_limit = models.IntegerField(
+        help_text='Number of processes the container is allowed to run (empty for no limit).',
+        blank=True,
+        null=True,
+    )
+
+    #: Number of Docker containers serving the container
+    replicas = models.PositiveIntegerField(
+        help_text='Number of Docker containers started for the container, requests are balanced across them.',
+        default=1,
+        validators=[MinValueValidator(1)],
+    )
+
+    #: Schedule in crontab notation when the container is started
+    schedule_start = models.CharField(
+        max_length=128,
+        help_text='Schedule in crontab notation (minute hour day-of-month month day-of-week) when the container is started, e.g. "0 8 * * 1-5" (empty to disable).',
+        blank=True,
+        null=True,
+        validators=[validate_schedule],
+    )
+
+    #: Schedule in crontab notation when the container is stopped
+    schedule_stop = models.CharField(
+        max_length=128,
+        help_text='Schedule in crontab notation (minute hour day-of-month month day-of-week) when the container is stopped, e.g. "0 17 * * 1-5" (empty to disable).',
+        blank=True,
+        null=True,
+        validators=[validate_schedule],
+    )
+
     def __str__(self):
         return self.title
 
@@ -15,6 +15,7 @@ class TestContainerTemplateSiteForm(TestBase):
         super().setUp()
         self.form_data_min = {
             'title': 'some title',
+            'replicas': 1,
         }
         self.form_data_all = {
             **self.form_data_min,
@@ -52,6 +53,7 @@ class TestContainerTemplateProjectForm(TestBase):
         super().setUp()
         self.form_data_min = {
             'title': 'some title',
+            'replicas': 1,
             'project': self.project,
         }
         self.form_data_all = {
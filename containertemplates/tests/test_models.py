@@ -38,6 +38,14 @@ class TestContainerTemplateSiteModel(TestBase):
             'sodar_uuid': containertemplate.sodar_uuid,
             'max_retries': containertemplate.max_retries,
             'inactivity_threshold': containertemplate.inactivity_threshold,
+            'inactivity_pause_threshold': None,
+            'inactivity_delete_threshold': None,
+            'cpu_limit': None,
+            'memory_limit': None,
+            'pids_limit': None,
+            'replicas': 1,
+            'schedule_start': None,
+            'schedule_stop': None,
         }
         self.assertEqual(model_to_dict(containertemplate), expected)
 
@@ -157,6 +165,14 @@ class TestContainerTemplateProjectModel(TestBase):
             'max_retries': containertemplate.max_retries,
             'project': self.project.pk,
             'inactivity_threshold': containertemplate.inactivity_threshold,
+            'inactivity_pause_threshold': None,
+            'inactivity_delete_threshold': None,
+            'cpu_limit': None,
+            'memory_limit': None,
+            'pids_limit': None,
+            'replicas': 1,
+            'schedule_start': None,
+            'schedule_stop': None,
         }
         self.assertEqual(model_to_dict(containertemplate), expected)
 
@@ -67,6 +67,7 @@ class TestContainerTemplateSiteCreateView(TestBase):
     def test_post_success_min_fields(self):
         post_data = {
             'title': 'some other title',
+            'replicas': 1,
         }
 
         with self.login(self.superuser):
@@ -106,6 +107,7 @@ class TestContainerTemplateSiteCreateView(TestBase):
             'heartbeat_url': 'https://heartbeat.url',
             'command': 'some command',
             'max_retries': 10,
+            'replicas': 1,
         }
 
         with self.login(self.superuser):
@@ -233,6 +235,7 @@ class TestContainerTemplateSiteUpdateView(TestBase):
     def test_post_success_min_fields(self):
         post_data = {
             'title': 'updated title',
+            'replicas': 1,
         }
 
         with self.login(self.superuser):
@@ -279,6 +282,7 @@ class TestContainerTemplateSiteUpdateView(TestBase):
             'heartbeat_url': 'https://updated.url',
             'command': 'updated command',
             'max_retries': 13,
+            'replicas': 1,
         }
 
         with self.login(self.superuser):
@@ -323,6 +327,7 @@ class TestContainerTemplateSiteUpdateView(TestBase):
             'container_port': 443,
             'timeout': 99,
             'max_retries': 10,
+            'replicas': 1,
         }
 
         with self.login(self.superuser):
@@ -535,6 +540,7 @@ class TestContainerTemplateProjectCreateView(TestBase):
         post_data = {
             'title': 'some other title',
             'project': self.project.pk,
+            'replicas': 1,
         }
 
         with self.login(self.superuser):
@@ -579,6 +585,7 @@ class TestContainerTemplateProjectCreateView(TestBase):
             'heartbeat_url': 'https://heartbeat.url',
             'command': 'some command',
             'max_retries': 10,
+            'replicas': 1,
         }
 
         with self.login(self.superuser):
@@ -715,6 +722,7 @@ class TestContainerTemplateProjectUpdateView(TestBase):
         post_data = {
             'title': 'updated title',
             'project': self.project.pk,
+            'replicas': 1,
         }
 
         with self.login(self.superuser):
@@ -763,6 +771,7 @@ class TestContainerTemplateProjectUpdateView(TestBase):
             'heartbeat_url': 'https://updated.url',
             'command': 'updated command',
             'max_retries': 13,
+            'replicas': 1,
         }
 
         with self.login(self.superuser):
@@ -808,6 +817,7 @@ class TestContainerTemplateProjectUpdateView(TestBase):
             'container_port': 443,
             'timeout': 99,
             'max_retries': 10,
+            'replicas': 1,
         }
 
         with self.login(self.superuser):
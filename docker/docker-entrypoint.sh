@@ -6,6 +6,10 @@ set -euo pipefail
 #
 #   asgi            -- run daphne with Django ASGI
 #   celeryd         -- run celery worker
+#   celeryd-interactive -- run celery worker for the interactive queue
+#   celeryd-bulk    -- run celery worker for the bulk queue
+#   celeryd-maintenance -- run celery worker for the default and maintenance
+#                      queues
 #   celerybeat      -- run celerybeat daemon
 #
 # Environment Variables:
@@ -13,9 +17,15 @@ set -euo pipefail
 #   APP_DIR         -- path to application directory
 #                      default: "/usr/src/app"
 #   CELERY_QUEUES   -- argument for Celery queues
-#                      default: "default,query,import" (all)
+#                      default: "default,interactive,bulk,maintenance" (all)
 #   CELERY_WORKERS  -- celery concurrency/process count
 #                      default: "8"
+#   CELERY_WORKERS_INTERACTIVE -- concurrency of celeryd-interactive
+#                      default: "8"
+#   CELERY_WORKERS_BULK -- concurrency of celeryd-bulk
+#                      default: "2"
+#   CELERY_WORKERS_MAINTENANCE -- concurrency of celeryd-maintenance
+#                      default: "2"
 #
 #   NO_WAIT         -- skip waiting for servers
 #                      default: "0"
@@ -34,8 +44,11 @@ set -euo pipefail
 #                      default: 4
 
 APP_DIR=${APP_DIR-/usr/src/app}
-CELERY_QUEUES=${CELERY_QUEUES-default,query,import}
+CELERY_QUEUES=${CELERY_QUEUES-default,interactive,bulk,maintenance}
 CELERY_WORKERS=${CELERY_WORKERS-8}
+CELERY_WORKERS_INTERACTIVE=${CELERY_WORKERS_INTERACTIVE-8}
+CELERY_WORKERS_BULK=${CELERY_WORKERS_BULK-2}
+CELERY_WORKERS_MAINTENANCE=${CELERY_WORKERS_MAINTENANCE-2}
 NO_WAIT=${NO_WAIT-0}
 export WAIT_HOSTS=${WAIT_HOSTS-postgres:5432, redis:6379}
 export PYTHONUNBUFFERED=${PYTHONUNBUFFERED-1}
@@ -75,6 +88,36 @@ elif [[ "$1" == celeryd ]]; then
     -Q "${CELERY_QUEUES}" \
     --concurrency "${CELERY_WORKERS}" \
     --loglevel info
+elif [[ "$1" == celeryd-interactive ]]; then
+  cd $APP_DIR
+
+  exec celery \
+    --app config.celery_app \
+    worker \
+    -n "interactive@%h" \
+    -Q interactive \
+    --concurrency "${CELERY_WORKERS_INTERACTIVE}" \
+    --loglevel info
+elif [[ "$1" == celeryd-bulk ]]; then
+  cd $APP_DIR
+
+  exec celery \
+    --app config.celery_app \
+    worker \
+    -n "bulk@%h" \
+    -Q bulk \
+    --concurrency "${CELERY_WORKERS_BULK}" \
+    --loglevel info
+elif [[ "$1" == celeryd-maintenance ]]; then
+  cd $APP_DIR
+
+  exec celery \
+    --app config.celery_app \
+    worker \
+    -n "maintenance@%h" \
+    -Q default,maintenance \
+    --concurrency "${CELERY_WORKERS_MAINTENANCE}" \
+    --loglevel info
 elif [[ "$1" == celerybeat ]]; then
   cd $APP_DIR
   rm -f celerybeat.pid
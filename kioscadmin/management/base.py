@@ -0,0 +1,69 @@
+"""Base class for management commands operating on many containers."""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from containers.models import Container
+
+
+#: Default number of containers processed in parallel.
+DEFAULT_WORKERS = 4
+
+
+class ContainerCommand(BaseCommand):
+    """Base class for commands processing a selection of containers.
+
+    Provides the ``--project``, ``--older-than`` and ``--workers`` options
+    and progress output.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--project',
+            help='Only process containers of the project with this UUID',
+        )
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            metavar='DAYS',
+            help='Only process containers not modified for more than this '
+            'number of days',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=DEFAULT_WORKERS,
+            help='Number of containers processed in parallel '
+            f'(default: {DEFAULT_WORKERS})',
+        )
+
+    def get_queryset(self, options, **filters):
+        """Return the containers selected by the command line options.
+
+        :param options: Command options
+        :param filters: Additional filters for the queryset
+        :return: QuerySet of Container objects
+        """
+        queryset = (
+            Container.objects.filter(**filters)
+            .exclude(container_id__isnull=True)
+            .exclude(container_id='')
+        )
+
+        if options['project']:
+            queryset = queryset.filter(project__sodar_uuid=options['project'])
+
+        if options['older_than'] is not None:
+            queryset = queryset.filter(
+                date_modified__lt=timezone.now()
+                - timedelta(days=options['older_than'])
+            )
+
+        return queryset.select_related('project').order_by('pk')
+
+    def write_progress(self, current, total, msg, style=None):
+        """Write a progress message to stdout."""
+        style = style or self.style.NOTICE
+        self.stdout.write(style(f'[{current}/{total}] {msg}'))
@@ -0,0 +1,17 @@
+"""Django command for recounting the containers of projects and categories."""
+
+from django.core.management.base import BaseCommand
+
+from containers.models import ProjectContainerStats
+
+
+class Command(BaseCommand):
+    """Implementation for rebuilding the container counters."""
+
+    #: Help message displayed on the command line.
+    help = 'Recount the containers per state of all projects and categories.'
+
+    def handle(self, *args, **options):
+        """Perform rebuilding the container counters."""
+        ProjectContainerStats.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS('Command successfully finished'))
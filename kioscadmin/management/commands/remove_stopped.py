@@ -1,110 +1,125 @@
 """Django command for removing stopped containers."""
 
-from django.core.management.base import BaseCommand
-from django.db import transaction
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from bgjobs.models import BackgroundJob
+import docker.errors
 from django.conf import settings
-from containers.models import (
-    Container,
-    STATE_EXITED,
-    ContainerBackgroundJob,
-    ACTION_DELETE,
-    PROCESS_ACTION,
-)
+
+from containers.models import STATE_EXITED
 from containers.statemachines import connect_docker
-from containers.tasks import container_task
+from containers.tasks import (
+    get_docker_states,
+    get_timeline_event,
+    submit_timeline_events,
+)
 from kiosc.users.models import User
-from projectroles.plugins import PluginAPI
+from kioscadmin.management.base import ContainerCommand
 
 
-plugin_api = PluginAPI()
+class Command(ContainerCommand):
+    """Implementation for removing stopped containers.
 
-
-class Command(BaseCommand):
-    """Implementation for removing stopped containers."""
+    The Docker containers are removed in parallel, the container objects are
+    deleted one by one as the removals finish, so an interrupted run keeps
+    the work done so far.
+    """
 
     #: Help message displayed on the command line.
     help = 'Remove stopped containers.'
 
     def add_arguments(self, parser):
+        super().add_arguments(parser)
         parser.add_argument(
             '--remove',
             help='Activate this flag to perform the removal',
             action='store_true',
         )
 
-    @transaction.atomic
     def handle(self, *args, **options):
         """Perform removing stopped containers."""
-
-        if options['remove']:
-            msg_fin = 'Command successfully finished'
-
-        else:
-            msg_fin = 'Command successfully finished (dry-run)'
-
         cli = connect_docker()
+        containers = list(self.get_queryset(options, state=STATE_EXITED))
+        docker_states = get_docker_states(cli, containers)
+
+        # Double check if state is really EXITED
+        containers = [
+            container
+            for container in containers
+            if docker_states.get(container.container_id) == STATE_EXITED
+        ]
+        total = len(containers)
+
+        if not options['remove']:
+            for i, container in enumerate(containers, 1):
+                self.write_progress(
+                    i, total, '{} would be removed'.format(container.title)
+                )
+
+            self.stdout.write(
+                self.style.SUCCESS('Command successfully finished (dry-run)')
+            )
+            return
+
         user = User.objects.filter(
             username=settings.PROJECTROLES_DEFAULT_ADMIN
         ).first()
-
-        for container in Container.objects.filter(state=STATE_EXITED):
-            if container.container_id:
-                timeline = plugin_api.get_backend_api('timeline_backend')
-                container_info = cli.inspect_container(container.container_id)
-                state = container_info.get('State', {}).get('Status')
-                project = container.project
-
-                # Double check if state is really EXITED
-                if not state == STATE_EXITED:
-                    continue
-
-                if options['remove']:
-                    bg_job = BackgroundJob.objects.create(
-                        name='Delete container',
-                        project=project,
-                        job_type=ContainerBackgroundJob.spec_name,
-                        user=user,
-                    )
-                    job = ContainerBackgroundJob.objects.create(
-                        action=ACTION_DELETE,
-                        project=project,
-                        container=container,
-                        bg_job=bg_job,
+        tl_events = []
+
+        def _get_docker_ids(container):
+            docker_ids = [container.container_id]
+
+            if container.replicas > 1:
+                docker_ids += container.replica_set.exclude(
+                    docker_id=''
+                ).values_list('docker_id', flat=True)
+
+            return docker_ids
+
+        def _remove(docker_ids):
+            for docker_id in docker_ids:
+                try:
+                    cli.remove_container(docker_id, force=True)
+
+                except docker.errors.NotFound:
+                    pass
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {
+                executor.submit(_remove, _get_docker_ids(container)): container
+                for container in containers
+            }
+
+            for i, future in enumerate(as_completed(futures), 1):
+                container = futures[future]
+
+                try:
+                    future.result()
+
+                except docker.errors.DockerException as e:
+                    self.write_progress(
+                        i,
+                        total,
+                        '{} could not be removed: {}'.format(
+                            container.title, e
+                        ),
+                        style=self.style.ERROR,
                     )
+                    continue
 
-                    # Add container log entry
-                    container.log_entries.create(
-                        text='Delete',
-                        process=PROCESS_ACTION,
+                tl_events.append(
+                    get_timeline_event(
+                        project=container.project,
                         user=user,
+                        event_name='delete_container',
+                        description=f'deleted {container.get_display_name()}',
+                        status_type='OK',
                     )
-
-                    container_task(job_id=job.id)
-
-                    # Add timeline event
-                    if timeline:
-                        timeline.add_event(
-                            project=project,
-                            app_name='kioscadmin',
-                            user=user,
-                            event_name='delete_container',
-                            description=f'deleted {container.get_display_name()}',
-                            status_type=timeline.TL_STATUS_OK,
-                        )
-
-                    container.delete()
-
-                    self.stdout.write(
-                        self.style.NOTICE('{} removed'.format(container.title))
-                    )
-
-                else:
-                    self.stdout.write(
-                        self.style.NOTICE(
-                            '{} would be removed'.format(container.title)
-                        )
-                    )
-
-        self.stdout.write(self.style.SUCCESS(msg_fin))
+                )
+                container.delete()
+                self.write_progress(
+                    i, total, '{} removed'.format(container.title)
+                )
+
+        # The timeline events are written in one background task
+        submit_timeline_events(tl_events, app_name='kioscadmin')
+        self.stdout.write(self.style.SUCCESS('Command successfully finished'))
@@ -1,62 +1,73 @@
 """Django command for stopping all containers."""
 
-import docker.errors
+from itertools import groupby
+
 from django.conf import settings
-from django.core.management.base import BaseCommand
-from django.db import transaction
 
-from bgjobs.models import BackgroundJob
-from containers.models import Container, ContainerBackgroundJob, ACTION_STOP
+from containers.models import Container, ACTION_STOP
 from containers.statemachines import connect_docker
 from kiosc.users.models import User
-from containers.tasks import container_task
+from containers.tasks import get_docker_states, submit_container_jobs
+from kioscadmin.management.base import ContainerCommand
+
 
+class Command(ContainerCommand):
+    """Implementation for stopping all containers.
 
-class Command(BaseCommand):
-    """Implementation for stopping all containers."""
+    The stop jobs are submitted in bulk per project and processed by the
+    workers of the bulk queue, at most ``--workers`` jobs of a project at
+    once.
+    """
 
     #: Help message displayed on the command line.
     help = 'Stop containers all containers.'
 
-    @transaction.atomic
     def handle(self, *args, **options):
         """Perform stopping all containers."""
 
         msg_fin = 'Command successfully finished'
         cli = connect_docker()
         user = User.objects.get(username=settings.PROJECTROLES_DEFAULT_ADMIN)
+        containers = list(self.get_queryset(options).order_by('project', 'pk'))
+        docker_states = get_docker_states(cli, containers)
+
+        # Skip containers that don't exist in Docker
+        containers = [
+            container
+            for container in containers
+            if container.container_id in docker_states
+        ]
+        total = len(containers)
+        current = 0
+
+        for project, project_containers in groupby(
+            containers, key=lambda c: c.project
+        ):
+            project_containers = list(project_containers)
+            batch = submit_container_jobs(
+                project,
+                Container.objects.filter(
+                    pk__in=[c.pk for c in project_containers]
+                ),
+                ACTION_STOP,
+                user,
+                'Stop container',
+                'Stop',
+                workers=options['workers'],
+            )
+            submitted = set(batch.jobs.values_list('container_id', flat=True))
+
+            for container in project_containers:
+                current += 1
+
+                if container.pk in submitted:
+                    msg = '{} stopped'.format(container.title)
+
+                else:
+                    msg = '{} already has a pending stop job'.format(
+                        container.title
+                    )
 
-        for container in Container.objects.all():
-            if not container.container_id:
-                continue
-
-            # Check if container exists
-            try:
-                cli.inspect_container(container.container_id)
-
-            except docker.errors.NotFound:
-                continue
-
-            else:
-                bg_job = BackgroundJob.objects.create(
-                    name='Stop container',
-                    project=container.project,
-                    job_type=ContainerBackgroundJob.spec_name,
-                    user=user,
-                )
-                job = ContainerBackgroundJob.objects.create(
-                    action=ACTION_STOP,
-                    project=container.project,
-                    container=container,
-                    bg_job=bg_job,
-                )
-
-                container_task.apply_async(
-                    kwargs={'job_id': job.id}, countdown=0.5
-                )
-
-                self.stdout.write(
-                    self.style.NOTICE('{} stopped'.format(container.title))
-                )
+                self.write_progress(current, total, msg)
 
         self.stdout.write(self.style.SUCCESS(msg_fin))
@@ -1,7 +1,6 @@
 """Django command for stopping unused containers."""
 
 from django.core.management.base import BaseCommand
-from django.db import transaction
 
 from kioscadmin.tasks import stop_inactive_containers
 
@@ -12,7 +11,6 @@ class Command(BaseCommand):
     #: Help message displayed on the command line.
     help = "Stop containers that haven't been accessed via proxy for a defined time period."
 
-    @transaction.atomic
     def handle(self, *args, **options):
         """Perform stopping unused containers."""
 
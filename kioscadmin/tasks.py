@@ -1,20 +1,37 @@
 import logging
-from datetime import timedelta
+import random
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 
 import docker
 import docker.errors
 import dateutil.parser
 
-from bgjobs.models import BackgroundJob
+from bgjobs.models import JOB_STATE_FAILED
 from celery.schedules import crontab
 from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import Avg, Max, Q
+from django.db.models.functions import TruncHour
 
 from django.utils import timezone
 
-from containers.tasks import container_task, sync_container_state
+from containers.tasks import (
+    container_task,
+    get_container_task_options,
+    get_docker_states,
+    submit_container_job,
+    submit_container_jobs,
+    sync_container_state,
+    sync_replica_states,
+)
 from projectroles.models import SODAR_CONSTANTS
 
-from config.celery import app
+from config.celery import app, QUEUE_BULK
 from django.contrib import auth
 
 # Projectroles dependency
@@ -22,20 +39,32 @@ from projectroles.app_settings import AppSettingAPI
 
 from containers.models import (
     Container,
-    ContainerBackgroundJob,
+    ContainerActionJournal,
+    ContainerResourceUsage,
+    RESOLUTION_RAW,
+    RESOLUTION_HOURLY,
     STATE_FAILED,
     STATE_INITIAL,
     STATE_DELETED,
     PROCESS_TASK,
     PROCESS_DOCKER,
+    LOG_LEVEL_ERROR,
     LOG_LEVEL_WARNING,
     PROCESS_PROXY,
     STATE_RUNNING,
     STATE_PAUSED,
+    STATE_EXITED,
+    STATE_DEAD,
+    ACTION_START,
     ACTION_STOP,
+    ACTION_PAUSE,
+    ACTION_DELETE,
 )
+from containers.quotas import STATES_ACTIVE
+from containers.schedules import get_last_due
 from containers.statemachines import (
     connect_docker,
+    get_instance_filter,
     ACTION_TO_EXPECTED_STATE,
 )
 
@@ -47,44 +76,92 @@ logger = logging.getLogger(__name__)
 APP_NAME = 'kioscadmin'
 DEFAULT_GRACE_PERIOD_CONTAINER_STATUS = 180
 
+#: Cache key of the Docker snapshot shown in the admin view.
+DOCKER_SNAPSHOT_CACHE_KEY = 'kioscadmin.docker_snapshot'
+
 # SODAR constants
 SITE_MODE_TARGET = SODAR_CONSTANTS['SITE_MODE_TARGET']
 SITE_MODE_SOURCE = SODAR_CONSTANTS['SITE_MODE_SOURCE']
 
 
+def _get_last_access(container):
+    """Return the date of the last proxy access of a container or ``None``."""
+    obj = (
+        container.log_entries.filter(process=PROCESS_PROXY)
+        .order_by('-date_created')
+        .first()
+    )
+    return obj.date_created if obj else None
+
+
+def _submit_inactivity_job(container, action, name):
+    """Submit a background job for ``action`` on behalf of the default admin."""
+    submit_container_job(
+        container,
+        action,
+        User.objects.get(username=settings.PROJECTROLES_DEFAULT_ADMIN),
+        name,
+        countdown=0.5,
+        queue=QUEUE_BULK,
+    )
+
+
+@app.task(bind=True)
+def pause_inactive_containers(_self):
+    """Pause running containers that exceeded their pause threshold.
+
+    Pausing freezes the container processes via the cgroup freezer, so
+    resuming only requires an ``unpause`` instead of a full re-creation.
+    """
+    msgs = []
+
+    for container in Container.objects.filter(
+        state=STATE_RUNNING, inactivity_pause_threshold__isnull=False
+    ):
+        if not container.container_id:
+            continue
+
+        last_access = _get_last_access(container)
+
+        if not last_access:
+            continue
+
+        threshold = last_access + timedelta(
+            minutes=container.inactivity_pause_threshold
+        )
+
+        if threshold < timezone.now():
+            _submit_inactivity_job(container, ACTION_PAUSE, 'Pause container')
+            msgs.append('Submitted job to pause {}'.format(container.title))
+
+    return msgs
+
+
 @app.task(bind=True)
 def stop_inactive_containers(_self):
     cli = connect_docker()
     msgs = []
+    containers = list(Container.objects.all())
+    docker_states = get_docker_states(cli, containers)
 
-    for container in Container.objects.all():
+    for container in containers:
         if not container.container_id:
             continue
 
         # Check if container exists
-        try:
-            data = cli.inspect_container(container.container_id)
-
-        except docker.errors.NotFound:
+        if container.container_id not in docker_states:
             continue
 
         else:
-            state = data.get('State', {}).get('Status')
+            state = docker_states[container.container_id]
 
             if not state or state not in (STATE_RUNNING, STATE_PAUSED):
                 continue
 
             # Get latest proxy entry
-            obj = (
-                container.log_entries.filter(process=PROCESS_PROXY)
-                .order_by('-date_created')
-                .first()
-            )
+            last_access = _get_last_access(container)
 
-            if obj:
-                last_access = obj.date_created
-
-            else:
+            if not last_access:
                 continue
 
             threshold = last_access + timedelta(
@@ -95,26 +172,35 @@ def stop_inactive_containers(_self):
             )
 
             if threshold < timezone.now():
-                bg_job = BackgroundJob.objects.create(
-                    name='Stop container',
-                    project=container.project,
-                    job_type=ContainerBackgroundJob.spec_name,
-                    user=User.objects.get(
-                        username=settings.PROJECTROLES_DEFAULT_ADMIN
-                    ),
-                )
-                job = ContainerBackgroundJob.objects.create(
-                    action=ACTION_STOP,
-                    project=container.project,
-                    container=container,
-                    bg_job=bg_job,
-                )
+                _submit_inactivity_job(container, ACTION_STOP, 'Stop container')
+                msgs.append('Submitted job to stop {}'.format(container.title))
 
-                container_task.apply_async(
-                    kwargs={'job_id': job.id}, countdown=0.5
-                )
+    return msgs
 
-                msgs.append('Submitted job to stop {}'.format(container.title))
+
+@app.task(bind=True)
+def remove_inactive_containers(_self):
+    """Remove the Docker containers of stopped containers that exceeded their
+    delete threshold. The container objects themselves are kept and can be
+    started again.
+    """
+    msgs = []
+
+    for container in Container.objects.filter(
+        state=STATE_EXITED, inactivity_delete_threshold__isnull=False
+    ):
+        last_access = _get_last_access(container)
+
+        if not last_access:
+            continue
+
+        threshold = last_access + timedelta(
+            days=container.inactivity_delete_threshold
+        )
+
+        if threshold < timezone.now():
+            _submit_inactivity_job(container, ACTION_DELETE, 'Delete container')
+            msgs.append('Submitted job to delete {}'.format(container.title))
 
     return msgs
 
@@ -122,9 +208,12 @@ def stop_inactive_containers(_self):
 @app.task(bind=True)
 def poll_docker_status_and_logs(_self):
     cli = connect_docker()
+    containers = list(Container.objects.all())
+    docker_states = get_docker_states(cli, containers)
+    sync_replica_states(docker_states)
 
-    for container in Container.objects.all():
-        sync_container_state(container)
+    for container in containers:
+        sync_container_state(container, docker_states)
         container.refresh_from_db()
         if not container.container_id:
             continue
@@ -173,11 +262,64 @@ def poll_docker_status_and_logs(_self):
             )
 
 
+def get_retry_delay(retries):
+    """Return the seconds to wait before retrying an action.
+
+    The delay doubles with every retry up to ``KIOSC_RETRY_BACKOFF_MAX``, the
+    second half of it is random, so containers failing at the same time are
+    not retried all at once.
+
+    :param retries: Number of retries so far
+    :return: Delay in seconds
+    """
+    delay = min(
+        settings.KIOSC_RETRY_BACKOFF * 2**retries,
+        settings.KIOSC_RETRY_BACKOFF_MAX,
+    )
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def record_crash(container, now):
+    """Count a crash of a container and park it if it keeps crashing.
+
+    :param container: Container object that exited unexpectedly
+    :param now: Current datetime
+    :return: True if the container was parked
+    """
+    if container.date_last_crash and container.date_last_crash > now - (
+        timedelta(seconds=settings.KIOSC_CRASH_LOOP_WINDOW)
+    ):
+        container.crash_count += 1
+
+    else:
+        container.crash_count = 1
+
+    container.date_last_crash = now
+    container.parked = container.crash_count >= settings.KIOSC_CRASH_LOOP_LIMIT
+    container.save(update_fields=['crash_count', 'date_last_crash', 'parked'])
+
+    if container.parked:
+        logger.warning(
+            '%s: Container parked after crashes.', container.sodar_uuid
+        )
+        container.log_entries.create(
+            text=f'Container exited {container.crash_count} times within '
+            f'{settings.KIOSC_CRASH_LOOP_WINDOW} seconds, it is not restarted '
+            'until the next action',
+            level=LOG_LEVEL_ERROR,
+            process=PROCESS_TASK,
+        )
+
+    return container.parked
+
+
 @app.task(bind=True)
 def sync_container_state_with_last_user_action(_self):
     cli = connect_docker()
+    containers = list(Container.objects.select_related('last_job'))
+    docker_states = get_docker_states(cli, containers)
 
-    for container in Container.objects.all():
+    for container in containers:
         if not container.container_id:
             if container.state not in (
                 STATE_INITIAL,
@@ -191,19 +333,20 @@ def sync_container_state_with_last_user_action(_self):
                 )
             continue
 
-        try:
-            data = cli.inspect_container(container.container_id)
-
-        except docker.errors.NotFound:
+        if container.container_id not in docker_states:
             continue
 
         else:
-            state = data.get('State', {}).get('Status')
-            job = container.containerbackgroundjob.last()
+            state = docker_states[container.container_id]
+            job = container.last_job
 
             if not (state and job and container.date_last_status_update):
                 continue
 
+            # Crash loop, wait for the next action
+            if container.parked:
+                continue
+
             # Do nothing, Docker state needs to be synced first
             if not container.state == state:
                 logger.warning(
@@ -215,8 +358,11 @@ def sync_container_state_with_last_user_action(_self):
 
             # Reset counter when action and state are in harmony
             if ACTION_TO_EXPECTED_STATE[job.action] == state:
-                job.retries = 0
-                job.save()
+                if job.retries or job.date_next_retry:
+                    job.retries = 0
+                    job.date_next_retry = None
+                    job.save()
+
                 continue
 
             logger.warning(
@@ -226,45 +372,470 @@ def sync_container_state_with_last_user_action(_self):
                 job.action,
             )
 
+            now = timezone.now()
+
+            if container.date_last_status_update > now - timedelta(
+                seconds=DEFAULT_GRACE_PERIOD_CONTAINER_STATUS
+            ) or (job.date_next_retry and job.date_next_retry > now):
+                continue
+
+            # Count each exit once, also when no retries are left, a crash
+            # recorded after the last (re)start has been counted already
             if (
-                container.date_last_status_update
-                <= timezone.now()
-                - timedelta(seconds=DEFAULT_GRACE_PERIOD_CONTAINER_STATUS)
-                and job.retries < container.max_retries
-            ):
-                container.log_entries.create(
-                    text=f'Syncing last registered container state ({container.state}) with current Docker state ({state})',
-                    process=PROCESS_TASK,
+                ACTION_TO_EXPECTED_STATE[job.action] == STATE_RUNNING
+                and state in (STATE_EXITED, STATE_DEAD)
+                and not (
+                    container.date_last_crash
+                    and container.date_last_crash
+                    >= (job.date_next_retry or job.date_created)
                 )
+            ):
+                if record_crash(container, now):
+                    continue
+
+            if job.retries >= container.max_retries:
+                continue
+
+            container.log_entries.create(
+                text=f'Syncing last registered container state ({container.state}) with current Docker state ({state})',
+                process=PROCESS_TASK,
+            )
 
-                # No async task
-                container_task(job.id)
-                job.retries += 1
-                job.save()
+            # The retry runs as a separate task, so a slow action does not
+            # hold up the reconciliation of the other containers
+            delay = get_retry_delay(job.retries)
+            job.retries += 1
+            job.date_next_retry = now + timedelta(seconds=delay)
+            job.save()
+            container_task.apply_async(
+                kwargs={'job_id': job.id},
+                countdown=delay,
+                **get_container_task_options(job.action, queue=QUEUE_BULK),
+            )
 
 
 @app.task(bind=True)
 def prune_zombie_containers(_self):
-    if settings.KIOSC_NETWORK_MODE != 'docker-shared':
-        # Only run in docker-shared mode: we don't want to kill containers which
-        # are not our own.
-        return
+    """Remove Docker containers of this instance that have no container.
 
+    Ownership is decided by the instance label set when the Docker container
+    is created, so Docker containers of other applications are never touched,
+    also not in ``host`` network mode. Docker containers created during the
+    grace period are skipped, as their ID may not be stored yet.
+    """
     cli = connect_docker()
-    for container in cli.containers():
-        container_networks = container['NetworkSettings']['Networks']
-        if len(container_networks) > 1 or not container_networks.get(
-            settings.KIOSC_DOCKER_NETWORK
-        ):
-            # Leave this container alone, it doesn't belong to KIOSC
-            # (or it is kiosc itself)
-            continue
+    threshold = (
+        timezone.now()
+        - timedelta(seconds=DEFAULT_GRACE_PERIOD_CONTAINER_STATUS)
+    ).timestamp()
+    candidates = [
+        container['Id']
+        for container in cli.containers(all=True, filters=get_instance_filter())
+        if container.get('Created', 0) < threshold
+    ]
+    known = Container.objects.get_known_docker_ids(candidates)
+    zombies = [c for c in candidates if c not in known]
+
+    def _remove(container_id):
+        logger.warning('Found zombie container: %s', container_id)
 
         try:
-            container = Container.objects.get(container_id=container['Id'])
-        except Container.DoesNotExist:
-            logger.warning('Found zombie container: %s', container['Id'])
-            cli.remove_container(container['Id'], force=True)
+            cli.remove_container(container_id, force=True)
+
+        except docker.errors.NotFound:
+            pass
+
+        except docker.errors.DockerException as e:
+            logger.error('%s: Failed to remove zombie: %s', container_id, e)
+
+    with ThreadPoolExecutor(
+        max_workers=settings.KIOSC_PRUNE_WORKERS
+    ) as executor:
+        list(executor.map(_remove, zombies))
+
+    return zombies
+
+
+def _parse_stats(stats):
+    """Return the resource usage fields from a Docker stats response."""
+    cpu = stats.get('cpu_stats', {})
+    precpu = stats.get('precpu_stats', {})
+    cpu_delta = cpu.get('cpu_usage', {}).get('total_usage', 0) - precpu.get(
+        'cpu_usage', {}
+    ).get('total_usage', 0)
+    system_delta = cpu.get('system_cpu_usage', 0) - precpu.get(
+        'system_cpu_usage', 0
+    )
+    online_cpus = cpu.get('online_cpus') or len(
+        cpu.get('cpu_usage', {}).get('percpu_usage') or [None]
+    )
+    cpu_percent = 0.0
+
+    if cpu_delta > 0 and system_delta > 0:
+        cpu_percent = cpu_delta / system_delta * online_cpus * 100.0
+
+    # Page cache is reclaimable and not counted, same as ``docker stats``
+    memory = stats.get('memory_stats', {})
+    memory_cache = memory.get('stats', {}).get(
+        'inactive_file', memory.get('stats', {}).get('cache', 0)
+    )
+    networks = (stats.get('networks') or {}).values()
+
+    return {
+        'cpu_percent': cpu_percent,
+        'memory_usage': max(memory.get('usage', 0) - memory_cache, 0),
+        'memory_limit': memory.get('limit'),
+        'network_rx': sum(n.get('rx_bytes', 0) for n in networks),
+        'network_tx': sum(n.get('tx_bytes', 0) for n in networks),
+        'pids': stats.get('pids_stats', {}).get('current'),
+    }
+
+
+@app.task(bind=True)
+def collect_container_stats(_self):
+    """Collect one resource usage sample for every running container.
+
+    The Docker stats requests are issued in parallel so that a single poll
+    does not take one second per container.
+    """
+    cli = connect_docker()
+    containers = list(
+        Container.objects.filter(
+            state=STATE_RUNNING, container_id__isnull=False
+        ).exclude(container_id='')
+    )
+
+    def _fetch(container):
+        try:
+            return container, cli.stats(container.container_id, stream=False)
+
+        except docker.errors.DockerException as e:
+            logger.warning(
+                '%s: Failed to collect stats: %s', container.sodar_uuid, e
+            )
+            return container, None
+
+    with ThreadPoolExecutor(
+        max_workers=settings.KIOSC_RESOURCE_USAGE_WORKERS
+    ) as executor:
+        results = list(executor.map(_fetch, containers))
+
+    now = timezone.now()
+    ContainerResourceUsage.objects.bulk_create(
+        [
+            ContainerResourceUsage(
+                container=container,
+                date_collected=now,
+                resolution=RESOLUTION_RAW,
+                **_parse_stats(stats),
+            )
+            for container, stats in results
+            if stats
+        ]
+    )
+
+
+@app.task(bind=True)
+def downsample_container_stats(_self):
+    """Aggregate raw resource usage samples to hourly samples and remove
+    samples that exceeded the retention period.
+    """
+    now = timezone.now()
+    raw_until = (
+        now - timedelta(hours=settings.KIOSC_RESOURCE_USAGE_RAW_RETENTION)
+    ).replace(minute=0, second=0, microsecond=0)
+    raw = ContainerResourceUsage.objects.filter(
+        resolution=RESOLUTION_RAW, date_collected__lt=raw_until
+    )
+
+    with transaction.atomic():
+        hourly = (
+            raw.annotate(hour=TruncHour('date_collected'))
+            .values('container', 'hour')
+            .annotate(
+                avg_cpu_percent=Avg('cpu_percent'),
+                avg_memory_usage=Avg('memory_usage'),
+                max_memory_limit=Max('memory_limit'),
+                max_network_rx=Max('network_rx'),
+                max_network_tx=Max('network_tx'),
+                max_pids=Max('pids'),
+            )
+            .order_by()
+        )
+        ContainerResourceUsage.objects.bulk_create(
+            [
+                ContainerResourceUsage(
+                    container_id=row['container'],
+                    date_collected=row['hour'],
+                    resolution=RESOLUTION_HOURLY,
+                    cpu_percent=row['avg_cpu_percent'],
+                    memory_usage=int(row['avg_memory_usage']),
+                    memory_limit=row['max_memory_limit'],
+                    network_rx=row['max_network_rx'],
+                    network_tx=row['max_network_tx'],
+                    pids=row['max_pids'],
+                )
+                for row in hourly
+            ]
+        )
+        raw.delete()
+
+    ContainerResourceUsage.objects.filter(
+        resolution=RESOLUTION_HOURLY,
+        date_collected__lt=now
+        - timedelta(days=settings.KIOSC_RESOURCE_USAGE_RETENTION),
+    ).delete()
+
+
+@app.task(bind=True)
+def recover_container_actions(_self):
+    """Recover containers whose action was interrupted by a crashed worker.
+
+    Journal entries without a transition for ``KIOSC_ACTION_JOURNAL_TIMEOUT``
+    seconds belong to actions that will not finish anymore. The container
+    state is synchronized with Docker and the job is marked as failed.
+    """
+    threshold = timezone.now() - timedelta(
+        seconds=settings.KIOSC_ACTION_JOURNAL_TIMEOUT
+    )
+
+    for entry in ContainerActionJournal.objects.filter(
+        date_modified__lt=threshold
+    ).select_related('container', 'job__bg_job'):
+        container = entry.container
+        logger.warning(
+            '%s: Recovering interrupted action %s (last transition: %s)',
+            container.sodar_uuid,
+            entry.action,
+            entry.transition or 'none',
+        )
+
+        try:
+            sync_container_state(container)
+
+        except docker.errors.DockerException as e:
+            logger.error('%s: Recovery failed: %s', container.sodar_uuid, e)
+            continue
+
+        with transaction.atomic():
+            entry.job.bg_job.status = JOB_STATE_FAILED
+            entry.job.bg_job.save()
+            entry.job.add_log_entry(
+                f'Action interrupted: {entry.action}', level=LOG_LEVEL_ERROR
+            )
+            container.log_entries.create(
+                text=f'Action interrupted: {entry.action}',
+                process=PROCESS_TASK,
+                level=LOG_LEVEL_ERROR,
+            )
+            entry.delete()
+
+
+@app.task(bind=True)
+def run_container_schedules(_self):
+    """Start and stop containers whose schedule was due since the last run.
+
+    Windows missed by a late or skipped run are caught up for at most a day.
+    If both the start and the stop window were missed, the later one wins.
+    All containers with a schedule are fetched in one query, the due actions
+    are submitted in bulk per project and action. The time of the run is only
+    stored once all due actions were submitted, so a failed run is caught up
+    by the next one.
+    """
+    now = timezone.now()
+    last_run = app_settings.get('containers', 'schedules_last_run')
+    since = max(
+        (
+            datetime.fromisoformat(last_run)
+            if last_run
+            else now - timedelta(minutes=1)
+        ),
+        now - timedelta(days=1),
+    )
+    due = defaultdict(list)
+    msgs = []
+
+    for container in Container.objects.filter(
+        Q(schedule_start__gt='') | Q(schedule_stop__gt='')
+    ).select_related('project'):
+        start = get_last_due(container.schedule_start, since, now)
+        stop = get_last_due(container.schedule_stop, since, now)
+
+        if container.state in STATES_ACTIVE:
+            if stop and not (start and start > stop):
+                due[(container.project, ACTION_STOP)].append(container.pk)
+
+        elif start and not (stop and stop > start):
+            due[(container.project, ACTION_START)].append(container.pk)
+
+    if due:
+        user = User.objects.get(username=settings.PROJECTROLES_DEFAULT_ADMIN)
+
+    for (project, action), pks in due.items():
+        batch = submit_container_jobs(
+            project,
+            Container.objects.filter(pk__in=pks),
+            action,
+            user,
+            f'{action.capitalize()} container',
+            f'Scheduled {action}',
+        )
+        msgs.append(
+            'Submitted {} scheduled {} jobs in {}'.format(
+                batch.jobs.count(), action, project.title
+            )
+        )
+
+    app_settings.set('containers', 'schedules_last_run', now.isoformat())
+    return msgs
+
+
+def _get_docker_containers(cli):
+    """Return ID, name and image of the running Docker containers of this
+    instance."""
+    containers = []
+
+    for container in cli.containers(filters=get_instance_filter()):
+        names = container.get('Names')
+        containers.append(
+            {
+                'id': container.get('Id'),
+                'name': names[0].lstrip('/') if names else '',
+                'image': container.get('Image'),
+            }
+        )
+
+    return containers
+
+
+def _get_docker_networks(cli):
+    """Return the Docker networks with their subnet and containers."""
+    networks = []
+
+    for network in cli.networks():
+        net_id = network.get('Id', '')
+
+        if net_id:
+            net_info = cli.inspect_network(net_id)
+
+        else:
+            net_info = network
+
+        netconf = net_info.get('IPAM', {}).get('Config')
+        containers = []
+
+        for container_id, container_info in net_info.get(
+            'Containers', {}
+        ).items():
+            containers.append(
+                {
+                    'name': container_info.get('Name'),
+                    'id': container_id,
+                    'ip': container_info.get('IPv4Address'),
+                }
+            )
+
+        networks.append(
+            {
+                'name': net_info.get('Name', ''),
+                'id': net_id,
+                'driver': net_info.get('Driver', ''),
+                'containers': containers,
+                'subnet': netconf[0].get('Subnet', '') if netconf else '',
+                'gateway': netconf[0].get('Gateway', '') if netconf else '',
+            }
+        )
+
+    return networks
+
+
+def _get_docker_images(cli):
+    """Return ID and repository of all Docker images."""
+    images = []
+
+    for image in cli.images():
+        repotags = image.get('RepoTags')
+        images.append(
+            {
+                'id': image.get('Id'),
+                'repos': repotags[0] if repotags else '',
+            }
+        )
+
+    return images
+
+
+def _get_docker_volumes(cli):
+    """Return name and mountpoint of all Docker volumes."""
+    volumes = []
+
+    for volume in cli.volumes().get('Volumes') or []:
+        volumes.append(
+            {
+                'name': volume.get('Name'),
+                'mountpoint': volume.get('Mountpoint'),
+            }
+        )
+
+    return volumes
+
+
+def is_cache_process_local():
+    """Return whether the default cache is not shared with the workers."""
+    return isinstance(caches['default'], (DummyCache, LocMemCache))
+
+
+def get_docker_snapshot():
+    """Return the cached Docker snapshot for the admin view.
+
+    If there is no snapshot yet, a refresh is submitted in the background
+    and ``None`` is returned. With a process-local cache the workers cannot
+    pass the snapshot on, so it is created synchronously instead.
+
+    :return: Dict with keys ``date``, ``containers``, ``networks``,
+             ``images`` and ``volumes`` or ``None``
+    """
+    snapshot = cache.get(DOCKER_SNAPSHOT_CACHE_KEY)
+
+    if snapshot is None:
+        if is_cache_process_local():
+            return create_docker_snapshot()
+
+        refresh_docker_snapshot.delay()
+
+    return snapshot
+
+
+def create_docker_snapshot():
+    """Create a snapshot of the Docker containers, networks, images and
+    volumes and store it in the cache.
+
+    :return: Dict with keys ``date``, ``containers``, ``networks``,
+             ``images`` and ``volumes``
+    """
+    cli = connect_docker()
+    snapshot = {
+        'date': timezone.now(),
+        'containers': _get_docker_containers(cli),
+        'networks': _get_docker_networks(cli),
+        'images': _get_docker_images(cli),
+        'volumes': _get_docker_volumes(cli),
+    }
+    # Keep the snapshot for a few missed refreshes
+    cache.set(
+        DOCKER_SNAPSHOT_CACHE_KEY,
+        snapshot,
+        settings.KIOSC_DOCKER_SNAPSHOT_INTERVAL * 5,
+    )
+    return snapshot
+
+
+@app.task(bind=True)
+def refresh_docker_snapshot(_self):
+    """Refresh the Docker snapshot in the cache, so the admin view does not
+    query Docker.
+    """
+    create_docker_snapshot()
 
 
 @app.on_after_finalize.connect
@@ -274,9 +845,23 @@ def setup_periodic_tasks(sender, **_kwargs):
     sender.add_periodic_task(
         60, sig=sync_container_state_with_last_user_action.s()
     )
+    sender.add_periodic_task(5 * 60, sig=pause_inactive_containers.s())
+    sender.add_periodic_task(5 * 60, sig=recover_container_actions.s())
+    sender.add_periodic_task(crontab(), sig=run_container_schedules.s())
     sender.add_periodic_task(
         crontab(hour=1, minute=11), sig=stop_inactive_containers.s()
     )
+    sender.add_periodic_task(
+        crontab(hour=1, minute=41), sig=remove_inactive_containers.s()
+    )
     sender.add_periodic_task(
         crontab(hour='*', minute=30), sig=prune_zombie_containers.s()
     )
+    sender.add_periodic_task(60, sig=collect_container_stats.s())
+    sender.add_periodic_task(
+        settings.KIOSC_DOCKER_SNAPSHOT_INTERVAL,
+        sig=refresh_docker_snapshot.s(),
+    )
+    sender.add_periodic_task(
+        crontab(hour='*', minute=5), sig=downsample_container_stats.s()
+    )
@@ -1,10 +1,21 @@
 import io
 from unittest.mock import patch
 
+import docker.errors
 from django.core.management import call_command
 
-from containers.models import STATE_RUNNING, STATE_EXITED, Container
-from containers.tests.helpers import TestBase, DockerMock
+from containers.models import (
+    ACTION_STOP,
+    STATE_RUNNING,
+    STATE_EXITED,
+    Container,
+    ContainerBackgroundJob,
+    ContainerReplica,
+    ProjectContainerStats,
+)
+from containers.statemachines import get_instance_filter
+from containers.tests.factories import ProjectFactory
+from containers.tests.helpers import TestBase
 
 
 class TestCommandMixin:
@@ -19,24 +30,86 @@ class TestStopAll(TestCommandMixin, TestBase):
 
     command = 'stop_all'
 
-    def test_no_containers(self):
+    @patch('docker.api.client.APIClient.containers')
+    def test_no_containers(self, containers):
+        containers.return_value = []
         out = self.run_command()
         self.assertIn('Command successfully finished', out)
 
-    @patch('containers.tasks.container_task.apply_async')
-    @patch('docker.api.client.APIClient.inspect_container')
-    def test_one_container(self, inspect_container, apply_async):
+    @patch('containers.tasks.container_task.run')
+    @patch('docker.api.client.APIClient.containers')
+    def test_one_container(self, containers, container_task):
         self.create_one_container()
         self.container1.state = STATE_RUNNING
         self.container1.save()
+        containers.return_value = [
+            {'Id': self.container1.container_id, 'State': STATE_RUNNING}
+        ]
 
-        out = self.run_command()
+        with self.captureOnCommitCallbacks(execute=True):
+            out = self.run_command()
 
-        self.assertIn('{} stopped'.format(self.container1.title), out)
+        self.assertIn('[1/1] {} stopped'.format(self.container1.title), out)
         self.assertIn('Command successfully finished', out)
 
-        inspect_container.assert_called()
-        apply_async.assert_called()
+        containers.assert_called_once_with(
+            all=True, filters=get_instance_filter()
+        )
+        container_task.assert_called_once()
+        self.assertEqual(
+            ContainerBackgroundJob.objects.get().action, ACTION_STOP
+        )
+
+    @patch('containers.tasks.container_task.run')
+    @patch('docker.api.client.APIClient.inspect_container')
+    @patch('docker.api.client.APIClient.containers')
+    def test_container_not_in_docker(
+        self, containers, inspect_container, container_task
+    ):
+        self.create_one_container()
+        containers.return_value = []
+        inspect_container.side_effect = docker.errors.NotFound('x')
+
+        out = self.run_command()
+
+        self.assertNotIn('stopped', out)
+        container_task.assert_not_called()
+
+    @patch('containers.tasks.container_task.run')
+    @patch('docker.api.client.APIClient.containers')
+    def test_project(self, containers, container_task):
+        self.create_two_containers()
+        self.container2.project = ProjectFactory()
+        self.container2.container_id = 'other'
+        self.container2.save()
+        containers.return_value = [
+            {'Id': self.container1.container_id, 'State': STATE_RUNNING},
+            {'Id': self.container2.container_id, 'State': STATE_RUNNING},
+        ]
+
+        out = self.run_command('--project', str(self.project.sodar_uuid))
+
+        self.assertIn('[1/1] {} stopped'.format(self.container1.title), out)
+        self.assertEqual(
+            ContainerBackgroundJob.objects.get().container, self.container1
+        )
+
+    @patch('containers.tasks.container_jobs_task.run')
+    @patch('docker.api.client.APIClient.containers')
+    def test_workers(self, containers, container_jobs_task):
+        self.create_two_containers()
+        self.container2.container_id = 'other'
+        self.container2.save()
+        containers.return_value = [
+            {'Id': self.container1.container_id, 'State': STATE_RUNNING},
+            {'Id': self.container2.container_id, 'State': STATE_RUNNING},
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.run_command('--workers', '1')
+
+        container_jobs_task.assert_called_once()
+        self.assertEqual(len(container_jobs_task.call_args.args[0]), 2)
 
 
 class TestRemoveStopped(TestCommandMixin, TestBase):
@@ -44,46 +117,106 @@ class TestRemoveStopped(TestCommandMixin, TestBase):
 
     command = 'remove_stopped'
 
-    def test_no_containers(self):
-        out = self.run_command()
-        self.assertIn('Command successfully finished', out)
-
-    @patch('docker.api.client.APIClient.inspect_container')
-    def test_stopped_and_running_container_dry_run(self, inspect_container):
+    def setUp(self):
+        super().setUp()
         self.create_two_containers()
         self.container1.state = STATE_RUNNING
         self.container1.save()
         self.container2.state = STATE_EXITED
+        self.container2.container_id = 'exited'
         self.container2.save()
+        self.docker_containers = [
+            {'Id': self.container1.container_id, 'State': STATE_RUNNING},
+            {'Id': self.container2.container_id, 'State': STATE_EXITED},
+        ]
+
+    @patch('docker.api.client.APIClient.inspect_container')
+    @patch('docker.api.client.APIClient.containers')
+    def test_no_containers(self, containers, inspect_container):
+        containers.return_value = []
+        inspect_container.side_effect = docker.errors.NotFound('x')
+        out = self.run_command()
+        self.assertIn('Command successfully finished', out)
 
-        inspect_container.side_effect = [DockerMock.inspect_container_stopped]
+    @patch('docker.api.client.APIClient.containers')
+    def test_stopped_and_running_container_dry_run(self, containers):
+        containers.return_value = self.docker_containers
 
         out = self.run_command()
 
-        self.assertIn('{} would be removed'.format(self.container2.title), out)
+        self.assertIn(
+            '[1/1] {} would be removed'.format(self.container2.title), out
+        )
         self.assertIn('Command successfully finished (dry-run)', out)
+        self.assertEqual(Container.objects.count(), 2)
 
-    @patch('containers.tasks.container_task.run')
-    @patch('docker.api.client.APIClient.inspect_container')
-    def test_stopped_and_running_container(
-        self, inspect_container, container_task
-    ):
-        self.create_two_containers()
-        self.container1.state = STATE_RUNNING
-        self.container1.save()
-        self.container2.state = STATE_EXITED
+    @patch('docker.api.client.APIClient.remove_container')
+    @patch('docker.api.client.APIClient.containers')
+    def test_stopped_and_running_container(self, containers, remove_container):
+        containers.return_value = self.docker_containers
+
+        out = self.run_command('--remove', '--workers', '2')
+
+        remove_container.assert_called_once_with('exited', force=True)
+
+        self.assertIn('[1/1] {} removed'.format(self.container2.title), out)
+        self.assertIn('Command successfully finished', out)
+
+        self.assertEqual(Container.objects.count(), 1)
+
+    @patch('docker.api.client.APIClient.remove_container')
+    @patch('docker.api.client.APIClient.containers')
+    def test_remove_replicas(self, containers, remove_container):
+        self.container2.replicas = 2
         self.container2.save()
+        ContainerReplica.objects.create(
+            container=self.container2, index=1, docker_id='replica'
+        )
+        containers.return_value = self.docker_containers
 
-        inspect_container.side_effect = [DockerMock.inspect_container_stopped]
+        self.run_command('--remove')
+
+        self.assertEqual(
+            [c.args for c in remove_container.call_args_list],
+            [('exited',), ('replica',)],
+        )
+        self.assertFalse(ContainerReplica.objects.exists())
+
+    @patch('docker.api.client.APIClient.remove_container')
+    @patch('docker.api.client.APIClient.containers')
+    def test_state_mismatch(self, containers, remove_container):
+        self.docker_containers[1]['State'] = STATE_RUNNING
+        containers.return_value = self.docker_containers
 
         out = self.run_command('--remove')
 
-        container_task.assert_called()
+        remove_container.assert_not_called()
+        self.assertNotIn('removed', out)
+        self.assertEqual(Container.objects.count(), 2)
 
-        self.assertIn('{} removed'.format(self.container2.title), out)
-        self.assertIn('Command successfully finished', out)
+    @patch('docker.api.client.APIClient.remove_container')
+    @patch('docker.api.client.APIClient.containers')
+    def test_remove_failed(self, containers, remove_container):
+        containers.return_value = self.docker_containers
+        remove_container.side_effect = docker.errors.APIError('error')
 
-        self.assertEqual(Container.objects.count(), 1)
+        out = self.run_command('--remove')
+
+        self.assertIn(
+            '[1/1] {} could not be removed'.format(self.container2.title), out
+        )
+        self.assertEqual(Container.objects.count(), 2)
+
+    @patch('docker.api.client.APIClient.remove_container')
+    @patch('docker.api.client.APIClient.containers')
+    def test_older_than(self, containers, remove_container):
+        containers.return_value = self.docker_containers
+
+        out = self.run_command('--remove', '--older-than', '1')
+
+        remove_container.assert_not_called()
+        self.assertIn('Command successfully finished', out)
+        self.assertEqual(Container.objects.count(), 2)
 
 
 class TestStopUnused(TestCommandMixin, TestBase):
@@ -99,3 +232,20 @@ class TestStopUnused(TestCommandMixin, TestBase):
         out = self.run_command()
         stop_inactive_containers.assert_called()
         self.assertIn('Command successfully finished', out)
+
+
+class TestRebuildContainerStats(TestCommandMixin, TestBase):
+    """Tests for management command ``rebuild_container_stats``."""
+
+    command = 'rebuild_container_stats'
+
+    def test_rebuild(self):
+        self.create_one_container()
+        ProjectContainerStats.objects.all().delete()
+
+        out = self.run_command()
+
+        self.assertEqual(
+            ProjectContainerStats.objects.get(project=self.project).count, 1
+        )
+        self.assertIn('Command successfully finished', out)
@@ -5,7 +5,9 @@ from unittest import mock
 from unittest.mock import patch, call
 
 import docker.errors
+from bgjobs.models import JOB_STATE_DONE, JOB_STATE_FAILED
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from django.test import override_settings
 
@@ -21,8 +23,15 @@ from containers.models import (
     STATE_PAUSED,
     ACTION_UNPAUSE,
     ACTION_START,
+    ACTION_DELETE,
     PROCESS_PROXY,
+    ContainerActionJournal,
     ContainerBackgroundJob,
+    ContainerResourceUsage,
+    STATE_PULLING,
+    STATE_FAILED,
+    RESOLUTION_RAW,
+    RESOLUTION_HOURLY,
 )
 from kioscadmin.tasks import (
     connect_docker,
@@ -30,9 +39,19 @@ from kioscadmin.tasks import (
     sync_container_state_with_last_user_action,
     DEFAULT_GRACE_PERIOD_CONTAINER_STATUS,
     stop_inactive_containers,
+    pause_inactive_containers,
+    remove_inactive_containers,
     prune_zombie_containers,
+    collect_container_stats,
+    downsample_container_stats,
+    recover_container_actions,
+    run_container_schedules,
+    refresh_docker_snapshot,
+    DOCKER_SNAPSHOT_CACHE_KEY,
+    get_retry_delay,
 )
-from containers.tasks import container_task
+from containers.statemachines import get_docker_labels
+from containers.tasks import container_task, submit_container_job
 
 from containers.tests.test_lifecycle import build_testdata_container
 from containers.tests.factories import (
@@ -48,6 +67,10 @@ from containers.tests.helpers import (
     log_entry3,
     log_entry1_no_date,
 )
+from projectroles.app_settings import AppSettingAPI
+
+
+app_settings = AppSettingAPI()
 
 
 class TestPollDockerStatusAndLogsTask(TestBase):
@@ -55,6 +78,12 @@ class TestPollDockerStatusAndLogsTask(TestBase):
 
     def setUp(self):
         super().setUp()
+        # Containers without labels are inspected one by one
+        patcher = patch(
+            'docker.api.client.APIClient.containers', return_value=[]
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
         self.cli = connect_docker()
         self.create_one_container()
         self.container1.container_id = DockerMock.create_container.get('Id')
@@ -205,6 +234,12 @@ class TestSyncContainerStateWithLastUserActionTask(TestBase):
 
     def setUp(self):
         super().setUp()
+        # Containers without labels are inspected one by one
+        patcher = patch(
+            'docker.api.client.APIClient.containers', return_value=[]
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
         self.cli = connect_docker()
         self.create_one_container()
         self.container1.container_id = DockerMock.create_container.get('Id')
@@ -213,6 +248,8 @@ class TestSyncContainerStateWithLastUserActionTask(TestBase):
         self.bg_job = ContainerBackgroundJobFactory(
             project=self.project, user=self.superuser, container=self.container1
         )
+        # Load the last job set by the new job
+        self.container1.refresh_from_db()
 
     @patch('containers.tasks.sync_container_state')
     @patch('docker.api.client.APIClient.remove_container')
@@ -288,6 +325,7 @@ class TestSyncContainerStateWithLastUserActionTask(TestBase):
     ):
         # Prepare
         self.bg_job.delete()
+        self.container1.refresh_from_db()
         self.container1.date_last_status_update = timezone.now()
         self.container1.save()
         inspect_container.side_effect = [DockerMock.inspect_container_started]
@@ -847,6 +885,7 @@ class TestSyncContainerStateWithLastUserActionTask(TestBase):
             environment=environment,
             command=self.container1.command or None,
             ports=[self.container1.container_port],
+            labels=get_docker_labels(self.container1),
             host_config=None,
         )
         create_host_config.assert_called_once_with(
@@ -1010,11 +1049,160 @@ class TestSyncContainerStateWithLastUserActionTask(TestBase):
         self.assertEqual(self.container1.state, STATE_RUNNING)
 
 
+class TestSyncContainerStateRetries(TestBase):
+    """Tests for the retries of ``sync_container_state_with_last_user_action``."""
+
+    def setUp(self):
+        super().setUp()
+        for target, kwargs in (
+            ('docker.api.client.APIClient.containers', {'return_value': []}),
+            (
+                'docker.api.client.APIClient.inspect_container',
+                {'return_value': DockerMock.inspect_container_stopped},
+            ),
+        ):
+            patcher = patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.create_one_container()
+        self.container1.container_id = DockerMock.create_container.get('Id')
+        self.container1.state = STATE_EXITED
+        self.container1.date_last_status_update = timezone.now() - timedelta(
+            seconds=DEFAULT_GRACE_PERIOD_CONTAINER_STATUS + 20
+        )
+        self.container1.save()
+        self.bg_job = ContainerBackgroundJobFactory(
+            project=self.project,
+            user=self.superuser,
+            container=self.container1,
+            action=ACTION_START,
+        )
+
+    @override_settings(KIOSC_RETRY_BACKOFF=30, KIOSC_RETRY_BACKOFF_MAX=100)
+    def test_get_retry_delay(self):
+        self.assertTrue(15 <= get_retry_delay(0) <= 30)
+        self.assertTrue(30 <= get_retry_delay(1) <= 60)
+        self.assertTrue(50 <= get_retry_delay(5) <= 100)
+
+    @patch('kioscadmin.tasks.get_retry_delay', return_value=60)
+    @patch('kioscadmin.tasks.container_task.apply_async')
+    def test_retry_enqueued(self, apply_async, get_retry_delay):
+        sync_container_state_with_last_user_action()
+
+        apply_async.assert_called_once_with(
+            kwargs={'job_id': self.bg_job.id},
+            countdown=60,
+            queue='bulk',
+            priority=6,
+        )
+        get_retry_delay.assert_called_once_with(0)
+        self.bg_job.refresh_from_db()
+        self.assertEqual(self.bg_job.retries, 1)
+        self.assertGreater(self.bg_job.date_next_retry, timezone.now())
+
+    @patch('kioscadmin.tasks.container_task.apply_async')
+    def test_retry_backoff(self, apply_async):
+        self.bg_job.retries = 1
+        self.bg_job.date_next_retry = timezone.now() + timedelta(minutes=1)
+        self.bg_job.save()
+
+        sync_container_state_with_last_user_action()
+
+        apply_async.assert_not_called()
+
+    @override_settings(KIOSC_CRASH_LOOP_LIMIT=2)
+    @patch('kioscadmin.tasks.container_task.apply_async')
+    def test_crash_loop_parked(self, apply_async):
+        self.container1.crash_count = 1
+        self.container1.date_last_crash = timezone.now() - timedelta(minutes=5)
+        self.container1.save(update_fields=['crash_count', 'date_last_crash'])
+
+        sync_container_state_with_last_user_action()
+
+        apply_async.assert_not_called()
+        self.container1.refresh_from_db()
+        self.assertTrue(self.container1.parked)
+        self.assertEqual(self.container1.crash_count, 2)
+
+        # Parked containers are skipped
+        sync_container_state_with_last_user_action()
+        apply_async.assert_not_called()
+
+    @override_settings(KIOSC_CRASH_LOOP_LIMIT=2)
+    @patch('kioscadmin.tasks.container_task.apply_async')
+    def test_crash_loop_parked_no_retries_left(self, apply_async):
+        self.container1.crash_count = 1
+        self.container1.date_last_crash = timezone.now() - timedelta(minutes=5)
+        self.container1.save(update_fields=['crash_count', 'date_last_crash'])
+        self.bg_job.retries = self.container1.max_retries
+        self.bg_job.date_next_retry = timezone.now() - timedelta(minutes=1)
+        self.bg_job.save()
+
+        sync_container_state_with_last_user_action()
+
+        apply_async.assert_not_called()
+        self.container1.refresh_from_db()
+        self.assertTrue(self.container1.parked)
+        self.assertEqual(self.container1.crash_count, 2)
+
+    @override_settings(KIOSC_CRASH_LOOP_LIMIT=5)
+    @patch('kioscadmin.tasks.container_task.apply_async')
+    def test_crash_counted_once(self, apply_async):
+        self.bg_job.retries = self.container1.max_retries
+        self.bg_job.date_next_retry = timezone.now() - timedelta(minutes=1)
+        self.bg_job.save()
+
+        sync_container_state_with_last_user_action()
+        sync_container_state_with_last_user_action()
+
+        apply_async.assert_not_called()
+        self.container1.refresh_from_db()
+        self.assertFalse(self.container1.parked)
+        self.assertEqual(self.container1.crash_count, 1)
+
+    @override_settings(KIOSC_CRASH_LOOP_LIMIT=2, KIOSC_CRASH_LOOP_WINDOW=60)
+    @patch('kioscadmin.tasks.container_task.apply_async')
+    def test_crash_outside_window(self, apply_async):
+        self.container1.crash_count = 1
+        self.container1.date_last_crash = timezone.now() - timedelta(minutes=5)
+        self.container1.save(update_fields=['crash_count', 'date_last_crash'])
+
+        sync_container_state_with_last_user_action()
+
+        apply_async.assert_called_once()
+        self.container1.refresh_from_db()
+        self.assertFalse(self.container1.parked)
+        self.assertEqual(self.container1.crash_count, 1)
+
+    @patch('containers.tasks.container_task.apply_async')
+    def test_submit_container_job_unparks(self, apply_async):
+        self.container1.parked = True
+        self.container1.crash_count = 5
+        self.container1.save(update_fields=['parked', 'crash_count'])
+        self.bg_job.bg_job.status = JOB_STATE_DONE
+        self.bg_job.bg_job.save()
+
+        submit_container_job(
+            self.container1, ACTION_START, self.user, 'Start container', 0
+        )
+
+        self.container1.refresh_from_db()
+        self.assertFalse(self.container1.parked)
+        self.assertEqual(self.container1.crash_count, 0)
+
+
 class TestStopInactiveContainers(TestBase):
     """Tests for ``stop_inactive_containers`` task."""
 
     def setUp(self):
         super().setUp()
+        # Containers without labels are inspected one by one
+        patcher = patch(
+            'docker.api.client.APIClient.containers', return_value=[]
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
         self.cli = connect_docker()
         self.create_one_container()
         self.container1.container_id = DockerMock.create_container.get('Id')
@@ -1305,7 +1493,8 @@ class TestStopInactiveContainers(TestBase):
         ]
 
         # Run
-        stop_inactive_containers()
+        with self.captureOnCommitCallbacks(execute=True):
+            stop_inactive_containers()
 
         # Assert mocks
         create_container.assert_not_called()
@@ -1325,6 +1514,231 @@ class TestStopInactiveContainers(TestBase):
         self.assertEqual(ContainerBackgroundJob.objects.count(), 1)
 
 
+class TestPauseInactiveContainers(TestBase):
+    """Tests for ``pause_inactive_containers`` task."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_one_container()
+        self.container1.container_id = DockerMock.create_container.get('Id')
+        self.container1.image_id = DockerMock.inspect_image.get('Id')
+        self.container1.state = STATE_RUNNING
+        self.container1.inactivity_pause_threshold = 30
+        self.container1.save()
+
+    def _create_access(self, delta):
+        with mock.patch(
+            'django.utils.timezone.now',
+            mock.Mock(return_value=timezone.now() - delta),
+        ):
+            self.container1.log_entries.create(
+                text='Accessing',
+                process=PROCESS_PROXY,
+                user=self.superuser,
+            )
+
+    @patch('containers.tasks.sync_container_state')
+    @patch('docker.api.client.APIClient.remove_container')
+    @patch('docker.api.client.APIClient.unpause')
+    @patch('docker.api.client.APIClient.pause')
+    @patch('docker.api.client.APIClient.stop')
+    @patch('docker.api.client.APIClient.inspect_container')
+    def test_no_threshold(
+        self,
+        inspect_container,
+        stop,
+        pause,
+        unpause,
+        remove_container,
+        sync_container_state,
+    ):
+        # Prepare
+        self._create_access(timedelta(hours=2))
+        self.container1.inactivity_pause_threshold = None
+        self.container1.save()
+
+        # Run
+        pause_inactive_containers()
+
+        # Assert
+        pause.assert_not_called()
+        self.assertEqual(ContainerBackgroundJob.objects.count(), 0)
+
+    @patch('containers.tasks.sync_container_state')
+    @patch('docker.api.client.APIClient.remove_container')
+    @patch('docker.api.client.APIClient.unpause')
+    @patch('docker.api.client.APIClient.pause')
+    @patch('docker.api.client.APIClient.stop')
+    @patch('docker.api.client.APIClient.inspect_container')
+    def test_last_access_below_threshold(
+        self,
+        inspect_container,
+        stop,
+        pause,
+        unpause,
+        remove_container,
+        sync_container_state,
+    ):
+        # Prepare
+        self._create_access(timedelta(minutes=10))
+
+        # Run
+        pause_inactive_containers()
+
+        # Assert
+        pause.assert_not_called()
+        self.assertEqual(ContainerBackgroundJob.objects.count(), 0)
+
+    @patch('containers.tasks.sync_container_state')
+    @patch('docker.api.client.APIClient.remove_container')
+    @patch('docker.api.client.APIClient.unpause')
+    @patch('docker.api.client.APIClient.pause')
+    @patch('docker.api.client.APIClient.stop')
+    @patch('docker.api.client.APIClient.inspect_container')
+    def test_last_access_above_threshold(
+        self,
+        inspect_container,
+        stop,
+        pause,
+        unpause,
+        remove_container,
+        sync_container_state,
+    ):
+        # Prepare
+        self._create_access(timedelta(hours=1))
+        inspect_container.side_effect = [DockerMock.inspect_container_paused]
+
+        # Run
+        with self.captureOnCommitCallbacks(execute=True):
+            pause_inactive_containers()
+
+        # Assert mocks
+        pause.assert_called_once_with(self.container1.container_id)
+        stop.assert_not_called()
+        unpause.assert_not_called()
+        remove_container.assert_not_called()
+
+        # Assert objects
+        self.container1.refresh_from_db()
+        self.assertEqual(self.container1.state, STATE_PAUSED)
+        self.assertEqual(ContainerBackgroundJob.objects.count(), 1)
+        self.assertEqual(
+            ContainerBackgroundJob.objects.first().action, ACTION_PAUSE
+        )
+
+
+class TestRemoveInactiveContainers(TestBase):
+    """Tests for ``remove_inactive_containers`` task."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_one_container()
+        self.container1.container_id = DockerMock.create_container.get('Id')
+        self.container1.image_id = DockerMock.inspect_image.get('Id')
+        self.container1.state = STATE_EXITED
+        self.container1.inactivity_delete_threshold = 7
+        self.container1.save()
+
+    def _create_access(self, delta):
+        with mock.patch(
+            'django.utils.timezone.now',
+            mock.Mock(return_value=timezone.now() - delta),
+        ):
+            self.container1.log_entries.create(
+                text='Accessing',
+                process=PROCESS_PROXY,
+                user=self.superuser,
+            )
+
+    @patch('containers.tasks.sync_container_state')
+    @patch('docker.api.client.APIClient.remove_container')
+    @patch('docker.api.client.APIClient.unpause')
+    @patch('docker.api.client.APIClient.pause')
+    @patch('docker.api.client.APIClient.stop')
+    @patch('docker.api.client.APIClient.inspect_container')
+    def test_state_running(
+        self,
+        inspect_container,
+        stop,
+        pause,
+        unpause,
+        remove_container,
+        sync_container_state,
+    ):
+        # Prepare
+        self._create_access(timedelta(days=10))
+        self.container1.state = STATE_RUNNING
+        self.container1.save()
+
+        # Run
+        remove_inactive_containers()
+
+        # Assert
+        remove_container.assert_not_called()
+        self.assertEqual(ContainerBackgroundJob.objects.count(), 0)
+
+    @patch('containers.tasks.sync_container_state')
+    @patch('docker.api.client.APIClient.remove_container')
+    @patch('docker.api.client.APIClient.unpause')
+    @patch('docker.api.client.APIClient.pause')
+    @patch('docker.api.client.APIClient.stop')
+    @patch('docker.api.client.APIClient.inspect_container')
+    def test_last_access_below_threshold(
+        self,
+        inspect_container,
+        stop,
+        pause,
+        unpause,
+        remove_container,
+        sync_container_state,
+    ):
+        # Prepare
+        self._create_access(timedelta(days=3))
+
+        # Run
+        remove_inactive_containers()
+
+        # Assert
+        remove_container.assert_not_called()
+        self.assertEqual(ContainerBackgroundJob.objects.count(), 0)
+
+    @patch('containers.tasks.sync_container_state')
+    @patch('docker.api.client.APIClient.remove_container')
+    @patch('docker.api.client.APIClient.unpause')
+    @patch('docker.api.client.APIClient.pause')
+    @patch('docker.api.client.APIClient.stop')
+    @patch('docker.api.client.APIClient.inspect_container')
+    def test_last_access_above_threshold(
+        self,
+        inspect_container,
+        stop,
+        pause,
+        unpause,
+        remove_container,
+        sync_container_state,
+    ):
+        # Prepare
+        self._create_access(timedelta(days=10))
+
+        # Run
+        with self.captureOnCommitCallbacks(execute=True):
+            remove_inactive_containers()
+
+        # Assert mocks
+        remove_container.assert_called_once_with(
+            self.container1.container_id, force=True
+        )
+        stop.assert_not_called()
+        pause.assert_not_called()
+        unpause.assert_not_called()
+
+        # Assert objects
+        self.assertEqual(ContainerBackgroundJob.objects.count(), 1)
+        self.assertEqual(
+            ContainerBackgroundJob.objects.first().action, ACTION_DELETE
+        )
+
+
 @override_settings(
     KIOSC_NETWORK_MODE='docker-shared',
     KIOSC_DOCKER_NETWORK='kiosc-docker-network-testing',
@@ -1353,6 +1767,7 @@ class TestPruneZombieContainers(TestBase):
         network = self.cli.networks(settings.KIOSC_DOCKER_NETWORK)[0]
         self.cli.remove_network(network['Id'])
 
+    @patch('kioscadmin.tasks.DEFAULT_GRACE_PERIOD_CONTAINER_STATUS', 0)
     def test_prune_zombie_containers(self):
         bg_job = ContainerBackgroundJobFactory(
             user=self.superuser,
@@ -1374,3 +1789,482 @@ class TestPruneZombieContainers(TestBase):
             if container['ImageID'] == image_id:
                 # Container should not be found
                 raise RuntimeError('Container did not stop successfully')
+
+
+STATS = {
+    'cpu_stats': {
+        'cpu_usage': {'total_usage': 400},
+        'system_cpu_usage': 2000,
+        'online_cpus': 2,
+    },
+    'precpu_stats': {
+        'cpu_usage': {'total_usage': 200},
+        'system_cpu_usage': 1000,
+    },
+    'memory_stats': {
+        'usage': 3000,
+        'limit': 8000,
+        'stats': {'inactive_file': 1000},
+    },
+    'networks': {
+        'eth0': {'rx_bytes': 10, 'tx_bytes': 20},
+        'eth1': {'rx_bytes': 1, 'tx_bytes': 2},
+    },
+    'pids_stats': {'current': 5},
+}
+
+
+class TestPruneZombieContainersLabels(TestBase):
+    """Tests for ``prune_zombie_containers`` task with mocked Docker."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_one_container()
+        self.created = (timezone.now() - timedelta(hours=1)).timestamp()
+
+    @patch('docker.api.client.APIClient.remove_container')
+    @patch('docker.api.client.APIClient.containers')
+    def test_prune(self, containers, remove_container):
+        containers.return_value = [
+            {'Id': self.container1.container_id, 'Created': self.created},
+            {'Id': 'zombie1', 'Created': self.created},
+            {'Id': 'zombie2', 'Created': self.created},
+        ]
+
+        # Run
+        zombies = prune_zombie_containers()
+
+        # Assert
+        self.assertEqual(zombies, ['zombie1', 'zombie2'])
+        containers.assert_called_once_with(
+            all=True,
+            filters={'label': f'kiosc.instance={settings.KIOSC_INSTANCE_ID}'},
+        )
+        remove_container.assert_has_calls(
+            [call('zombie1', force=True), call('zombie2', force=True)],
+            any_order=True,
+        )
+        self.assertEqual(remove_container.call_count, 2)
+
+    @patch('docker.api.client.APIClient.remove_container')
+    @patch('docker.api.client.APIClient.containers')
+    def test_prune_grace_period(self, containers, remove_container):
+        containers.return_value = [
+            {'Id': 'zombie1', 'Created': timezone.now().timestamp()},
+        ]
+
+        # Run
+        zombies = prune_zombie_containers()
+
+        # Assert
+        self.assertEqual(zombies, [])
+        remove_container.assert_not_called()
+
+    @patch('docker.api.client.APIClient.remove_container')
+    @patch('docker.api.client.APIClient.containers')
+    def test_prune_not_found(self, containers, remove_container):
+        containers.return_value = [{'Id': 'zombie1', 'Created': self.created}]
+        remove_container.side_effect = docker.errors.NotFound('x')
+
+        # Run
+        zombies = prune_zombie_containers()
+
+        # Assert
+        self.assertEqual(zombies, ['zombie1'])
+
+
+class TestCollectContainerStats(TestBase):
+    """Tests for ``collect_container_stats`` task."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_two_containers()
+        self.container1.state = STATE_RUNNING
+        self.container1.save()
+
+    @patch('docker.api.client.APIClient.stats')
+    def test_collect(self, stats):
+        stats.return_value = STATS
+
+        # Run
+        collect_container_stats()
+
+        # Assert mocks
+        stats.assert_called_once_with(
+            self.container1.container_id, stream=False
+        )
+
+        # Assert objects
+        self.assertEqual(ContainerResourceUsage.objects.count(), 1)
+        usage = ContainerResourceUsage.objects.first()
+        self.assertEqual(usage.container, self.container1)
+        self.assertEqual(usage.resolution, RESOLUTION_RAW)
+        self.assertEqual(usage.cpu_percent, 40.0)
+        self.assertEqual(usage.memory_usage, 2000)
+        self.assertEqual(usage.memory_limit, 8000)
+        self.assertEqual(usage.network_rx, 11)
+        self.assertEqual(usage.network_tx, 22)
+        self.assertEqual(usage.pids, 5)
+
+    @patch('docker.api.client.APIClient.stats')
+    def test_collect_docker_error(self, stats):
+        stats.side_effect = docker.errors.NotFound('x')
+
+        # Run
+        collect_container_stats()
+
+        # Assert objects
+        self.assertEqual(ContainerResourceUsage.objects.count(), 0)
+
+
+class TestRecoverContainerActions(TestBase):
+    """Tests for ``recover_container_actions`` task."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_one_container()
+        self.container1.state = STATE_PULLING
+        self.container1.save()
+        self.job = ContainerBackgroundJobFactory(
+            project=self.project,
+            user=self.superuser,
+            container=self.container1,
+        )
+        self.entry = ContainerActionJournal.objects.create(
+            container=self.container1,
+            job=self.job,
+            action=ACTION_START,
+            state_before=STATE_INITIAL,
+            transition='pull',
+            state=STATE_PULLING,
+        )
+
+    @override_settings(KIOSC_ACTION_JOURNAL_TIMEOUT=0)
+    @patch('docker.api.client.APIClient.inspect_container')
+    def test_recover(self, inspect_container):
+        inspect_container.side_effect = docker.errors.NotFound('x')
+
+        # Run
+        recover_container_actions()
+
+        # Assert objects
+        self.container1.refresh_from_db()
+        self.job.bg_job.refresh_from_db()
+        self.assertEqual(self.container1.state, STATE_FAILED)
+        self.assertEqual(self.job.bg_job.status, JOB_STATE_FAILED)
+        self.assertEqual(ContainerActionJournal.objects.count(), 0)
+
+    @patch('docker.api.client.APIClient.inspect_container')
+    def test_recover_in_progress(self, inspect_container):
+        # Run
+        recover_container_actions()
+
+        # Assert objects
+        inspect_container.assert_not_called()
+        self.assertEqual(ContainerActionJournal.objects.count(), 1)
+
+
+class TestRunContainerSchedules(TestBase):
+    """Tests for ``run_container_schedules`` task."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_two_containers()
+        self.now = timezone.localtime()
+        self.due = f'{self.now.minute} {self.now.hour} * * *'
+        self.not_due = f'{(self.now.minute + 1) % 60} {self.now.hour} * * *'
+
+    def _run(self):
+        with mock.patch(
+            'django.utils.timezone.now', mock.Mock(return_value=self.now)
+        ):
+            return run_container_schedules()
+
+    @patch('kioscadmin.tasks.submit_container_jobs')
+    def test_start(self, submit_container_jobs):
+        self.container1.state = STATE_EXITED
+        self.container1.schedule_start = self.due
+        self.container1.save()
+        self.container2.state = STATE_EXITED
+        self.container2.schedule_start = self.not_due
+        self.container2.save()
+
+        # Run
+        self._run()
+
+        # Assert
+        submit_container_jobs.assert_called_once()
+        project, containers, action, user = submit_container_jobs.call_args[0][
+            :4
+        ]
+        self.assertEqual(project, self.project)
+        self.assertEqual(list(containers), [self.container1])
+        self.assertEqual(action, ACTION_START)
+        self.assertEqual(user, self.superuser)
+
+    @patch('kioscadmin.tasks.submit_container_jobs')
+    def test_stop(self, submit_container_jobs):
+        self.container1.state = STATE_RUNNING
+        self.container1.schedule_stop = self.due
+        self.container1.save()
+        self.container2.state = STATE_PAUSED
+        self.container2.schedule_stop = self.due
+        self.container2.save()
+
+        # Run
+        self._run()
+
+        # Assert
+        submit_container_jobs.assert_called_once()
+        containers, action = submit_container_jobs.call_args[0][1:3]
+        self.assertEqual(set(containers), {self.container1, self.container2})
+        self.assertEqual(action, ACTION_STOP)
+
+    @patch('kioscadmin.tasks.submit_container_jobs')
+    def test_state_already_reached(self, submit_container_jobs):
+        self.container1.state = STATE_RUNNING
+        self.container1.schedule_start = self.due
+        self.container1.save()
+        self.container2.state = STATE_EXITED
+        self.container2.schedule_stop = self.due
+        self.container2.save()
+
+        # Run
+        self._run()
+
+        # Assert
+        submit_container_jobs.assert_not_called()
+
+    @patch('containers.tasks.container_task.run')
+    def test_submit(self, container_task_run):
+        self.container1.state = STATE_EXITED
+        self.container1.schedule_start = self.due
+        self.container1.save()
+
+        # Run
+        msgs = self._run()
+
+        # Assert
+        job = ContainerBackgroundJob.objects.get()
+        self.assertEqual(job.container, self.container1)
+        self.assertEqual(job.action, ACTION_START)
+        self.assertEqual(len(msgs), 1)
+
+    def _set_last_run(self, minutes_ago):
+        app_settings.set(
+            'containers',
+            'schedules_last_run',
+            (self.now - timedelta(minutes=minutes_ago)).isoformat(),
+        )
+
+    def _get_schedule(self, minutes_ago):
+        missed = self.now - timedelta(minutes=minutes_ago)
+        return f'{missed.minute} {missed.hour} * * *'
+
+    @patch('kioscadmin.tasks.submit_container_jobs')
+    def test_catch_up(self, submit_container_jobs):
+        self._set_last_run(10)
+        self.container1.state = STATE_EXITED
+        self.container1.schedule_start = self._get_schedule(5)
+        self.container1.save()
+
+        # Run
+        self._run()
+
+        # Assert
+        submit_container_jobs.assert_called_once()
+        containers, action = submit_container_jobs.call_args[0][1:3]
+        self.assertEqual(list(containers), [self.container1])
+        self.assertEqual(action, ACTION_START)
+        self.assertEqual(
+            app_settings.get('containers', 'schedules_last_run'),
+            self.now.isoformat(),
+        )
+
+    @patch('kioscadmin.tasks.submit_container_jobs')
+    def test_catch_up_before_last_run(self, submit_container_jobs):
+        self._set_last_run(2)
+        self.container1.state = STATE_EXITED
+        self.container1.schedule_start = self._get_schedule(5)
+        self.container1.save()
+
+        # Run
+        self._run()
+
+        # Assert
+        submit_container_jobs.assert_not_called()
+
+    @patch('kioscadmin.tasks.submit_container_jobs')
+    def test_catch_up_later_window_wins(self, submit_container_jobs):
+        self._set_last_run(10)
+        self.container1.state = STATE_RUNNING
+        self.container1.schedule_stop = self._get_schedule(5)
+        self.container1.schedule_start = self._get_schedule(3)
+        self.container1.save()
+
+        # Run
+        self._run()
+
+        # Assert
+        submit_container_jobs.assert_not_called()
+
+    @patch('kioscadmin.tasks.submit_container_jobs')
+    def test_submit_failed(self, submit_container_jobs):
+        submit_container_jobs.side_effect = Exception('broker unavailable')
+        self._set_last_run(10)
+        self.container1.state = STATE_EXITED
+        self.container1.schedule_start = self._get_schedule(5)
+        self.container1.save()
+
+        # Run
+        with self.assertRaises(Exception):
+            self._run()
+
+        # Assert
+        self.assertEqual(
+            app_settings.get('containers', 'schedules_last_run'),
+            (self.now - timedelta(minutes=10)).isoformat(),
+        )
+
+
+class TestDownsampleContainerStats(TestBase):
+    """Tests for ``downsample_container_stats`` task."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_one_container()
+
+    def _create_usage(self, date, resolution=RESOLUTION_RAW, **kwargs):
+        return ContainerResourceUsage.objects.create(
+            container=self.container1,
+            date_collected=date,
+            resolution=resolution,
+            **kwargs,
+        )
+
+    def test_downsample(self):
+        hour = (timezone.now() - timedelta(days=2)).replace(
+            minute=0, second=0, microsecond=0
+        )
+        self._create_usage(
+            hour + timedelta(minutes=1),
+            cpu_percent=10,
+            memory_usage=100,
+            network_rx=5,
+        )
+        self._create_usage(
+            hour + timedelta(minutes=2),
+            cpu_percent=30,
+            memory_usage=300,
+            network_rx=7,
+        )
+        recent = self._create_usage(timezone.now())
+
+        # Run
+        downsample_container_stats()
+
+        # Assert objects
+        self.assertEqual(ContainerResourceUsage.objects.count(), 2)
+        hourly = ContainerResourceUsage.objects.get(
+            resolution=RESOLUTION_HOURLY
+        )
+        self.assertEqual(hourly.date_collected, hour)
+        self.assertEqual(hourly.cpu_percent, 20)
+        self.assertEqual(hourly.memory_usage, 200)
+        self.assertEqual(hourly.network_rx, 7)
+        self.assertTrue(
+            ContainerResourceUsage.objects.filter(pk=recent.pk).exists()
+        )
+
+    @override_settings(KIOSC_RESOURCE_USAGE_RETENTION=30)
+    def test_remove_expired(self):
+        self._create_usage(
+            timezone.now() - timedelta(days=31), resolution=RESOLUTION_HOURLY
+        )
+        kept = self._create_usage(
+            timezone.now() - timedelta(days=29), resolution=RESOLUTION_HOURLY
+        )
+
+        # Run
+        downsample_container_stats()
+
+        # Assert objects
+        self.assertEqual(
+            list(ContainerResourceUsage.objects.values_list('pk', flat=True)),
+            [kept.pk],
+        )
+
+
+class TestRefreshDockerSnapshot(TestBase):
+    """Tests for ``refresh_docker_snapshot`` task."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    @patch('docker.api.client.APIClient.volumes')
+    @patch('docker.api.client.APIClient.images')
+    @patch('docker.api.client.APIClient.inspect_network')
+    @patch('docker.api.client.APIClient.networks')
+    @patch('docker.api.client.APIClient.containers')
+    def test_refresh(
+        self, containers, networks, inspect_network, images, volumes
+    ):
+        containers.return_value = DockerMock.containers
+        networks.return_value = DockerMock.networks
+        inspect_network.return_value = DockerMock.inspect_network
+        images.return_value = DockerMock.images
+        volumes.return_value = DockerMock.volumes
+
+        # Run
+        refresh_docker_snapshot()
+
+        # Assert
+        snapshot = cache.get(DOCKER_SNAPSHOT_CACHE_KEY)
+        self.assertEqual(
+            snapshot['containers'],
+            [
+                {
+                    'id': 'abcedf',
+                    'name': 'container1',
+                    'image': 'sha256:abcdef',
+                }
+            ],
+        )
+        self.assertEqual(
+            snapshot['networks'],
+            [
+                {
+                    'name': 'network1',
+                    'id': 'abcdef',
+                    'driver': 'host',
+                    'subnet': '172.17.0.0/16',
+                    'gateway': '172.17.0.1',
+                    'containers': [
+                        {
+                            'id': '9',
+                            'name': 'container1',
+                            'ip': '172.17.0.5/16',
+                        }
+                    ],
+                }
+            ],
+        )
+        self.assertEqual(
+            snapshot['images'],
+            [
+                {
+                    'id': 'sha256:abcdef',
+                    'repos': 'docker.io/category/project:1.0.0',
+                }
+            ],
+        )
+        self.assertEqual(
+            snapshot['volumes'],
+            [
+                {
+                    'name': 'abcdef',
+                    'mountpoint': '/var/lib/docker/volumes/volume1',
+                }
+            ],
+        )
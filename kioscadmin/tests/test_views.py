@@ -2,15 +2,18 @@
 
 from unittest.mock import patch
 
+from django.core.cache import cache
 from django.urls import reverse
 
 from containers.tests.helpers import TestBase, DockerMock
+from kioscadmin.tasks import DOCKER_SNAPSHOT_CACHE_KEY, refresh_docker_snapshot
 
 
 class TestKioscAdminView(TestBase):
     """Tests for ``KioscAdminView``."""
 
-    def test_get_success(self):
+    @patch('docker.api.client.APIClient.containers')
+    def test_get_success(self, containers):
         with self.login(self.superuser):
             response = self.client.get(
                 reverse(
@@ -20,12 +23,10 @@ class TestKioscAdminView(TestBase):
 
             self.assertEqual(response.status_code, 200)
             self.assertEqual(len(response.context['object_list']), 0)
+            containers.assert_not_called()
 
-    @patch('docker.api.client.APIClient.networks')
-    @patch('docker.api.client.APIClient.inspect_network')
-    def test_get_networks(self, inspect_network, networks):
-        networks.side_effect = [DockerMock.networks]
-        inspect_network.side_effect = [DockerMock.inspect_network]
+    def test_get_one_container(self):
+        self.create_one_container()
 
         with self.login(self.superuser):
             response = self.client.get(
@@ -34,121 +35,105 @@ class TestKioscAdminView(TestBase):
                 )
             )
 
-            expected = [
-                {
-                    'name': DockerMock.inspect_network.get('Name'),
-                    'id': DockerMock.inspect_network.get('Id'),
-                    'driver': DockerMock.inspect_network.get('Driver'),
-                    'subnet': DockerMock.inspect_network.get('IPAM')
-                    .get('Config')[0]
-                    .get('Subnet'),
-                    'gateway': DockerMock.inspect_network.get('IPAM')
-                    .get('Config')[0]
-                    .get('Gateway'),
-                    'containers': [
-                        {
-                            'id': list(
-                                DockerMock.inspect_network.get(
-                                    'Containers'
-                                ).keys()
-                            )[0],
-                            'name': list(
-                                DockerMock.inspect_network.get(
-                                    'Containers'
-                                ).values()
-                            )[0].get('Name'),
-                            'ip': list(
-                                DockerMock.inspect_network.get(
-                                    'Containers'
-                                ).values()
-                            )[0].get('IPv4Address'),
-                        }
-                    ],
-                }
-            ]
-
-            self.assertEqual(len(response.context['networks']), 1)
-            self.assertEqual(response.context['networks'], expected)
-
-    @patch('docker.api.client.APIClient.images')
-    def test_get_images(self, images):
-        images.side_effect = [DockerMock.images]
-
-        with self.login(self.superuser):
-            response = self.client.get(
-                reverse(
-                    'kioscadmin:overview',
-                )
+            self.assertEqual(len(response.context['object_list']), 1)
+            self.assertListEqual(
+                list(response.context['object_list']), [self.container1]
             )
 
-            expected = [
-                {
-                    'id': DockerMock.images[0].get('Id'),
-                    'repos': DockerMock.images[0].get('RepoTags')[0],
-                }
-            ]
 
-            self.assertEqual(len(response.context['images']), 1)
-            self.assertEqual(response.context['images'], expected)
+class TestKioscAdminDockerPanelAjaxView(TestBase):
+    """Tests for ``KioscAdminDockerPanelAjaxView``."""
 
     @patch('docker.api.client.APIClient.volumes')
-    def test_get_volumes(self, volumes):
-        volumes.side_effect = [DockerMock.volumes]
-
+    @patch('docker.api.client.APIClient.images')
+    @patch('docker.api.client.APIClient.inspect_network')
+    @patch('docker.api.client.APIClient.networks')
+    @patch('docker.api.client.APIClient.containers')
+    def setUp(self, containers, networks, inspect_network, images, volumes):
+        super().setUp()
+        cache.clear()
+        containers.return_value = DockerMock.containers
+        networks.return_value = DockerMock.networks
+        inspect_network.return_value = DockerMock.inspect_network
+        images.return_value = DockerMock.images
+        volumes.return_value = DockerMock.volumes
+        refresh_docker_snapshot()
+
+    def _get(self, panel):
         with self.login(self.superuser):
-            response = self.client.get(
-                reverse(
-                    'kioscadmin:overview',
-                )
+            return self.client.get(
+                reverse('kioscadmin:ajax-docker-panel', kwargs={'panel': panel})
             )
 
-            expected = [
-                {
-                    'name': DockerMock.volumes.get('Volumes')[0].get('Name'),
-                    'mountpoint': DockerMock.volumes.get('Volumes')[0].get(
-                        'Mountpoint'
-                    ),
-                }
-            ]
+    def test_get_networks(self):
+        response = self._get('networks')
 
-            self.assertEqual(len(response.context['volumes']), 1)
-            self.assertEqual(response.context['volumes'], expected)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('network1', response.json()['html'])
+        self.assertIn('172.17.0.0/16', response.json()['html'])
+        self.assertIsNotNone(response.json()['date'])
 
-    @patch('docker.api.client.APIClient.containers')
-    def test_get_not_in_kiosc(self, containers):
-        containers.side_effect = [DockerMock.containers]
+    def test_get_images(self):
+        response = self._get('images')
 
-        with self.login(self.superuser):
-            response = self.client.get(
-                reverse(
-                    'kioscadmin:overview',
-                )
-            )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            DockerMock.images[0].get('RepoTags')[0], response.json()['html']
+        )
 
-            expected = [
-                {
-                    'id': DockerMock.containers[0].get('Id'),
-                    'name': DockerMock.containers[0]
-                    .get('Names')[0]
-                    .lstrip('/'),
-                    'image': DockerMock.containers[0].get('Image'),
-                }
-            ]
+    def test_get_volumes(self):
+        response = self._get('volumes')
 
-            self.assertEqual(len(response.context['not_in_kiosc']), 1)
-            self.assertEqual(response.context['not_in_kiosc'], expected)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            '/var/lib/docker/volumes/volume1', response.json()['html']
+        )
 
-    def test_get_one_container(self):
-        self.create_one_container()
+    def test_get_not_in_kiosc(self):
+        response = self._get('not-in-kiosc')
 
-        with self.login(self.superuser):
-            response = self.client.get(
-                reverse(
-                    'kioscadmin:overview',
-                )
-            )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(DockerMock.containers[0]['Id'], response.json()['html'])
 
-            self.assertEqual(len(response.context['object_list']), 1)
-            self.assertListEqual(
-                list(response.context['object_list']), [self.container1]
-            )
+    def test_get_not_in_kiosc_known_container(self):
+        self.create_one_container()
+        self.container1.container_id = DockerMock.containers[0]['Id']
+        self.container1.save()
+
+        response = self._get('not-in-kiosc')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(
+            DockerMock.containers[0]['Id'], response.json()['html']
+        )
+
+    @patch('kioscadmin.tasks.is_cache_process_local', return_value=False)
+    @patch('kioscadmin.tasks.refresh_docker_snapshot.delay')
+    def test_get_no_snapshot(self, delay, _is_cache_process_local):
+        cache.clear()
+
+        response = self._get('images')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()['html'])
+        delay.assert_called_once()
+
+    @patch('kioscadmin.tasks.create_docker_snapshot')
+    @patch('kioscadmin.tasks.refresh_docker_snapshot.delay')
+    def test_get_no_snapshot_local_cache(self, delay, create_docker_snapshot):
+        snapshot = cache.get(DOCKER_SNAPSHOT_CACHE_KEY)
+        create_docker_snapshot.return_value = snapshot
+        cache.clear()
+
+        response = self._get('images')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            DockerMock.images[0].get('RepoTags')[0], response.json()['html']
+        )
+        create_docker_snapshot.assert_called_once()
+        delay.assert_not_called()
+
+    def test_get_unknown_panel(self):
+        response = self._get('unknown')
+        self.assertEqual(response.status_code, 404)
@@ -12,4 +12,10 @@ urlpatterns = [
         view=views.KioscAdminView.as_view(),
         name='overview',
     ),
+    # Ajax views
+    path(
+        'ajax/docker-panel/<str:panel>',
+        view=views.KioscAdminDockerPanelAjaxView.as_view(),
+        name='ajax-docker-panel',
+    ),
 ]
@@ -1,7 +1,10 @@
+from django.http import Http404, JsonResponse
+from django.template.loader import render_to_string
+from django.views import View
 from django.views.generic import ListView
 
 from containers.models import Container
-from containers.statemachines import connect_docker
+from kioscadmin.tasks import get_docker_snapshot
 from projectroles.views import (
     LoginRequiredMixin,
     LoggedInPermissionMixin,
@@ -10,115 +13,63 @@ from projectroles.views import (
 
 APP_NAME = 'kioscadmin'
 
+#: Panels of the admin view that are loaded from the Docker snapshot.
+DOCKER_PANELS = ('not-in-kiosc', 'networks', 'images', 'volumes')
+
 
 class KioscAdminView(
     LoginRequiredMixin,
     LoggedInPermissionMixin,
     ListView,
 ):
-    """View for Kiosc admin."""
+    """View for Kiosc admin.
+
+    Only the container list is rendered from the database, the Docker panels
+    are loaded via ``KioscAdminDockerPanelAjaxView``.
+    """
 
     permission_required = 'kioscadmin.admin'
     template_name = 'kioscadmin/kioscadmin.html'
     model = Container
 
-    def _get_not_in_kiosc(self, cli):
-        not_in_kiosc = []
-
-        for container in cli.containers():
-            container_id = container.get('Id')
-
-            if container_id:
-                try:
-                    Container.objects.get(container_id=container_id)
-
-                except Container.DoesNotExist:
-                    names = container.get('Names')
-                    not_in_kiosc.append(
-                        {
-                            'id': container_id,
-                            'name': names[0].lstrip('/') if names else '',
-                            'image': container.get('Image'),
-                        }
-                    )
-
-        return not_in_kiosc
-
-    def _get_networks(self, cli):
-        networks = []
-
-        for network in cli.networks():
-            net_id = network.get('Id', '')
-
-            if net_id:
-                net_info = cli.inspect_network(net_id)
-
-            else:
-                net_info = network
-
-            netconf = net_info.get('IPAM', {}).get('Config')
-            containers = []
-
-            for container_id, container_info in net_info.get(
-                'Containers', {}
-            ).items():
-                container_name = container_info.get('Name')
-                container_ip = container_info.get('IPv4Address')
-                containers.append(
-                    {
-                        'name': container_name,
-                        'id': container_id,
-                        'ip': container_ip,
-                    }
-                )
-
-            networks.append(
-                {
-                    'name': net_info.get('Name', ''),
-                    'id': net_id,
-                    'driver': net_info.get('Driver', ''),
-                    'containers': containers,
-                    'subnet': netconf[0].get('Subnet', '') if netconf else '',
-                    'gateway': netconf[0].get('Gateway', '') if netconf else '',
-                }
-            )
-
-        return networks
-
-    def _get_images(self, cli):
-        images = []
-
-        for image in cli.images():
-            repotags = image.get('RepoTags')
-            images.append(
-                {
-                    'id': image.get('Id'),
-                    'repos': repotags[0] if repotags else '',
-                }
-            )
-
-        return images
-
-    def _get_volumes(self, cli):
-        volumes = []
-
-        for volume in cli.volumes().get('Volumes', []):
-            volumes.append(
-                {
-                    'name': volume.get('Name'),
-                    'mountpoint': volume.get('Mountpoint'),
-                }
-            )
-
-        return volumes
-
-    def get_context_data(self, *args, **kwargs):
-        context = super().get_context_data(*args, **kwargs)
-        cli = connect_docker()
-
-        context['not_in_kiosc'] = self._get_not_in_kiosc(cli)
-        context['networks'] = self._get_networks(cli)
-        context['images'] = self._get_images(cli)
-        context['volumes'] = self._get_volumes(cli)
-
-        return context
+
+class KioscAdminDockerPanelAjaxView(
+    LoginRequiredMixin,
+    LoggedInPermissionMixin,
+    View,
+):
+    """AJAX view for rendering one Docker panel of the Kiosc admin view from
+    the cached Docker snapshot."""
+
+    permission_required = 'kioscadmin.admin'
+
+    def _get_not_in_kiosc(self, containers):
+        known = Container.objects.get_known_docker_ids(
+            [c['id'] for c in containers if c['id']]
+        )
+        return [c for c in containers if c['id'] and c['id'] not in known]
+
+    def get(self, request, *args, **kwargs):
+        panel = kwargs['panel']
+
+        if panel not in DOCKER_PANELS:
+            raise Http404(f'Unknown panel: {panel}')
+
+        snapshot = get_docker_snapshot()
+
+        # The snapshot is being created in the background
+        if snapshot is None:
+            return JsonResponse({'html': None})
+
+        if panel == 'not-in-kiosc':
+            items = self._get_not_in_kiosc(snapshot['containers'])
+
+        else:
+            items = snapshot[panel]
+
+        html = render_to_string(
+            'kioscadmin/_panel_{}.html'.format(panel.replace('-', '_')),
+            {'items': items},
+            request=request,
+        )
+        return JsonResponse({'html': html, 'date': snapshot['date']})